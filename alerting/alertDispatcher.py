@@ -0,0 +1,205 @@
+from utils.log import log
+from utils.config import load_config
+from alerting.templateCache import TEMPLATE_FILES, render_template
+from alerting.alertOutbox import alertOutbox, start_background_drain
+
+import importlib
+import threading
+import time
+import traceback
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+# connector name (key under alerting.implementation in conf.json) -> factory.
+# A connector only has to provide send_rendered(subject, html, template_context),
+# raising an exception when the delivery failed. Batching connectors return a
+# concurrent.futures.Future instead, which completes once the batch was delivered.
+CONNECTOR_REGISTRY = {}
+
+_CONNECTOR_LOCK = threading.Lock()
+_CONNECTOR_CACHE = {"config": None, "connectors": {}}
+
+
+def register_connector(name: str, factory) -> None:
+    CONNECTOR_REGISTRY[name] = factory
+
+
+def lazy_connector(module: str, class_name: str):
+    """Factory that imports the connector module on first use (requests, smtplib, ... are
+    only loaded when an alert is actually sent through that connector)."""
+    def factory():
+        return getattr(importlib.import_module(module), class_name)()
+    factory.__qualname__ = class_name
+    return factory
+
+
+register_connector("mailgun", lazy_connector("alerting.mailgunConnector", "mailgunConnector"))
+register_connector("smtp", lazy_connector("alerting.smtpConnector", "smtpConnector"))
+register_connector("webhook", lazy_connector("alerting.webhookConnector", "webhookConnector"))
+
+
+def get_connector(name: str):
+    """Return the process-wide instance of a connector, rebuilt when conf.json changed."""
+    config = load_config()
+    stale = {}
+    with _CONNECTOR_LOCK:
+        if _CONNECTOR_CACHE["config"] is not config:
+            stale = _CONNECTOR_CACHE["connectors"]
+            _CONNECTOR_CACHE.update(config=config, connectors={})
+        connectors = _CONNECTOR_CACHE["connectors"]
+        if name not in connectors:
+            connectors[name] = CONNECTOR_REGISTRY[name]()
+        connector = connectors[name]
+    # connectors built from an outdated config still deliver what they have pending
+    for old in stale.values():
+        try:
+            if hasattr(old, "flush"):
+                old.flush(force=True)
+            if hasattr(old, "close"):
+                old.close()
+        except BaseException:
+            pass
+    return connector
+
+
+def flush_connectors(force: bool = True, close: bool = False) -> None:
+    """Flush batching connectors (e.g. SMTP digests) and optionally close their sessions.
+
+    Called at the end of a run or daemon cycle; failures are logged, never raised.
+    """
+    with _CONNECTOR_LOCK:
+        connectors = list(_CONNECTOR_CACHE["connectors"].items())
+    for name, connector in connectors:
+        try:
+            if hasattr(connector, "flush"):
+                connector.flush(force=force)
+            if close and hasattr(connector, "close"):
+                connector.close()
+        except BaseException:
+            log().warning(f"alertDispatcher: Could not flush connector {name}: {traceback.format_exc()}")
+
+
+class alertDispatcher:
+    def __init__(self) -> None:
+        try:
+            j = load_config()
+
+            alerting = j.section("alerting")
+            implementation = alerting.section("implementation")
+            dispatcher_cfg = alerting.section("dispatcher")
+
+            self.default_timeout: float = dispatcher_cfg.get_float("timeout_seconds", 30.0)
+            # names of all registered connectors that are enabled in conf.json
+            self.active_connectors: list = [
+                name for name in CONNECTOR_REGISTRY if implementation.section(name).get_bool("is_active")
+            ]
+            self.timeouts: dict = {
+                name: implementation.section(name).get_float("timeout_seconds", self.default_timeout)
+                for name in self.active_connectors
+            }
+
+            self.logger = log()
+
+            # with an active outbox alerts are persisted first and delivered in the background
+            self.outbox = alertOutbox() if self.active_connectors else None
+
+            self.logger.info(f"alertDispatcher: Initialized with connectors {self.active_connectors}")
+        except Exception:
+            # never take the monitoring run down because alerting is misconfigured
+            self.active_connectors = []
+            self.timeouts = {}
+            self.default_timeout = 30.0
+            self.outbox = None
+            self.logger = log()
+            self.logger.error("alertDispatcher/__init__: {0}".format(traceback.format_exc()))
+
+    def _get_connector(self, name: str):
+        return get_connector(name)
+
+    def __send(self, name: str, subject: str, html: str, context: dict) -> dict:
+        start = time.perf_counter()
+        try:
+            outcome = self._get_connector(name).send_rendered(subject, html, context)
+            result = {"connector": name, "ok": True, "error": None, "duration_ms": round((time.perf_counter() - start) * 1000.0, 3)}
+            if isinstance(outcome, Future):
+                result["pending"] = outcome
+            return result
+        except BaseException as e:
+            # connectors may still call adieu() internally; a SystemExit must not escape a worker
+            return {"connector": name, "ok": False, "error": f"{type(e).__name__}: {e}", "duration_ms": round((time.perf_counter() - start) * 1000.0, 3)}
+
+    def render(self, template_id: str, context: dict) -> str:
+        filename = TEMPLATE_FILES.get(template_id)
+        if filename is None:
+            raise KeyError(f"Unknown template_id '{template_id}'")
+        return render_template(filename, context)
+
+    def dispatch(self, subject: str, template_id: str, context: dict) -> list:
+        """Render an alert once and send it to all active connectors in parallel.
+
+        Returns one result dict per connector (connector, ok, error, duration_ms).
+        Failures and timeouts are logged and reported, never raised. With an active
+        outbox the alert is only queued and the results carry queued=True; so do alerts a
+        batching connector still holds back when the connector timeout is reached.
+        """
+        if not self.active_connectors:
+            self.logger.info("alertDispatcher: No alerting implementation is active. Skipping alert.")
+            return []
+
+        try:
+            html = self.render(template_id, context)
+        except Exception:
+            self.logger.error("alertDispatcher/render: {0}".format(traceback.format_exc()))
+            return []
+
+        outbox = getattr(self, "outbox", None)
+        if outbox is not None and outbox.is_active:
+            try:
+                alert_ids = outbox.enqueue(self.active_connectors, subject, template_id, html, context)
+                start_background_drain()
+                self.logger.info(f"alertDispatcher: '{subject}' queued in outbox for {self.active_connectors}", check=template_id)
+                return [
+                    {"connector": name, "ok": True, "error": None, "duration_ms": None, "queued": True, "outbox_id": alert_id}
+                    for name, alert_id in zip(self.active_connectors, alert_ids)
+                ]
+            except Exception:
+                self.logger.warning(f"alertDispatcher: Could not queue alert in outbox, sending directly: {traceback.format_exc()}")
+
+        results = []
+        executor = ThreadPoolExecutor(max_workers=len(self.active_connectors), thread_name_prefix="alert")
+        try:
+            started = time.monotonic()
+            futures = {
+                name: executor.submit(self.__send, name, subject, html, context)
+                for name in self.active_connectors
+            }
+            for name, future in futures.items():
+                deadline = started + self.timeouts.get(name, self.default_timeout)
+                try:
+                    result = future.result(timeout=max(0.0, deadline - time.monotonic()))
+                except FutureTimeoutError:
+                    results.append({"connector": name, "ok": False, "error": "timeout", "duration_ms": None})
+                    continue
+                pending = result.pop("pending", None)
+                if pending is not None:
+                    # batched: wait for the real outcome of the batch as long as the timeout allows
+                    try:
+                        pending.result(timeout=max(0.0, deadline - time.monotonic()))
+                    except FutureTimeoutError:
+                        # held back for a later batch or digest; its failure is logged by the connector
+                        result["queued"] = True
+                    except BaseException as e:
+                        result.update(ok=False, error=f"{type(e).__name__}: {e}")
+                    result["duration_ms"] = round((time.monotonic() - started) * 1000.0, 3)
+                results.append(result)
+        finally:
+            # do not wait for connectors that ran into their timeout
+            executor.shutdown(wait=False)
+
+        for result in results:
+            if result.get("queued"):
+                self.logger.info(f"alertDispatcher: '{subject}' held back for the next batch of {result['connector']}", check=template_id)
+            elif result["ok"]:
+                self.logger.info(f"alertDispatcher: '{subject}' delivered via {result['connector']}", check=template_id, duration_ms=result["duration_ms"])
+            else:
+                self.logger.warning(f"alertDispatcher: '{subject}' could not be delivered via {result['connector']}: {result['error']}", check=template_id, duration_ms=result["duration_ms"])
+        return results
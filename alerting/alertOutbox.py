@@ -0,0 +1,184 @@
+from utils.log import log
+from utils.config import load_config
+from utils.db import db as DB
+
+import json
+import threading
+import time
+import traceback
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+_WORKER_LOCK = threading.Lock()
+_WORKER = {"thread": None, "requested": False}
+
+
+class alertOutbox:
+    """Durable alert queue in the results DB plus the worker that drains it.
+
+    Alerts are written to the `alert_outbox` table first (one row per connector) and
+    delivered afterwards with bounded concurrency. Failed deliveries are retried with
+    exponential backoff until max_attempts is reached; nothing is lost when the
+    relay is briefly unavailable.
+    """
+
+    def __init__(self) -> None:
+        try:
+            j = load_config()
+
+            outbox_cfg = j.section("alerting").section("outbox")
+            self.max_workers: int = max(1, outbox_cfg.get_int("max_workers", 4))
+            self.max_attempts: int = max(1, outbox_cfg.get_int("max_attempts", 8))
+            self.backoff_base_seconds: float = outbox_cfg.get_float("backoff_base_seconds", 30.0)
+            self.backoff_max_seconds: float = outbox_cfg.get_float("backoff_max_seconds", 3600.0)
+            self.batch_size: int = max(1, outbox_cfg.get_int("batch_size", 50))
+            self.send_timeout: float = j.section("alerting").section("dispatcher").get_float("timeout_seconds", 30.0)
+
+            self.logger = log()
+
+            self.db_conn = None
+            self.is_active: bool = outbox_cfg.get_bool("is_active", False)
+            if self.is_active:
+                try:
+                    self.db_conn = DB()
+                except BaseException:
+                    self.db_conn = None
+                if not getattr(self.db_conn, "conn", None):
+                    # the outbox lives in the results DB: without it alerts are sent directly
+                    self.logger.warning("alertOutbox: DB is not available; falling back to direct delivery.")
+                    self.is_active = False
+        except Exception:
+            self.is_active = False
+            self.db_conn = None
+            self.logger = log()
+            self.logger.error("alertOutbox/__init__: {0}".format(traceback.format_exc()))
+
+    def enqueue(self, connectors: list, subject: str, template_id: str, html: str, context: dict) -> list:
+        payload = json.dumps(context or {}, default=str)
+        return [self.db_conn.enqueue_alert(name, subject, template_id, html, payload) for name in connectors]
+
+    def backoff_seconds(self, attempts: int) -> float:
+        return min(self.backoff_max_seconds, self.backoff_base_seconds * (2 ** max(0, attempts - 1)))
+
+    def __send(self, row: dict):
+        # imported here: the dispatcher itself imports this module
+        from alerting.alertDispatcher import get_connector
+
+        context = json.loads(row["context"]) if row["context"] else {}
+        return get_connector(row["connector"]).send_rendered(row["subject"], row["html"], context)
+
+    def __record(self, row: dict, attempts: int, error: str = None) -> str:
+        """Store the outcome of one delivery attempt; returns delivered, retried or failed."""
+        if error is None:
+            self.db_conn.update_alert_status(row["id"], "delivered", attempts)
+            return "delivered"
+        if attempts >= self.max_attempts:
+            self.db_conn.update_alert_status(row["id"], "failed", attempts, error)
+            self.logger.error(f"alertOutbox: Giving up on alert {row['id']} via {row['connector']} after {attempts} attempts: {error}")
+            return "failed"
+        retry_at = time.time() + self.backoff_seconds(attempts)
+        self.db_conn.update_alert_status(row["id"], "pending", attempts, error, retry_at)
+        self.logger.warning(f"alertOutbox: Alert {row['id']} via {row['connector']} failed ({error}); retry {attempts}/{self.max_attempts - 1} in {self.backoff_seconds(attempts):.0f}s")
+        return "retried"
+
+    def __record_later(self, row: dict, attempts: int, pending: Future) -> None:
+        # the row stays 'sending' until the batch is out (or is reclaimed as stale after a crash)
+        def done(future):
+            error = None if future.exception() is None else f"{type(future.exception()).__name__}: {future.exception()}"
+            try:
+                self.__record(row, attempts, error)
+            except BaseException:
+                self.logger.error("alertOutbox/record_later: {0}".format(traceback.format_exc()))
+        pending.add_done_callback(done)
+
+    def drain(self) -> dict:
+        """Deliver all due alerts. Returns counters for delivered, retried and failed alerts."""
+        stats = {"delivered": 0, "retried": 0, "failed": 0}
+        if not self.is_active:
+            return stats
+
+        executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="outbox")
+        try:
+            while True:
+                rows = self.db_conn.claim_due_alerts(self.batch_size)
+                if not rows:
+                    break
+
+                started = time.monotonic()
+                futures = [(row, executor.submit(self.__send, row)) for row in rows]
+                for row, future in futures:
+                    attempts = int(row["attempts"] or 0) + 1
+                    error, outcome = None, None
+                    try:
+                        outcome = future.result(timeout=max(0.0, started + self.send_timeout - time.monotonic()))
+                        if isinstance(outcome, Future):
+                            # batching connector: only a posted batch counts as delivered
+                            outcome.result(timeout=max(0.0, started + self.send_timeout - time.monotonic()))
+                    except FutureTimeoutError:
+                        if isinstance(outcome, Future) and not outcome.done():
+                            # still waiting for its batch or digest window: recorded when that is sent
+                            self.__record_later(row, attempts, outcome)
+                            continue
+                        error = "timeout"
+                    except BaseException as e:
+                        error = f"{type(e).__name__}: {e}"
+                    stats[self.__record(row, attempts, error)] += 1
+        finally:
+            # a hung connector must not block the drain; its alert is retried later (at-least-once)
+            executor.shutdown(wait=False)
+
+        if any(stats.values()):
+            self.logger.info(f"alertOutbox: Drained outbox: {stats}")
+        return stats
+
+
+def outbox_is_active() -> bool:
+    try:
+        return load_config().section("alerting").section("outbox").get_bool("is_active", False)
+    except Exception:
+        return False
+
+
+def start_background_drain() -> None:
+    """Drain the outbox in a background thread; a running drain is not started twice."""
+    with _WORKER_LOCK:
+        _WORKER["requested"] = True
+        thread = _WORKER["thread"]
+        if thread is not None and thread.is_alive():
+            return
+
+        def run():
+            try:
+                outbox = alertOutbox()
+                while True:
+                    # alerts queued while a drain was running trigger another pass
+                    with _WORKER_LOCK:
+                        if not _WORKER["requested"]:
+                            _WORKER["thread"] = None
+                            return
+                        _WORKER["requested"] = False
+                    outbox.drain()
+            except BaseException:
+                with _WORKER_LOCK:
+                    _WORKER["thread"] = None
+                log().error("alertOutbox/background_drain: {0}".format(traceback.format_exc()))
+
+        thread = threading.Thread(target=run, name="alert-outbox", daemon=True)
+        _WORKER["thread"] = thread
+        thread.start()
+
+
+def wait_for_background_drain(timeout: float = None) -> bool:
+    """Give a running background drain up to `timeout` seconds (default: alerting.outbox.exit_grace_seconds).
+
+    Returns True when it finished; undelivered alerts stay queued for the next drain.
+    """
+    thread = _WORKER["thread"]
+    if thread is None:
+        return True
+    if timeout is None:
+        try:
+            timeout = load_config().section("alerting").section("outbox").get_float("exit_grace_seconds", 10.0)
+        except Exception:
+            timeout = 10.0
+    thread.join(timeout)
+    return not thread.is_alive()
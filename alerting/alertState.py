@@ -0,0 +1,117 @@
+from utils.log import log
+from utils.config import load_config
+
+import time
+import traceback
+from datetime import datetime
+
+# notification decisions returned by alertStateTracker.evaluate()
+FIRE = "fire"
+REMIND = "remind"
+RESOLVE = "resolve"
+
+
+class alertStateTracker:
+    """Persistent per-(module, subject) alert state.
+
+    An alert is only sent when a subject changes from ok to firing (FIRE), again as a
+    reminder every renotify interval while it keeps firing (REMIND), and once when it
+    recovers (RESOLVE). Everything in between is suppressed. The renotify interval
+    starts when the caller reports the alert as sent with mark_notified(); until then
+    every run returns REMIND, so an alert that could not be sent is not lost. State lives in the
+    `alert_state` table of the results DB; without a DB it is kept in memory only.
+    """
+
+    def __init__(self, module: str, db_conn=None) -> None:
+        self.module = module
+        self.logger = log()
+        self.db_conn = db_conn if getattr(db_conn, "conn", None) else None
+        self._memory = {}
+
+        try:
+            rule = load_config().section("alerting").section("rules").section(module)
+            self.renotify_seconds: float = rule.get_float("renotify_interval_minutes", 60.0) * 60.0
+            self.notify_on_recovery: bool = rule.get_bool("notify_on_recovery", True)
+        except Exception:
+            self.renotify_seconds = 3600.0
+            self.notify_on_recovery = True
+            self.logger.warning(f"alertStateTracker: Could not read alerting rule for {module}: {traceback.format_exc()}")
+
+    def get(self, subject: str) -> dict:
+        if self.db_conn is not None:
+            return self.db_conn.get_alert_state(self.module, subject)
+        return self._memory.get(subject)
+
+    def __save(self, state: dict) -> None:
+        if self.db_conn is not None:
+            self.db_conn.save_alert_state(
+                self.module, state["subject"], state["state"], state["value"],
+                state["first_seen"], state["last_change"], state["last_notified"],
+            )
+        else:
+            self._memory[state["subject"]] = state
+
+    def is_firing(self, subject: str) -> bool:
+        state = self.get(subject)
+        return bool(state) and state["state"] == "firing"
+
+    def evaluate(self, subject: str, breached: bool, value=None) -> str:
+        """Record the current observation and return FIRE, REMIND, RESOLVE or None."""
+        now = time.time()
+        state = self.get(subject)
+        firing = bool(state) and state["state"] == "firing"
+
+        if breached and not firing:
+            self.__save({
+                "subject": subject, "state": "firing", "value": str(value),
+                "first_seen": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                "last_change": now, "last_notified": None,
+            })
+            self.logger.warning(f"alertStateTracker: {self.module}/{subject} is firing (value={value})")
+            return FIRE
+
+        if breached and firing:
+            if state["last_notified"] is None:
+                due = True
+            else:
+                due = self.renotify_seconds > 0 and now - float(state["last_notified"]) >= self.renotify_seconds
+            self.__save(dict(state, value=str(value)))
+            return REMIND if due else None
+
+        if not breached and firing:
+            self.__save(dict(state, state="resolved", value=str(value), last_change=now))
+            self.logger.info(f"alertStateTracker: {self.module}/{subject} recovered (value={value})")
+            # no recovery notice for a problem that was never notified
+            return RESOLVE if self.notify_on_recovery and state["last_notified"] is not None else None
+
+        return None
+
+    def mark_notified(self, subjects) -> None:
+        """Record that the alert of these firing subjects was sent (or queued for sending)."""
+        now = time.time()
+        for subject in subjects:
+            state = self.get(subject)
+            if state and state["state"] == "firing":
+                self.__save(dict(state, last_notified=now))
+
+    def evaluate_threshold(self, subject: str, value: float, high: float, low: float, direction: str = "above") -> str:
+        """Evaluate a numeric value with hysteresis.
+
+        direction "above": fires when value > high and only recovers once value <= low.
+        direction "below": fires when value < low and only recovers once value >= high.
+        """
+        firing = self.is_firing(subject)
+        if direction == "below":
+            breached = value < (high if firing else low)
+        else:
+            breached = value > (low if firing else high)
+        return self.evaluate(subject, breached, value)
+
+
+def threshold_bounds(threshold) -> tuple:
+    """Return (high, low) for a threshold given as number or as {"high": .., "low": ..}."""
+    if isinstance(threshold, (int, float)):
+        return float(threshold), float(threshold)
+    high = threshold.get("high", threshold.get("low"))
+    low = threshold.get("low", high)
+    return float(high), float(low)
@@ -0,0 +1,48 @@
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+import threading
+
+# 429 and the usual transient gateway/server errors are retried with exponential backoff
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+_SESSION_LOCK = threading.Lock()
+_SESSIONS = {}
+
+
+def get_session(connector: str, max_retries: int, backoff_factor: float) -> requests.Session:
+    """Return a process-wide keep-alive session so a burst of alerts reuses one warm connection.
+
+    Used by the HTTP connectors (mailgun, webhook). Every connector gets its own session, so
+    alternating sends to different hosts do not evict each other's pooled connection.
+    """
+    key = (connector, max_retries, backoff_factor)
+    with _SESSION_LOCK:
+        session = _SESSIONS.get(key)
+        if session is None:
+            retry = Retry(
+                total=max_retries,
+                connect=max_retries,
+                # a read timeout may mean the request was accepted already: do not post it twice
+                read=0,
+                status=max_retries,
+                backoff_factor=backoff_factor,
+                status_forcelist=RETRY_STATUS_CODES,
+                allowed_methods=frozenset({"POST"}),
+                respect_retry_after_header=True,
+                raise_on_status=False,
+            )
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=4, max_retries=retry)
+            session = requests.Session()
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _SESSIONS[key] = session
+        return session
+
+
+def clear_sessions() -> None:
+    with _SESSION_LOCK:
+        for session in _SESSIONS.values():
+            session.close()
+        _SESSIONS.clear()
@@ -1,41 +1,44 @@
 from utils.log import log
+from utils.config import load_config
+from alerting.templateCache import TEMPLATES_DIR, template_exists, render_template
+from alerting.httpSession import get_session
 
-import json
-import requests
-from pathlib import Path
 from sys import exit as adieu
 import traceback
-import jinja2
+
 
 class mailgunConnector:
     def __init__(self):
         try:
             # -- Get config-parameters --
-            path = Path(__file__).resolve().parent.parent / "conf.json"
-
-            with open(f"{path}", "r") as f:
-                j = json.loads(f.read())
+            j = load_config()
 
-                # support both new and old config layouts
-                mg_cfg = None
+            # support both new and old config layouts
+            mg_cfg = None
+            try:
+                mg_cfg = j["alerting"]["implementation"]["mailgun"]
+            except Exception:
                 try:
-                    mg_cfg = j["alerting"]["implementation"]["mailgun"]
+                    mg_cfg = j["alerting"]["mailgun"]
                 except Exception:
-                    try:
-                        mg_cfg = j["alerting"]["mailgun"]
-                    except Exception:
-                        mg_cfg = None
+                    mg_cfg = None
 
-                if not mg_cfg:
-                    raise KeyError("mailgun configuration not found in conf.json")
+            if not mg_cfg:
+                raise KeyError("mailgun configuration not found in conf.json")
 
-                self.is_active: bool = mg_cfg.get("is_active", False)
-                self.webroot: str = mg_cfg.get("webroot", "")
-                self.api_key: str = mg_cfg.get("api_key", "")
-                self.recipient: str = mg_cfg.get("recipient", "")
-                self.sender: str = mg_cfg.get("sender", "")
+            self.is_active: bool = mg_cfg.get("is_active", False)
+            self.webroot: str = mg_cfg.get("webroot", "")
+            self.api_key: str = mg_cfg.get("api_key", "")
+            self.recipient: str = mg_cfg.get("recipient", "")
+            self.sender: str = mg_cfg.get("sender", "")
 
-                self.logger = log()
+            # HTTP behaviour: a hung API must never block the monitoring run
+            self.connect_timeout: float = float(mg_cfg.get("connect_timeout", 5))
+            self.read_timeout: float = float(mg_cfg.get("read_timeout", 30))
+            self.max_retries: int = int(mg_cfg.get("max_retries", 3))
+            self.backoff_factor: float = float(mg_cfg.get("backoff_factor", 0.5))
+
+            self.logger = log()
             # -------------------------------------------------------
 
             self.logger.info("mailgunConnector: Initialized successfully.")
@@ -50,21 +53,12 @@ class mailgunConnector:
                 self.logger.info("mailgunConnector: Module is deactivated in conf.json. Skipping template load.")
                 return ""
 
-            templates_dir = Path(__file__).resolve().parent / "html_templates"
-            template_path = templates_dir / filename
-
-            if not template_path.exists():
-                self.logger.error(f"mailgunConnector: Template not found: {template_path}")
+            if not template_exists(filename):
+                self.logger.error(f"mailgunConnector: Template not found: {TEMPLATES_DIR / filename}")
                 return ""
 
-            env = jinja2.Environment(
-                loader=jinja2.FileSystemLoader(str(templates_dir)),
-                autoescape=jinja2.select_autoescape(["html", "xml"])
-            )
-
-            tpl = env.get_template(filename)
             self.logger.info(f"loading template {filename}...")
-            return tpl.render(**(context or {}))
+            return render_template(filename, context)
 
         except Exception:
             self.logger.error("mailgunConnector/__load_html_template_by_name: {0}".format(traceback.format_exc()))
@@ -95,17 +89,26 @@ class mailgunConnector:
                     return
 
                 self.logger.info("Successfully loaded template")
-                
-                auth=("api", self.api_key)
-                data = {
-                    "from": self.sender,
-                    "to": self.recipient,
-                    "subject": str(subject),
-                    "html": html
-                }
-                response = requests.post(self.webroot, auth=auth, data=data)
-                response.raise_for_status()
+                self.send_rendered(subject, html, template_context)
 
         except Exception:
             self.logger.error("mailgunConnector/mailgunSendMailHTML: {0}".format(traceback.format_exc()))
-            adieu(1)
\ No newline at end of file
+            adieu(1)
+
+    def send_rendered(self, subject: str, html: str, template_context: dict = None) -> None:
+        """Send an already rendered alert. Raises on failure instead of exiting the process."""
+        if not self.is_active:
+            self.logger.info("mailgunConnector: Module is deactivated in conf.json. Skipping send.")
+            return
+
+        auth=("api", self.api_key)
+        data = {
+            "from": self.sender,
+            "to": self.recipient,
+            "subject": str(subject),
+            "html": html
+        }
+        session = get_session("mailgun", self.max_retries, self.backoff_factor)
+        response = session.post(self.webroot, auth=auth, data=data, timeout=(self.connect_timeout, self.read_timeout))
+        response.raise_for_status()
+        self.logger.info(f"mailgunConnector: Email sent to {self.recipient}")
\ No newline at end of file
@@ -1,48 +1,77 @@
 from utils.log import log
+from utils.config import load_config
+from alerting.templateCache import TEMPLATES_DIR, template_exists, render_template
 
-import json
+from html import escape
+import re
 import smtplib
+import socket
 import ssl
+import threading
+import time
 import traceback
+from concurrent.futures import Future
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from pathlib import Path
-import jinja2
 from sys import exit as adieu
 
 
+# errors after which a reused session is dropped and the send is retried once on a fresh connection.
+# Not OSError: every SMTPException derives from it, and refused recipients or a failed login would
+# only be sent again. Not timeouts either: the server may already have queued the message.
+RECONNECT_ERRORS = (smtplib.SMTPServerDisconnected, ConnectionError)
+
+_BODY_RE = re.compile(r"<body[^>]*>(.*)</body>", re.IGNORECASE | re.DOTALL)
+
+
 class smtpConnector:
+    # the authenticated session is kept on the instance and reused across messages (and daemon cycles)
+    _session_lock = threading.RLock()
+    _server = None
+    _last_used = 0.0
+    _digest = None
+    _digest_started = 0.0
+
+    timeout = 30.0
+    keepalive_seconds = 60.0
+    digest_window_seconds = 0.0
+
     def __init__(self):
         try:
-            path = Path(__file__).resolve().parent.parent / "conf.json"
-            with open(f"{path}", "r") as f:
-                j = json.loads(f.read())
+            j = load_config()
 
-                # try to read implementation-specific config
-                smtp_cfg = None
+            # try to read implementation-specific config
+            smtp_cfg = None
+            try:
+                smtp_cfg = j["alerting"]["implementation"]["smtp"]
+            except Exception:
                 try:
-                    smtp_cfg = j["alerting"]["implementation"]["smtp"]
+                    smtp_cfg = j["alerting"]["smtp"]
                 except Exception:
-                    try:
-                        smtp_cfg = j["alerting"]["smtp"]
-                    except Exception:
-                        smtp_cfg = None
-
-                if not smtp_cfg:
-                    raise KeyError("smtp configuration not found in conf.json")
-
-                self.is_active = smtp_cfg.get("is_active", False)
-                self.host = smtp_cfg.get("host", "localhost")
-                self.port = int(smtp_cfg.get("port", 25))
-                self.username = smtp_cfg.get("username")
-                self.password = smtp_cfg.get("password")
-                self.use_tls = smtp_cfg.get("use_tls", False)
-                self.use_ssl = smtp_cfg.get("use_ssl", False)
-                # recipient/sender may be per-alert or global fallback
-                self.recipient = smtp_cfg.get("recipient")
-                self.sender = smtp_cfg.get("sender", f"monitoring@{Path.cwd().name}")
-
-                self.logger = log()
+                    smtp_cfg = None
+
+            if not smtp_cfg:
+                raise KeyError("smtp configuration not found in conf.json")
+
+            self.is_active = smtp_cfg.get("is_active", False)
+            self.host = smtp_cfg.get("host", "localhost")
+            self.port = int(smtp_cfg.get("port", 25))
+            self.username = smtp_cfg.get("username")
+            self.password = smtp_cfg.get("password")
+            self.use_tls = smtp_cfg.get("use_tls", False)
+            self.use_ssl = smtp_cfg.get("use_ssl", False)
+            # recipient/sender may be per-alert or global fallback
+            self.recipient = smtp_cfg.get("recipient")
+            self.sender = smtp_cfg.get("sender", f"monitoring@{Path.cwd().name}")
+
+            # connection handling: idle sessions older than keepalive_seconds are re-established
+            self.timeout = float(smtp_cfg.get("timeout", 30))
+            self.keepalive_seconds = float(smtp_cfg.get("keepalive_seconds", 60))
+            # > 0: merge all alerts of this window into one digest mail
+            self.digest_window_seconds = float(smtp_cfg.get("digest_window_seconds", 0))
+
+            self.logger = log()
 
             self.logger.info("smtpConnector: Initialized successfully.")
         except Exception:
@@ -59,20 +88,12 @@ class smtpConnector:
                 self.logger.info("smtpConnector: Module deactivated in conf.json. Skipping template load.")
                 return ""
 
-            templates_dir = Path(__file__).resolve().parent / "html_templates"
-            template_path = templates_dir / filename
-            if not template_path.exists():
-                self.logger.error(f"smtpConnector: Template not found: {template_path}")
+            if not template_exists(filename):
+                self.logger.error(f"smtpConnector: Template not found: {TEMPLATES_DIR / filename}")
                 return ""
 
-            env = jinja2.Environment(
-                loader=jinja2.FileSystemLoader(str(templates_dir)),
-                autoescape=jinja2.select_autoescape(["html", "xml"])
-            )
-
-            tpl = env.get_template(filename)
             self.logger.info(f"smtpConnector: loading template {filename}...")
-            return tpl.render(**(context or {}))
+            return render_template(filename, context)
 
         except Exception:
             self.logger.error("smtpConnector/__load_html_template_by_name: {0}".format(traceback.format_exc()))
@@ -100,34 +121,141 @@ class smtpConnector:
 
             html = self.__load_html_template_by_name(filename, template_context)
 
-            # Compose message
-            msg = MIMEMultipart("alternative")
-            msg["Subject"] = subject
-            msg["From"] = template_context.get("from", self.sender)
-            msg["To"] = template_context.get("to", self.recipient or template_context.get("recipient", ""))
-
-            part = MIMEText(html, "html")
-            msg.attach(part)
-
-            # Send via SMTP
-            if self.use_ssl:
-                context = ssl.create_default_context()
-                with smtplib.SMTP_SSL(self.host, self.port, context=context) as server:
-                    if self.username and self.password:
-                        server.login(self.username, self.password)
-                    server.sendmail(msg["From"], [msg["To"]], msg.as_string())
-            else:
-                with smtplib.SMTP(self.host, self.port) as server:
-                    server.ehlo()
-                    if self.use_tls:
-                        server.starttls()
-                        server.ehlo()
-                    if self.username and self.password:
-                        server.login(self.username, self.password)
-                    server.sendmail(msg["From"], [msg["To"]], msg.as_string())
-
-            self.logger.info(f"smtpConnector: Email sent to {msg['To']}")
+            # one-shot usage: deliver right away and do not keep the session open
+            self.send_rendered(subject, html, template_context)
+            self.flush()
+            self.close()
 
         except Exception:
             self.logger.error("smtpConnector/smtpSendMailHTML: {0}".format(traceback.format_exc()))
             adieu(1)
+
+    def send_rendered(self, subject: str, html: str, template_context: dict = None):
+        """Send an already rendered alert. Raises on failure instead of exiting the process.
+
+        In digest mode the alert is only queued; the returned Future completes (or fails)
+        when the digest containing it was sent.
+        """
+        template_context = template_context or {}
+        if not self.is_active:
+            self.logger.info("smtpConnector: SMTP disabled in conf.json. Skipping send.")
+            return None
+
+        if self.digest_window_seconds > 0:
+            delivered = Future()
+            with self._session_lock:
+                if self._digest is None:
+                    self._digest = []
+                    self._digest_started = time.monotonic()
+                self._digest.append((subject, html, template_context, delivered))
+                self.logger.info(f"smtpConnector: Queued '{subject}' for digest ({len(self._digest)} pending)")
+            try:
+                self.flush(force=False)
+            except Exception:
+                # already reported through the future
+                pass
+            return delivered
+
+        self.__send_message(subject, html, template_context)
+        return None
+
+    def __send_message(self, subject: str, html: str, template_context: dict) -> None:
+        # Compose message
+        msg = MIMEMultipart("alternative")
+        msg["Subject"] = subject
+        msg["From"] = template_context.get("from", self.sender)
+        msg["To"] = template_context.get("to", self.recipient or template_context.get("recipient", ""))
+
+        part = MIMEText(html, "html")
+        msg.attach(part)
+
+        self.__deliver(msg["From"], [msg["To"]], msg.as_string())
+        self.logger.info(f"smtpConnector: Email sent to {msg['To']}")
+
+    def __connect(self):
+        if self.use_ssl:
+            context = ssl.create_default_context()
+            server = smtplib.SMTP_SSL(self.host, self.port, context=context, timeout=self.timeout)
+        else:
+            server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+            server.ehlo()
+            if self.use_tls:
+                server.starttls()
+                server.ehlo()
+        if self.username and self.password:
+            server.login(self.username, self.password)
+        self.logger.info(f"smtpConnector: Opened SMTP session to {self.host}:{self.port}")
+        return server
+
+    def __deliver(self, from_addr: str, to_addrs: list, message: str) -> None:
+        with self._session_lock:
+            if self._server is not None and time.monotonic() - self._last_used > self.keepalive_seconds:
+                self.close()
+            reused = self._server is not None
+            try:
+                if not reused:
+                    self._server = self.__connect()
+                self._server.sendmail(from_addr, to_addrs, message)
+            except RECONNECT_ERRORS as e:
+                self.__drop_session()
+                # smtplib reports a reply that timed out as SMTPServerDisconnected as well
+                if not reused or isinstance(e.__context__, socket.timeout):
+                    raise
+                # an idle session the server has closed in the meantime: reconnect and retry once
+                self.logger.warning("smtpConnector: SMTP session lost, reconnecting...")
+                self._server = self.__connect()
+                self._server.sendmail(from_addr, to_addrs, message)
+            except OSError as e:
+                if not isinstance(e, smtplib.SMTPException):
+                    # the state of the session is unknown: the next message starts a new one
+                    self.__drop_session()
+                raise
+            self._last_used = time.monotonic()
+
+    def __drop_session(self) -> None:
+        try:
+            if self._server is not None:
+                self._server.close()
+        except Exception:
+            pass
+        self._server = None
+
+    def flush(self, force: bool = True) -> None:
+        """Send the pending digest, if any; without force only once its window has elapsed."""
+        with self._session_lock:
+            if not self._digest:
+                return
+            if not force and time.monotonic() - self._digest_started < self.digest_window_seconds:
+                return
+            pending = self._digest
+            self._digest = None
+
+        try:
+            if len(pending) == 1:
+                subject, html, context, _ = pending[0]
+                self.__send_message(subject, html, context)
+            else:
+                sections = []
+                for subject, html, _, _ in pending:
+                    match = _BODY_RE.search(html)
+                    sections.append(f"<h2>{escape(subject)}</h2>\n{match.group(1) if match else html}")
+                digest_html = "<html><body>\n" + "\n<hr>\n".join(sections) + "\n</body></html>"
+                self.__send_message(f"Sammelmeldung: {len(pending)} Alarme", digest_html, pending[0][2])
+        except BaseException as e:
+            # the callers (outbox / dispatcher) learn about the failure and retry the alerts
+            self.logger.error(f"smtpConnector: Could not send digest of {len(pending)} alert(s): {type(e).__name__}: {e}")
+            for *_, delivered in pending:
+                delivered.set_exception(e)
+            raise
+        for *_, delivered in pending:
+            delivered.set_result(None)
+
+    def close(self) -> None:
+        with self._session_lock:
+            if self._server is None:
+                return
+            try:
+                self._server.quit()
+            except Exception:
+                pass
+            self.__drop_session()
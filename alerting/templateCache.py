@@ -0,0 +1,80 @@
+from utils.config import load_config
+from utils.private_dir import ensure_private_dir
+
+from pathlib import Path
+import threading
+import jinja2
+
+TEMPLATES_DIR = Path(__file__).resolve().parent / "html_templates"
+
+# template_id (as passed by the monitoring modules) -> template file
+TEMPLATE_FILES = {
+    "serviceMonitoring": "serviceMonitoring.html",
+    "hostMonitoring": "hostMonitoring.html",
+    "fileMonitoring": "fileMonitoring.html",
+    "hostStartup": "hostStartup.html",
+}
+
+_LOCK = threading.Lock()
+_ENV = None
+
+
+def _bytecode_cache_dir():
+    """alerting.template_cache_dir, or None for Jinja's own per-user directory (mode 0700, owner checked)."""
+    try:
+        configured = load_config().section("alerting").get_str("template_cache_dir")
+    except Exception:
+        configured = ""
+    return Path(configured) if configured else None
+
+
+def get_environment() -> jinja2.Environment:
+    """Return the process-wide Jinja2 environment shared by all alert connectors.
+
+    Compiled templates are kept in the environment's in-memory cache and their
+    bytecode is persisted on disk, so a template is compiled once per process at
+    most and usually not at all after the first run.
+    """
+    global _ENV
+    with _LOCK:
+        if _ENV is None:
+            bytecode_cache = None
+            try:
+                cache_dir = _bytecode_cache_dir()
+                # cached bytecode is executed: the directory must not be writable by anyone else
+                bytecode_cache = jinja2.FileSystemBytecodeCache(str(ensure_private_dir(cache_dir)) if cache_dir else None)
+            except Exception:
+                # an unwritable cache dir only costs compile time, never the alert
+                bytecode_cache = None
+
+            _ENV = jinja2.Environment(
+                loader=jinja2.FileSystemLoader(str(TEMPLATES_DIR)),
+                autoescape=jinja2.select_autoescape(["html", "xml"]),
+                bytecode_cache=bytecode_cache,
+                cache_size=-1,
+            )
+        return _ENV
+
+
+def template_exists(filename: str) -> bool:
+    return (TEMPLATES_DIR / filename).exists()
+
+
+def render_template(filename: str, context: dict = None) -> str:
+    return get_environment().get_template(filename).render(**(context or {}))
+
+
+def precompile_templates() -> list:
+    """Compile every template in html_templates/ and fill the on-disk bytecode cache."""
+    env = get_environment()
+    compiled = []
+    for name in env.list_templates(extensions=["html"]):
+        env.get_template(name)
+        compiled.append(name)
+    return compiled
+
+
+def reset_environment() -> None:
+    global _ENV
+    with _LOCK:
+        _ENV = None
@@ -0,0 +1,179 @@
+from utils.log import log
+from utils.config import load_config
+from alerting.httpSession import get_session
+
+from sys import exit as adieu
+from datetime import datetime
+import jinja2
+import json
+import threading
+import time
+import traceback
+from concurrent.futures import Future
+
+
+class webhookConnector:
+    """Posts alerts as JSON to a generic HTTP webhook (chat, incident or paging tools).
+
+    send_rendered() only queues the alert and returns a Future that completes when the
+    batch containing it was posted (or fails with the error of that post). A background
+    sender posts the queue in batches: as soon as batch_size alerts are pending or
+    batch_window_seconds after the first pending alert, whatever comes first.
+    flush(force=True) sends everything that is left, e.g. at the end of a run.
+    """
+
+    def __init__(self):
+        try:
+            # -- Get config-parameters --
+            j = load_config()
+
+            wh_cfg = j["alerting"]["implementation"]["webhook"]
+
+            self.is_active: bool = wh_cfg.get("is_active", False)
+            self.url: str = wh_cfg.get("url", "")
+            self.headers: dict = dict(wh_cfg.get("headers", {}))
+            self.payload_template: str = wh_cfg.get("payload_template", "")
+            self.hostname: str = j["general"]["hostname"]
+
+            # batching: alerts of one run go out in as few requests as possible
+            self.batch_size: int = max(1, int(wh_cfg.get("batch_size", 20)))
+            self.batch_window_seconds: float = float(wh_cfg.get("batch_window_seconds", 2))
+
+            # HTTP behaviour: a hung endpoint must never block the monitoring run
+            self.connect_timeout: float = float(wh_cfg.get("connect_timeout", 5))
+            self.read_timeout: float = float(wh_cfg.get("read_timeout", 10))
+            self.max_retries: int = int(wh_cfg.get("max_retries", 3))
+            self.backoff_factor: float = float(wh_cfg.get("backoff_factor", 0.5))
+
+            self.logger = log()
+
+            self._template = None
+            if self.payload_template:
+                # JSON, not HTML: no autoescaping, values are quoted with the tojson filter
+                self._template = jinja2.Environment(autoescape=False).from_string(self.payload_template)
+
+            self._cond = threading.Condition()
+            self._pending = []
+            self._in_flight = 0
+            self._first_pending_at = None
+            self._flush_requested = False
+            self._closed = False
+            self._sender = None
+            # -------------------------------------------------------
+
+            self.logger.info("webhookConnector: Initialized successfully.")
+        except Exception:
+            self.logger = log()
+            self.logger.error("webhookConnector/__init__: {0}".format(traceback.format_exc()))
+            adieu(1)
+
+    def build_payload(self, alerts: list) -> str:
+        """Render the JSON body for one batch of alerts."""
+        if self._template is not None:
+            return self._template.render(host=self.hostname, alerts=alerts, count=len(alerts))
+        return json.dumps({"host": self.hostname, "count": len(alerts), "alerts": alerts}, ensure_ascii=False, default=str)
+
+    def send_rendered(self, subject: str, html: str, template_context: dict = None):
+        """Queue an alert for the next batch. Returns the Future of its delivery."""
+        if not self.is_active:
+            self.logger.info("webhookConnector: Module is deactivated in conf.json. Skipping send.")
+            return None
+
+        alert = {
+            "subject": str(subject),
+            "generated_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "context": template_context or {},
+            "html": html,
+        }
+        with self._cond:
+            if not self._pending:
+                self._first_pending_at = time.monotonic()
+            delivered = Future()
+            self._pending.append((alert, delivered))
+            if self._sender is None or not self._sender.is_alive():
+                # also restarts the sender after close(), e.g. in the next daemon cycle
+                self._closed = False
+                self._sender = threading.Thread(target=self.__run_sender, name="webhook-sender", daemon=True)
+                self._sender.start()
+            self._cond.notify_all()
+        return delivered
+
+    def __take_batch(self) -> list:
+        # called with self._cond held; blocks until a batch is due or the connector is closed
+        while True:
+            if self._pending:
+                due_at = self._first_pending_at + self.batch_window_seconds
+                remaining = due_at - time.monotonic()
+                if len(self._pending) >= self.batch_size or self._flush_requested or self._closed or remaining <= 0:
+                    batch = self._pending[:self.batch_size]
+                    del self._pending[:self.batch_size]
+                    self._first_pending_at = time.monotonic() if self._pending else None
+                    self._in_flight += 1
+                    return batch
+                self._cond.wait(remaining)
+            elif self._closed:
+                return []
+            else:
+                self._flush_requested = False
+                self._cond.wait()
+
+    def __post(self, batch: list) -> None:
+        headers = {"Content-Type": "application/json"}
+        headers.update(self.headers)
+        session = get_session("webhook", self.max_retries, self.backoff_factor)
+        response = session.post(
+            self.url,
+            data=self.build_payload(batch).encode("utf-8"),
+            headers=headers,
+            timeout=(self.connect_timeout, self.read_timeout),
+        )
+        response.raise_for_status()
+
+    def __run_sender(self) -> None:
+        while True:
+            with self._cond:
+                batch = self.__take_batch()
+            if not batch:
+                return
+            try:
+                self.__post([alert for alert, _ in batch])
+                self.logger.info(f"webhookConnector: Posted batch of {len(batch)} alert(s) to webhook")
+                for _, delivered in batch:
+                    delivered.set_result(None)
+            except Exception as e:
+                # the callers (outbox / dispatcher) learn about the failure and retry the alerts
+                self.logger.error(f"webhookConnector: Could not post batch of {len(batch)} alert(s): {traceback.format_exc()}")
+                for _, delivered in batch:
+                    delivered.set_exception(e)
+            finally:
+                with self._cond:
+                    self._in_flight -= 1
+                    self._cond.notify_all()
+
+    def flush(self, force: bool = True, timeout: float = None) -> bool:
+        """Send pending alerts now. With force the call waits until they are posted.
+
+        Returns True when nothing is left pending or in flight.
+        """
+        if timeout is None:
+            timeout = (self.connect_timeout + self.read_timeout) * (self.max_retries + 1)
+        with self._cond:
+            if not force:
+                return not self._pending and not self._in_flight
+            self._flush_requested = True
+            self._cond.notify_all()
+            deadline = time.monotonic() + timeout
+            while self._pending or self._in_flight:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.logger.warning(f"webhookConnector: {len(self._pending)} alert(s) still pending after {timeout:.0f}s")
+                    return False
+                self._cond.wait(remaining)
+            return True
+
+    def close(self) -> None:
+        """Send what is pending and stop the sender thread; a later alert starts a new one."""
+        self.flush(force=True)
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
@@ -0,0 +1,78 @@
+"""Row-wise vs. vectorized parsing of raw check values on a synthetic table.
+
+Run from the project root:
+
+    python3 benchmarks/bench_report_parsing.py [rows]
+"""
+from pathlib import Path
+import re
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.report_parsing import parse_disk_free_gb, parse_load_averages  # noqa: E402
+
+
+# -- previous row-wise implementations (Series.apply), kept here for comparison --
+
+def legacy_disk_free(val):
+    if val is None:
+        return None
+    m = re.match(r"^([0-9]+(?:\.[0-9]+)?)\s*([KMGTkmgt]?)$", str(val).strip())
+    if not m:
+        return None
+    factors = {"T": 1024.0, "G": 1.0, "": 1.0, "M": 1.0 / 1024.0, "K": 1.0 / (1024.0 * 1024.0)}
+    return float(m.group(1)) * factors[m.group(2).upper()]
+
+
+def legacy_parse_load(s):
+    if s is None:
+        return (None, None, None)
+    parts = str(s).strip().split()
+    vals = []
+    for i in range(3):
+        try:
+            vals.append(float(parts[i]))
+        except Exception:
+            vals.append(None)
+    return tuple(vals)
+
+
+def synthetic_table(rows: int) -> pd.DataFrame:
+    rng = np.random.default_rng(42)
+    units = np.array(["G", "M", "T", "K", ""])
+    loads = rng.random((rows, 3)) * 4
+    return pd.DataFrame({
+        "disk_free": np.char.add(rng.integers(1, 999, rows).astype(str), units[rng.integers(0, len(units), rows)]),
+        "load_average": [f"{a:.2f} {b:.2f} {c:.2f}" for a, b, c in loads],
+    })
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main(rows: int) -> None:
+    df = synthetic_table(rows)
+    print(f"{rows:,} rows")
+    print(f"{'parser':<14}{'row-wise [s]':>14}{'vectorized [s]':>16}{'speedup':>10}")
+
+    cases = [
+        ("disk_free", lambda: df["disk_free"].apply(legacy_disk_free), lambda: parse_disk_free_gb(df["disk_free"])),
+        ("load_average", lambda: pd.DataFrame(df["load_average"].apply(legacy_parse_load).tolist()), lambda: parse_load_averages(df["load_average"])),
+    ]
+    for name, legacy, vectorized in cases:
+        old, t_old = timed(legacy)
+        new, t_new = timed(vectorized)
+        assert np.allclose(np.asarray(old, dtype="float64"), np.asarray(new, dtype="float64"), equal_nan=True), name
+        print(f"{name:<14}{t_old:>14.3f}{t_new:>16.3f}{t_old / t_new:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
@@ -0,0 +1,73 @@
+"""Peak memory of the report's host metric pass: in-memory vs. streaming mode.
+
+Builds a synthetic results DB and runs each mode in a fresh process. Run from the
+project root:
+
+    python3 benchmarks/bench_streaming_report.py [rows] [chunk_size]
+"""
+from pathlib import Path
+import json
+import resource
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def build_db(path: Path, rows: int) -> None:
+    conn = sqlite3.connect(str(path))
+    conn.execute("CREATE TABLE host_checks (id INTEGER PRIMARY KEY AUTOINCREMENT, timestamp TEXT, name TEXT, observed_value TEXT)")
+    start = time.mktime((2024, 1, 1, 0, 0, 0, 0, 0, -1))
+    batch = []
+    for i in range(rows):
+        ts = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(start + i * 5))
+        batch.append((ts, "free_ram_mb", str(1000 + (i * 7919) % 4000)))
+        if len(batch) == 100_000:
+            conn.executemany("INSERT INTO host_checks (timestamp, name, observed_value) VALUES (?, ?, ?)", batch)
+            batch = []
+    conn.executemany("INSERT INTO host_checks (timestamp, name, observed_value) VALUES (?, ?, ?)", batch)
+    conn.commit()
+    conn.close()
+
+
+def run_mode(workdir: Path, streaming: bool, chunk_size: int) -> None:
+    conf = {
+        "general": {"hostname": "bench", "ip": "127.0.0.1"},
+        "logging": {"is_active": False, "log_file_path": str(workdir / "bench.log")},
+        "db": {"is_active": True, "db_path": str(workdir / "results.db")},
+        "reportGenerator": {
+            "is_active": True, "root_path": str(workdir / "reports"), "plot_days": 0,
+            "streaming": streaming, "chunk_size": chunk_size, "plot_workers": 1, "skip_unchanged": False,
+        },
+    }
+    (workdir / "conf.json").write_text(json.dumps(conf))
+
+    sys.path.insert(0, str(ROOT))
+    import utils.config as config_module
+    config_module.CONF_PATH = workdir / "conf.json"
+    from utils.report_generator import reportGenerator
+
+    started = time.perf_counter()
+    reportGenerator().generate_report()
+    elapsed = time.perf_counter() - started
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+    print(f"{'streaming' if streaming else 'in-memory':<10}{elapsed:>10.2f}s{peak_mb:>12.0f} MB peak RSS")
+
+
+def main(rows: int, chunk_size: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        build_db(workdir / "results.db", rows)
+        print(f"{rows:,} host_checks rows, chunk_size {chunk_size:,}")
+        for streaming in (False, True):
+            subprocess.run([sys.executable, __file__, "--run", str(workdir), str(int(streaming)), str(chunk_size)], check=True)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--run":
+        run_mode(Path(sys.argv[2]), bool(int(sys.argv[3])), int(sys.argv[4]))
+    else:
+        main(int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000, int(sys.argv[2]) if len(sys.argv) > 2 else 50_000)
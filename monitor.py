@@ -2,12 +2,95 @@ import monitoring.serviceMonitoring as service_module
 import monitoring.hostMonitoring as host_module
 import monitoring.fileMonitoring as file_module
 from utils.log import log
-from utils.report_generator import reportGenerator
+from alerting.templateCache import precompile_templates
+from alerting.alertDispatcher import flush_connectors
+from alerting.alertOutbox import alertOutbox, outbox_is_active, start_background_drain, wait_for_background_drain
 
 import sys
 import traceback
 from sys import exit as adieu
 
+def reportGenerator():
+    # pandas and matplotlib are only imported for report runs, not on every monitoring tick
+    from utils.report_generator import reportGenerator as generator
+    return generator()
+
+def locked_module(name: str, func, execution, logger):
+    from utils.runLock import run_locked
+
+    lock_dir = execution.get_str("lock_dir", "")
+    policy = execution.get_str("overlap_policy", "rerun")
+    return lambda: run_locked(name, func, lock_dir=lock_dir, overlap_policy=policy, logger=logger)
+
+def run_monitoring_modules(logger) -> list:
+    """Run the modules selected on the command line as isolated, concurrent tasks.
+
+    Returns the names of the modules that failed or timed out.
+    """
+    from utils.config import load_config
+    from utils.scheduler import run_modules, MODULE_OK
+
+    tasks = {}
+    if "--service" in sys.argv or "--all" in sys.argv:
+        tasks["serviceMonitoring"] = lambda: service_module.serviceMonitoring().check_services()
+    if "--host" in sys.argv or "--all" in sys.argv:
+        tasks["hostMonitoring"] = lambda: host_module.hostMonitoring().check_host_params()
+    if "--file" in sys.argv or "--all" in sys.argv:
+        tasks["fileMonitoring"] = lambda: file_module.fileMonitoring().check_files()
+    if not tasks:
+        return []
+
+    # retries that became due since the last run are sent now, even if this run raises no alert
+    if outbox_is_active():
+        start_background_drain()
+
+    execution = load_config().section("execution")
+    parallel = execution.get_bool("parallel_modules", True)
+    # a module whose previous run (e.g. the last cron tick) is still active is not started twice
+    tasks = {name: locked_module(name, func, execution, logger) for name, func in tasks.items()}
+    logger.info(f"Starting {', '.join(tasks)} ({'concurrently' if parallel else 'sequentially'})...")
+    results = run_modules(
+        tasks,
+        timeouts=dict(execution.section("timeout_seconds")),
+        default_timeout=execution.get_float("default_timeout_seconds", 300),
+        parallel=parallel,
+        logger=logger,
+    )
+    return [name for name, status in results.items() if status != MODULE_OK]
+
+def run_daemon(logger) -> None:
+    # imported here: only the daemon needs the scheduler and its signal handling
+    from utils.config import load_config
+    from utils.scheduler import scheduler, moduleRunner
+
+    j = load_config()
+    daemon_cfg = j.section("daemon")
+    intervals = daemon_cfg.section("intervals")
+
+    daemon = scheduler(
+        jitter_seconds=daemon_cfg.get_float("jitter_seconds", 5),
+        # send digests whose window elapsed; the rest is forced out when the daemon stops (see main)
+        after_job=lambda job: flush_connectors(force=False),
+    )
+    for name, factory, method, default_interval in (
+        ("serviceMonitoring", lambda: service_module.serviceMonitoring(), "check_services", 60),
+        ("hostMonitoring", lambda: host_module.hostMonitoring(), "check_host_params", 60),
+        ("fileMonitoring", lambda: file_module.fileMonitoring(), "check_files", 300),
+    ):
+        interval = intervals.get_float(name, default_interval)
+        if not j.section(name).get_bool("is_active") or interval <= 0:
+            logger.info(f"monitor.py: {name} is not scheduled (inactive or interval 0).")
+            continue
+        daemon.add_job(name, locked_module(name, moduleRunner(name, factory, method), j.section("execution"), logger), interval)
+
+    outbox_cfg = j.section("alerting").section("outbox")
+    if outbox_cfg.get_bool("is_active"):
+        # failed alerts are retried on their own schedule, not only when the next alert is queued
+        daemon.add_job("alertOutbox", moduleRunner("alertOutbox", alertOutbox, "drain"), outbox_cfg.get_float("drain_interval_seconds", 30), jitter_seconds=0)
+
+    daemon.install_signal_handlers()
+    daemon.run()
+
 def display_help() -> None:
     help_message = """
     Usage: python monitor.py [options]
@@ -23,8 +106,16 @@ def display_help() -> None:
 
     --startup       Notify the startup of a system (only if configured in host monitoring)
 
+    --daemon        Keep running and repeat the monitoring modules on the intervals configured in conf.json (daemon.intervals)
+
     Export Options:
     --generate-report   Generate a Markdown-report from the collected data
+    --fleet-report <dir|glob>
+                        Generate one Markdown/HTML-report from the result databases of many hosts
+
+    Alerting Options:
+    --precompile-templates  Compile all alert templates into the on-disk bytecode cache
+    --drain-outbox          Deliver all queued alerts from the alert outbox
 
     Cleanup Options:
         Logs:
@@ -52,26 +143,38 @@ def main():
             display_help()
             return
         
-        if "--service" in sys.argv or "--all" in sys.argv:
-            logger.info("Starting service monitoring...")
-            service_monitor = service_module.serviceMonitoring()
-            service_monitor.check_services()
-        
-        if "--host" in sys.argv or "--all" in sys.argv:
-            logger.info("Starting host monitoring...")
-            host_monitor = host_module.hostMonitoring()
-            host_monitor.check_host_params()
+        if "--daemon" in sys.argv:
+            logger.info("Starting monitoring daemon...")
+            run_daemon(logger)
+            logger.info("Monitoring daemon stopped.")
+            return
 
-        if "--file" in sys.argv or "--all" in sys.argv:
-            logger.info("Starting file monitoring...")
-            file_monitor = file_module.fileMonitoring()
-            file_monitor.check_files()
+        modules_failed = run_monitoring_modules(logger)
         
         if "--generate-report" in sys.argv:
             logger.info("Generating report from collected data...")
             report_gen = reportGenerator()
             report_gen.generate_report()
 
+        if "--fleet-report" in sys.argv:
+            idx = sys.argv.index("--fleet-report")
+            if idx + 1 >= len(sys.argv) or sys.argv[idx + 1].startswith("--"):
+                logger.error("monitor.py: --fleet-report needs a directory or glob pattern of result databases.")
+                adieu(1)
+            logger.info("Generating fleet report from result databases...")
+            report_gen = reportGenerator()
+            report_gen.generate_fleet_report(sys.argv[idx + 1])
+
+        if "--precompile-templates" in sys.argv:
+            logger.info("Precompiling alert templates...")
+            compiled = precompile_templates()
+            logger.info(f"Precompiled {len(compiled)} alert templates.")
+
+        if "--drain-outbox" in sys.argv:
+            logger.info("Draining alert outbox...")
+            stats = alertOutbox().drain()
+            logger.info(f"Alert outbox drained: {stats}")
+
         if "--delete-logs" in sys.argv:
             logger.info("Deleting log files...")
             logger.delete_logs()
@@ -101,15 +204,23 @@ def main():
             host_monitor = host_module.hostMonitoring()
             host_monitor.notify_startup()
 
-        if not any(arg in sys.argv for arg in ["--service", "--host", "--file", "--all", "--generate-report", "--delete-logs", "--delete-results-service", "--delete-results-file", "--delete-results-host", "--delete-all-results", "--delete-file-monitoring-db", "--startup"]):
+        if not any(arg in sys.argv for arg in ["--daemon", "--service", "--host", "--file", "--all", "--generate-report", "--fleet-report", "--precompile-templates", "--drain-outbox", "--delete-logs", "--delete-results-service", "--delete-results-file", "--delete-results-host", "--delete-all-results", "--delete-file-monitoring-db", "--startup"]):
             logger.error("No valid monitoring option provided. Use --help for usage information.")
             display_help()
             adieu(1)
 
+        if modules_failed:
+            logger.error(f"monitor.py: Monitoring modules failed: {', '.join(modules_failed)}")
+            adieu(1)
+
         logger.info("Monitoring completed.")
     except Exception as e:
         logger.error(f"monitor.py/main: {traceback.format_exc()}")
         adieu(1)
+    finally:
+        # give queued alerts a short grace period, then deliver pending digests and release connections
+        wait_for_background_drain()
+        flush_connectors(force=True, close=True)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,6 +1,7 @@
 from utils.log import log
+from utils.config import load_config
 from utils.db import db as DB
-from alerting.mailgunConnector import mailgunConnector
+from alerting.alertDispatcher import alertDispatcher
 
 import json
 import os
@@ -14,36 +15,31 @@ class fileMonitoring:
     def __init__(self) -> None:
         try:
             # -- Get config-parameters --
-            path = Path(__file__).resolve().parent.parent / "conf.json"
+            j = load_config()
 
-            with open(f"{path}", "r") as f:
-                j = json.loads(f.read())
+            self.is_active: bool = j["fileMonitoring"]["is_active"]
+            self.db_path: str = j["fileMonitoring"]["db_path"]
+            self.files_to_monitor: list = j["fileMonitoring"]["files_to_monitor"]
 
-                self.is_active: bool = j["fileMonitoring"]["is_active"]
-                self.db_path: str = j["fileMonitoring"]["db_path"]
-                self.files_to_monitor: list = j["fileMonitoring"]["files_to_monitor"]
+            self.hostname: str = j["general"]["hostname"]
 
-                self.hostname: str = j["general"]["hostname"]
+            self.logger = log()
 
-                self.logger = log()
-
-                # instantiate DB handler (DB may be configured as inactive and will then be a no-op)
-                try:
-                    self.db_conn = DB()
-                except Exception:
-                    # if DB cannot be initialized do not exit; keep monitoring functional
-                    self.logger.warning("fileMonitoring: Could not initialize DB handler; continuing without DB ingestion.")
-                    self.db_conn = None
+            # instantiate DB handler (DB may be configured as inactive and will then be a no-op)
+            try:
+                self.db_conn = DB()
+            except Exception:
+                # if DB cannot be initialized do not exit; keep monitoring functional
+                self.logger.warning("fileMonitoring: Could not initialize DB handler; continuing without DB ingestion.")
+                self.db_conn = None
 
-                # Alerting rule
-                try:
-                    self.alerting_is_active: bool = j["alerting"]["rules"]["fileMonitoring"]["is_active"]
-                except Exception:
-                    self.alerting_is_active = False
+            # Alerting rule
+            try:
+                self.alerting_is_active: bool = j["alerting"]["rules"]["fileMonitoring"]["is_active"]
+            except Exception:
+                self.alerting_is_active = False
 
-                impl = j.get("alerting", {}).get("implementation", {})
-                self.mailgun_alerting_is_active = bool(impl.get("mailgun", {}).get("is_active", False))
-                self.smtp_alerting_is_active = bool(impl.get("smtp", {}).get("is_active", False))
+            self.alert_dispatcher = alertDispatcher()
 
             # -------------------------------------------------------
 
@@ -80,18 +76,18 @@ class fileMonitoring:
                     file_hashes[file] = md5
                 except PermissionError:
                     # do not abort the entire run for a single unreadable file
-                    self.logger.warning(f"fileMonitoring: Permission denied reading '{file}'; skipping (hash=None)")
+                    self.logger.warning(f"fileMonitoring: Permission denied reading '{file}'; skipping (hash=None)", path=file)
                     file_hashes[file] = None
                     _error_handler += 1
                     continue
                 except FileNotFoundError:
-                    self.logger.warning(f"fileMonitoring: File not found: '{file}'; skipping (hash=None)")
+                    self.logger.warning(f"fileMonitoring: File not found: '{file}'; skipping (hash=None)", path=file)
                     file_hashes[file] = None
                     _error_handler += 1
                     continue
                 except Exception:
                     # other read/IO errors - log and continue
-                    self.logger.warning(f"fileMonitoring: Could not read '{file}': {traceback.format_exc().splitlines()[-1]}; skipping (hash=None)")
+                    self.logger.warning(f"fileMonitoring: Could not read '{file}': {traceback.format_exc().splitlines()[-1]}; skipping (hash=None)", path=file)
                     file_hashes[file] = None
                     _error_handler += 1
                     continue
@@ -130,12 +126,12 @@ class fileMonitoring:
                 old = old_hashes.get(file)
                 new = new_hashes.get(file)
                 if old != new:
-                    self.logger.warning(f"fileMonitoring: File {file} has been modified!")
+                    self.logger.warning(f"fileMonitoring: File {file} has been modified!", path=file)
                     if self.db_conn:
                         self.db_conn.save_file_check(file, new, "true")
                     changed.append({"path": file, "hash": new})
                 else:
-                    self.logger.info(f"fileMonitoring: File {file} is unchanged.")
+                    self.logger.info(f"fileMonitoring: File {file} is unchanged.", path=file)
                     if self.db_conn:
                         self.db_conn.save_file_check(file, new, "false")
 
@@ -175,12 +171,16 @@ class fileMonitoring:
                 self.logger.info("fileMonitoring: No existing hash database found. Generating new database...")
                 new_hashes = self.__generate_new_file_hashes()
                 self.__generate_new_file_hash_db(new_hashes)
-                adieu(0)
+                # nothing to compare against yet; end this module only, not the whole run
+                self.logger.info("fileMonitoring: Hash database created. File changes are detected from the next run on.")
+                return
             
             old_hashes = self.__get_file_hashes_from_db()
-            new_hashes = self.__generate_new_file_hashes()
+            with self.logger.timed("fileMonitoring", "hash_files"):
+                new_hashes = self.__generate_new_file_hashes()
 
-            changed_files = self.__compare_file_hashes(old_hashes, new_hashes)
+            with self.logger.timed("fileMonitoring", "compare_hashes"):
+                changed_files = self.__compare_file_hashes(old_hashes, new_hashes)
             self.__generate_new_file_hash_db(new_hashes)
 
             # Alerting: if changes detected and alerting enabled, send email
@@ -193,22 +193,7 @@ class fileMonitoring:
                         "footer_note": "Automatische Meldung: Dateien wurden geändert."
                     }
 
-                    # mailgun
-                    if getattr(self, "mailgun_alerting_is_active", False):
-                        try:
-                            mg = mailgunConnector()
-                            mg.mailgunSendMailHTML(f"Dateiänderungen auf {self.hostname}", "fileMonitoring", ctx)
-                        except Exception:
-                            self.logger.warning(f"fileMonitoring: mailgun send failed: {traceback.format_exc()}")
-
-                    # smtp
-                    if getattr(self, "smtp_alerting_is_active", False):
-                        try:
-                            from alerting.smtpConnector import smtpConnector
-                            smtp = smtpConnector()
-                            smtp.smtpSendMailHTML(f"Dateiänderungen auf {self.hostname}", "fileMonitoring", ctx)
-                        except Exception:
-                            self.logger.warning(f"fileMonitoring: smtp send failed: {traceback.format_exc()}")
+                    self.alert_dispatcher.dispatch(f"Dateiänderungen auf {self.hostname}", "fileMonitoring", ctx)
             except Exception:
                 self.logger.warning(f"fileMonitoring: Failed to send alert: {traceback.format_exc()}")
 
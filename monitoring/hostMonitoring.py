@@ -1,10 +1,10 @@
 from utils.log import log
+from utils.config import load_config
 from utils.db import db as DB
-from alerting.mailgunConnector import mailgunConnector
+from alerting.alertDispatcher import alertDispatcher
+from alerting.alertState import alertStateTracker, threshold_bounds, FIRE, REMIND, RESOLVE
 
-import json
 import os
-from pathlib import Path
 from sys import exit as adieu
 import traceback
 from datetime import datetime
@@ -14,45 +14,43 @@ class hostMonitoring:
     def __init__(self) -> None:
         try:
             # -- Get config-parameters --
-            path = Path(__file__).resolve().parent.parent / "conf.json"
-
-            with open(f"{path}", "r") as f:
-                j = json.loads(f.read())
-
-                self.is_active: bool = j["hostMonitoring"]["is_active"]
-                self.notify_on_startup: bool = j["hostMonitoring"].get("notify_on_startup", False)
-
-                # alerting config
-                try:
-                    self.alerting_is_active: bool = j["alerting"]["rules"]["hostMonitoring"]["is_active"]
-                    self.alerting_thresholds: dict = j["alerting"]["rules"]["hostMonitoring"].get("thresholds", {})
-                    self.hostname: str = j["general"]["hostname"]
-                except Exception:
-                    self.alerting_is_active = False
-                    self.alerting_thresholds = {}
-                    self.hostname = "N/A"
-
-                impl = j.get("alerting", {}).get("implementation", {})
-                self.mailgun_alerting_is_active = bool(impl.get("mailgun", {}).get("is_active", False))
-                self.smtp_alerting_is_active = bool(impl.get("smtp", {}).get("is_active", False))
-
-                self.logger = log()
-
-                # instantiate DB handler (DB may be configured as inactive and will then be a no-op)
-                try:
-                    self.db_conn = DB()
-                except Exception:
-                    # if DB cannot be initialized do not exit; keep monitoring functional
-                    self.logger.warning("hostMonitoring: Could not initialize DB handler; continuing without DB ingestion.")
-                    self.db_conn = None
-
-                # placeholders for measured values
-                self.measured = {
-                    "free_ram_mb": None,
-                    "load_avg": [None, None, None],
-                    "swap_used_mb": None,
-                    "disk_free": None
-                }
+            j = load_config()
+
+            self.is_active: bool = j["hostMonitoring"]["is_active"]
+            self.notify_on_startup: bool = j["hostMonitoring"].get("notify_on_startup", False)
+
+            # alerting config
+            try:
+                self.alerting_is_active: bool = j["alerting"]["rules"]["hostMonitoring"]["is_active"]
+                self.alerting_thresholds: dict = j["alerting"]["rules"]["hostMonitoring"].get("thresholds", {})
+                self.hostname: str = j["general"]["hostname"]
+            except Exception:
+                self.alerting_is_active = False
+                self.alerting_thresholds = {}
+                self.hostname = "N/A"
+
+            self.alert_dispatcher = alertDispatcher()
+
+            self.logger = log()
+
+            # instantiate DB handler (DB may be configured as inactive and will then be a no-op)
+            try:
+                self.db_conn = DB()
+            except Exception:
+                # if DB cannot be initialized do not exit; keep monitoring functional
+                self.logger.warning("hostMonitoring: Could not initialize DB handler; continuing without DB ingestion.")
+                self.db_conn = None
+
+            # suppresses repeated alerts for the same breached metric (see alerting/alertState.py)
+            self.alert_state = alertStateTracker("hostMonitoring", self.db_conn)
+
+            # placeholders for measured values
+            self.measured = {
+                "free_ram_mb": None,
+                "load_avg": [None, None, None],
+                "swap_used_mb": None,
+                "disk_free": None
+            }
 
             # -------------------------------------------------------
 
@@ -78,7 +76,7 @@ class hostMonitoring:
             # -- Check free RAM --
             self.logger.info("hostMonitoring: Checking free RAM...")
             free_ram = os.popen("free -m | grep Mem | awk '{print $7}'").read().strip()
-            self.logger.info(f"hostMonitoring: Free RAM: {free_ram} MB")
+            self.logger.info(f"hostMonitoring: Free RAM: {free_ram} MB", metric="free_ram_mb")
 
             try:
                 self.measured["free_ram_mb"] = int(free_ram)
@@ -97,7 +95,7 @@ class hostMonitoring:
             # -- Check load average --
             self.logger.info("hostMonitoring: Checking load average...")
             load_avg = os.popen("cat /proc/loadavg | awk '{print $1,$2,$3}'").read().strip()
-            self.logger.info(f"hostMonitoring: Load Average (1, 5, 15 min): {load_avg}")
+            self.logger.info(f"hostMonitoring: Load Average (1, 5, 15 min): {load_avg}", metric="load_average")
 
             parts = load_avg.split()
             try:
@@ -118,7 +116,7 @@ class hostMonitoring:
             # -- Check swap usage --
             self.logger.info("hostMonitoring: Checking swap usage...")
             swap_used = os.popen("free -m | grep Swap | awk '{print $3}'").read().strip()
-            self.logger.info(f"hostMonitoring: Swap Used: {swap_used} MB")
+            self.logger.info(f"hostMonitoring: Swap Used: {swap_used} MB", metric="swap_used_mb")
 
             try:
                 self.measured["swap_used_mb"] = int(swap_used)
@@ -137,7 +135,7 @@ class hostMonitoring:
             # -- Check disk free space --
             self.logger.info("hostMonitoring: Checking disk free space...")
             disk_free = os.popen("df -h / | tail -1 | awk '{print $4}'").read().strip()
-            self.logger.info(f"hostMonitoring: Disk Free Space: {disk_free}")
+            self.logger.info(f"hostMonitoring: Disk Free Space: {disk_free}", metric="disk_free")
 
             self.measured["disk_free"] = disk_free
 
@@ -154,71 +152,64 @@ class hostMonitoring:
             
             # -- Checks all basic services --
             self.__check_if_module_is_active()
-            self.__disk_free_check()
-            self.__free_ram_check()
-            self.__load_avg_check()
-            self.__swap_check()
+            with self.logger.timed("hostMonitoring", "disk_free", metric="disk_free"):
+                self.__disk_free_check()
+            with self.logger.timed("hostMonitoring", "free_ram", metric="free_ram_mb"):
+                self.__free_ram_check()
+            with self.logger.timed("hostMonitoring", "load_avg", metric="load_average"):
+                self.__load_avg_check()
+            with self.logger.timed("hostMonitoring", "swap", metric="swap_used_mb"):
+                self.__swap_check()
 
             # -- Evaluate thresholds and alert if needed --
             try:
                 violations = []
+                recovered = []
                 th = self.alerting_thresholds or {}
 
-                # load averages
-                lvals = self.measured.get("load_avg", [None, None, None])
-                for idx, key in enumerate(["load_average_1", "load_average_5", "load_average_15"]):
-                    thresh = th.get(key)
-                    val = lvals[idx] if lvals and len(lvals) > idx else None
-                    if thresh is not None and val is not None:
-                        try:
-                            if float(val) > float(thresh):
-                                violations.append({"metric": key, "value": val, "threshold": thresh})
-                        except Exception:
-                            pass
-
-                # free RAM (alert if below threshold)
-                free_ram = self.measured.get("free_ram_mb")
-                if th.get("free_ram_mb") is not None and free_ram is not None:
+                # (metric, measured value, threshold key, direction); a threshold is either a number
+                # or {"high": .., "low": ..} to get hysteresis between firing and recovering
+                lvals = self.measured.get("load_avg") or [None, None, None]
+                checks = [
+                    ("load_average_1", lvals[0] if len(lvals) > 0 else None, "load_average_1", "above"),
+                    ("load_average_5", lvals[1] if len(lvals) > 1 else None, "load_average_5", "above"),
+                    ("load_average_15", lvals[2] if len(lvals) > 2 else None, "load_average_15", "above"),
+                    # free RAM alerts when it drops below the threshold
+                    ("free_ram_mb", self.measured.get("free_ram_mb"), "free_ram_mb", "below"),
+                    ("swap_used_mb", self.measured.get("swap_used_mb"), "swap_used", "above"),
+                ]
+                for metric, val, th_key, direction in checks:
+                    thresh = th.get(th_key)
+                    if thresh is None or val is None:
+                        continue
                     try:
-                        if int(free_ram) < int(th.get("free_ram_mb")):
-                            violations.append({"metric": "free_ram_mb", "value": free_ram, "threshold": th.get("free_ram_mb")})
+                        high, low = threshold_bounds(thresh)
+                        decision = self.alert_state.evaluate_threshold(metric, float(val), high, low, direction)
                     except Exception:
-                        pass
+                        self.logger.warning(f"hostMonitoring: Could not evaluate threshold for {metric}: {traceback.format_exc()}", metric=metric)
+                        continue
 
-                # swap used (alert if above threshold)
-                swap_used = self.measured.get("swap_used_mb")
-                if th.get("swap_used") is not None and swap_used is not None:
-                    try:
-                        if int(swap_used) > int(th.get("swap_used")):
-                            violations.append({"metric": "swap_used_mb", "value": swap_used, "threshold": th.get("swap_used")})
-                    except Exception:
-                        pass
+                    entry = {"metric": metric, "value": val, "threshold": high if direction == "above" else low}
+                    if decision in (FIRE, REMIND):
+                        violations.append(entry)
+                    elif decision == RESOLVE:
+                        recovered.append(entry)
 
-                if violations and self.alerting_is_active:
+                if (violations or recovered) and self.alerting_is_active:
                     try:
                         ctx = {
-                            "report_title": "Host-Monitoring Warnung",
+                            "report_title": "Host-Monitoring Warnung" if violations else "Host-Monitoring Entwarnung",
                             "generated_at": datetime.now().strftime("%Y-%m-%d %H:%M"),
                             "violations": violations,
-                            "footer_note": "Automatische Warnung: Host-Schwellenwerte überschritten."
+                            "recovered": recovered,
+                            "footer_note": "Automatische Warnung: Host-Schwellenwerte überschritten." if violations else "Automatische Meldung: Host-Werte wieder im Normalbereich."
                         }
 
-                        # mailgun
-                        if getattr(self, "mailgun_alerting_is_active", False):
-                            try:
-                                mg = mailgunConnector()
-                                mg.mailgunSendMailHTML(f"Host {self.hostname}: Schwellenwerte überschritten", "hostMonitoring", ctx)
-                            except Exception:
-                                self.logger.warning(f"hostMonitoring: mailgun send failed: {traceback.format_exc()}")
-
-                        # smtp
-                        if getattr(self, "smtp_alerting_is_active", False):
-                            try:
-                                from alerting.smtpConnector import smtpConnector
-                                smtp = smtpConnector()
-                                smtp.smtpSendMailHTML(f"Host {self.hostname}: Schwellenwerte überschritten", "hostMonitoring", ctx)
-                            except Exception:
-                                self.logger.warning(f"hostMonitoring: smtp send failed: {traceback.format_exc()}")
+                        subject = f"Host {self.hostname}: Schwellenwerte überschritten" if violations else f"Host {self.hostname}: Werte wieder im Normalbereich"
+                        results = self.alert_dispatcher.dispatch(subject, "hostMonitoring", ctx)
+                        # the renotify interval only starts once the alert went out (or is queued)
+                        if any(r.get("ok") for r in results or []):
+                            self.alert_state.mark_notified([v["metric"] for v in violations])
                     except Exception:
                         self.logger.warning(f"hostMonitoring: Failed to send alert: {traceback.format_exc()}")
 
@@ -252,22 +243,7 @@ class hostMonitoring:
                 "footer_note": "Automatische Benachrichtigung: Das System wurde gestartet."
             }
 
-            # mailgun
-            if getattr(self, "mailgun_alerting_is_active", False):
-                try:
-                    mg = mailgunConnector()
-                    mg.mailgunSendMailHTML(f"Systemstart auf {self.hostname}", "hostStartup", ctx)
-                except Exception:
-                    self.logger.warning(f"hostMonitoring: mailgun send failed: {traceback.format_exc()}")
-
-            # smtp
-            if getattr(self, "smtp_alerting_is_active", False):
-                try:
-                    from alerting.smtpConnector import smtpConnector
-                    smtp = smtpConnector()
-                    smtp.smtpSendMailHTML(f"Systemstart auf {self.hostname}", "hostStartup", ctx)
-                except Exception:
-                    self.logger.warning(f"hostMonitoring: smtp send failed: {traceback.format_exc()}")
+            self.alert_dispatcher.dispatch(f"Systemstart auf {self.hostname}", "hostStartup", ctx)
 
             self.logger.info("hostMonitoring: Startup notification sent.")
         except Exception as e:
@@ -1,13 +1,16 @@
 from utils.log import log
+from utils.config import load_config
 from utils.db import db as DB
-from alerting.mailgunConnector import mailgunConnector
+from alerting.alertDispatcher import alertDispatcher
+from alerting.alertState import alertStateTracker, FIRE, REMIND, RESOLVE
+from utils.systemd import query_units, unknown_state
+from utils.dnsResolver import dnsResolver, STATUS_OK
+from utils.probes import run_probes
+from utils.connectivity import check_connectivity, DEFAULT_TARGETS
+from utils.certificates import check_certificates, STATUS_OK as CERT_OK
 
-import json
-import os
-from pathlib import Path
 from sys import exit as adieu
 import traceback
-import socket
 from datetime import datetime
 
 
@@ -15,39 +18,68 @@ class serviceMonitoring:
     def __init__(self) -> None:
         try:
             # -- Get config-parameters --
-            path = Path(__file__).resolve().parent.parent / "conf.json"
+            j = load_config()
 
-            with open(f"{path}", "r") as f:
-                j = json.loads(f.read())
+            self.is_active: bool = j["serviceMonitoring"]["is_active"]
+            self.apt_service_list: list = j["serviceMonitoring"]["service_list"]
+            self.dns_list: list = j["serviceMonitoring"]["domain_list"]
 
-                self.is_active: bool = j["serviceMonitoring"]["is_active"]
-                self.apt_service_list: list = j["serviceMonitoring"]["service_list"]
-                self.dns_list: list = j["serviceMonitoring"]["domain_list"]
+            # systemctl binary used for the batched state query (tests point this to a stand-in)
+            self.systemctl_path: str = j["serviceMonitoring"].get("systemctl_path", "systemctl")
+            self.systemctl_timeout: float = float(j["serviceMonitoring"].get("systemctl_timeout_seconds", 10))
 
-                self.check_dns: bool = j["serviceMonitoring"]["check_dns"]
-                self.check_internet_connectivity: bool = j["serviceMonitoring"]["check_internet_connectivity"]
+            self.check_dns: bool = j["serviceMonitoring"]["check_dns"]
+            self.check_internet_connectivity: bool = j["serviceMonitoring"]["check_internet_connectivity"]
 
-                self.hostname: str = j["general"]["hostname"]
+            # internet connectivity: first answer of any target wins, quorum of failures = down
+            self.internet_targets: list = list(j["serviceMonitoring"].get("internet_targets", DEFAULT_TARGETS))
+            self.internet_timeout: float = float(j["serviceMonitoring"].get("internet_timeout_seconds", 3))
+            self.internet_failure_quorum: int = int(j["serviceMonitoring"].get("internet_failure_quorum", 0))
+            self.internet_stagger_ms: float = float(j["serviceMonitoring"].get("internet_stagger_ms", 50))
 
-                self.logger = log()
+            # DNS check: own resolver (empty dns_servers = nameservers of /etc/resolv.conf)
+            self.dns_resolver = dnsResolver(
+                servers=list(j["serviceMonitoring"].get("dns_servers", [])),
+                timeout=float(j["serviceMonitoring"].get("dns_timeout_seconds", 2)),
+                max_workers=int(j["serviceMonitoring"].get("dns_max_workers", 16)),
+                cache_max_ttl=float(j["serviceMonitoring"].get("dns_cache_max_ttl_seconds", 300)),
+            )
 
-                # instantiate DB handler (DB may be configured as inactive and will then be a no-op)
-                try:
-                    self.db_conn = DB()
-                except Exception:
-                    # if DB cannot be initialized do not exit; keep monitoring functional
-                    self.logger.warning("serviceMonitoring: Could not initialize DB handler; continuing without DB ingestion.")
-                    self.db_conn = None
+            # endpoint probes (tcp / tls / http), run concurrently on an asyncio event loop
+            self.probes: list = [dict(p) for p in j["serviceMonitoring"].get("probes", [])]
+            self.probe_concurrency: int = int(j["serviceMonitoring"].get("probe_concurrency", 50))
+            self.probe_timeout: float = float(j["serviceMonitoring"].get("probe_timeout_seconds", 5))
+            self.probe_verify_tls: bool = bool(j["serviceMonitoring"].get("probe_verify_tls", True))
 
-                # Alerting rule for this module (rule-level) and available implementations
-                try:
-                    self.alerting_is_active: bool = j["alerting"]["rules"]["serviceMonitoring"]["is_active"]
-                except Exception:
-                    self.alerting_is_active = False
+            # certificate expiry: TLS endpoints ({"host", "port"}) and local PEM files ({"file"})
+            self.certificates: list = [dict(c) for c in j["serviceMonitoring"].get("certificates", [])]
+            self.cert_warn_days: float = float(j["serviceMonitoring"].get("cert_warn_days", 14))
+            self.cert_concurrency: int = int(j["serviceMonitoring"].get("cert_concurrency", 50))
+            self.cert_timeout: float = float(j["serviceMonitoring"].get("cert_timeout_seconds", 5))
+            self.cert_cache_seconds: float = float(j["serviceMonitoring"].get("cert_cache_seconds", 3600))
+            self.cert_file_workers: int = int(j["serviceMonitoring"].get("cert_file_workers", 4))
 
-                impl = j.get("alerting", {}).get("implementation", {})
-                self.mailgun_alerting_is_active = bool(impl.get("mailgun", {}).get("is_active", False))
-                self.smtp_alerting_is_active = bool(impl.get("smtp", {}).get("is_active", False))
+            self.hostname: str = j["general"]["hostname"]
+
+            self.logger = log()
+
+            # instantiate DB handler (DB may be configured as inactive and will then be a no-op)
+            try:
+                self.db_conn = DB()
+            except Exception:
+                # if DB cannot be initialized do not exit; keep monitoring functional
+                self.logger.warning("serviceMonitoring: Could not initialize DB handler; continuing without DB ingestion.")
+                self.db_conn = None
+
+            # Alerting rule for this module (rule-level) and available implementations
+            try:
+                self.alerting_is_active: bool = j["alerting"]["rules"]["serviceMonitoring"]["is_active"]
+            except Exception:
+                self.alerting_is_active = False
+
+            self.alert_dispatcher = alertDispatcher()
+            # suppresses repeated alerts for services that stay down (see alerting/alertState.py)
+            self.alert_state = alertStateTracker("serviceMonitoring", self.db_conn)
 
             # -------------------------------------------------------
 
@@ -70,27 +102,33 @@ class serviceMonitoring:
 
     def __check_service_statuses(self) -> None:
         try:
-            # -- Iterate from service list --
+            # -- One systemctl call for all services instead of one process per service --
             self._inactive_services = []
-            for service in self.apt_service_list:
-                self.logger.info(f"serviceMonitoring: Checking service: {service}")
+            try:
+                states = query_units(self.apt_service_list, self.systemctl_path, self.systemctl_timeout)
+            except Exception:
+                # e.g. no systemd on this host: every service counts as not active, as before
+                self.logger.error(f"serviceMonitoring: Could not query service states with systemctl: {traceback.format_exc()}")
+                states = {service: unknown_state(service) for service in self.apt_service_list}
 
-                # -- Check with systemctl quiet command, if service is active. If so, returns 0 --
-                if int(os.system("systemctl is-active --quiet {0}".format(service))) == 0:
-                    self.logger.info(f"serviceMonitoring: Service {service} is active.")
-                    if self.db_conn:
-                        self.db_conn.save_service_check(service, "active")
+            for service in self.apt_service_list:
+                state = states[service]
+                details = f"{state['active_state']}/{state['sub_state']}, restarts={state['n_restarts']}"
+                if state["is_active"]:
+                    self.logger.info(f"serviceMonitoring: Service {service} is active ({details}).", service=service)
                 else:
-                    self.logger.warning(f"serviceMonitoring: Service {service} is NOT active")
-                    if self.db_conn:
-                        self.db_conn.save_service_check(service, "inactive")
+                    self.logger.warning(f"serviceMonitoring: Service {service} is NOT active ({details})", service=service)
                     # collect for alerting
                     self._inactive_services.append({
                         "name": service,
                         "host": self.hostname,
-                        "last_state": "inactive"
+                        "last_state": f"{state['active_state']} ({state['sub_state']})"
                     })
-                # --------------------------------------------------------------------------------
+                if self.db_conn:
+                    self.db_conn.save_service_check(
+                        service, "active" if state["is_active"] else "inactive",
+                        active_state=state["active_state"], sub_state=state["sub_state"], n_restarts=state["n_restarts"],
+                    )
         except Exception as e:
             self.logger.error("serviceMonitoring/__check_service_statuses: {0}".format(traceback.format_exc()))
             adieu(1)
@@ -99,20 +137,21 @@ class serviceMonitoring:
         try:
             if self.check_dns:
                 self.logger.info("Performing DNS Check")
-                _dns_handler = 0
-                for dns_lookup in self.dns_list:
-                    try:
-                        ip = socket.gethostbyname(dns_lookup)
-                        
-                        self.logger.info(f"Host {dns_lookup} resolved to {ip}")
-                    except socket.gaierror:
-                        self.logger.warning(f"Host {dns_lookup} did not resolve!!")
-                        _dns_handler += 1
-                    
-                if _dns_handler > 0:
-                    self.db_conn.save_service_check("dns", "inactive")
-                else:
-                    self.db_conn.save_service_check("dns", "active")
+                # all domains at once, each lookup bounded by dns_timeout_seconds
+                results = self.dns_resolver.resolve_all(self.dns_list)
+                metrics = []
+                for domain, result in results.items():
+                    source = "cache" if result["cached"] else f"{result['latency_ms']} ms"
+                    if result["status"] == STATUS_OK:
+                        self.logger.info(f"Host {domain} resolved to {', '.join(result['addresses'])} ({source})", service="dns")
+                    else:
+                        self.logger.warning(f"Host {domain} did not resolve: {result['status']} ({source})", service="dns")
+                    if not result["cached"]:
+                        metrics.append(("dns_lookup_ms", domain, result["latency_ms"]))
+                    if self.db_conn:
+                        self.db_conn.save_service_check(f"dns:{domain}", "active" if result["status"] == STATUS_OK else "inactive", active_state=result["status"])
+                if self.db_conn and metrics:
+                    self.db_conn.save_metrics("serviceMonitoring", metrics)
             else:
                 self.logger.warning("Skipped DNS Check... Not enabled in conf.json")
         except Exception:
@@ -124,15 +163,95 @@ class serviceMonitoring:
             if self.check_internet_connectivity:
                 self.logger.info("Performing Internet Connectivity check...")
 
-                conn = socket.create_connection(("8.8.8.8", 53), 3)
-                conn.close()
+                result = check_connectivity(self.internet_targets, self.internet_timeout, self.internet_failure_quorum, self.internet_stagger_ms)
+                summary = ", ".join(
+                    f"{t['target']} {t['rtt_ms']} ms" if t["rtt_ms"] is not None else f"{t['target']} {t['status']}" for t in result["targets"]
+                )
+                if result["reachable"]:
+                    self.logger.info(f"serviceMonitoring: Internet reachable after {result['decided_ms']} ms ({summary})", service="internet")
+                else:
+                    self.logger.warning(f"serviceMonitoring: Internet unreachable ({summary})", service="internet")
 
-                self.db_conn.save_service_check("internet", "active")
+                if self.db_conn:
+                    self.db_conn.save_service_check("internet", "active" if result["reachable"] else "inactive", active_state="ok" if result["reachable"] else "unreachable")
+                    metrics = [("internet_rtt_ms", t["target"], t["rtt_ms"]) for t in result["targets"] if t["rtt_ms"] is not None]
+                    metrics.append(("internet_check_ms", None, result["decided_ms"]))
+                    self.db_conn.save_metrics("serviceMonitoring", metrics)
             else:
                 self.logger.warning("Skipped Internet Connectivity check... Not enabled in conf.json")
         except Exception:
-            self.logger.warning("serviceMonitoring: Could not reach 8.8.8.8 on Port 53")
-            self.db_conn.save_service_check("internet", "inactive")
+            self.logger.warning(f"serviceMonitoring: Error in __check_internet_connectivity: {traceback.format_exc()}")
+            if self.db_conn:
+                self.db_conn.save_service_check("internet", "inactive")
+
+    def __check_probes(self) -> None:
+        try:
+            self._probe_subjects = []
+            if not self.probes:
+                return
+            self.logger.info(f"serviceMonitoring: Running {len(self.probes)} endpoint probe(s)...")
+            results = run_probes(self.probes, self.probe_concurrency, self.probe_timeout, self.probe_verify_tls)
+            metrics = []
+            for result in results:
+                subject = f"probe:{result['name']}"
+                self._probe_subjects.append(subject)
+                timings = ", ".join(f"{key}={result[key]}" for key in ("connect_ms", "tls_ms", "ttfb_ms", "total_ms") if result[key] is not None)
+                if result["ok"]:
+                    self.logger.info(f"serviceMonitoring: Probe {result['name']} ok ({timings})", service=subject)
+                else:
+                    self.logger.warning(f"serviceMonitoring: Probe {result['name']} failed: {result['status']} {result['detail']} ({timings})", service=subject)
+                    # failed probes are alerted like inactive services
+                    self._inactive_services.append({
+                        "name": subject,
+                        "host": self.hostname,
+                        "last_state": f"{result['status']} {result['detail']}".strip()
+                    })
+                for key in ("connect_ms", "tls_ms", "ttfb_ms", "total_ms"):
+                    if result[key] is not None:
+                        metrics.append((f"probe_{key}", result["name"], result[key]))
+                if self.db_conn:
+                    self.db_conn.save_service_check(subject, "active" if result["ok"] else "inactive", active_state=result["status"])
+            if self.db_conn and metrics:
+                self.db_conn.save_metrics("serviceMonitoring", metrics)
+        except Exception:
+            self.logger.error("serviceMonitoring/__check_probes: {0}".format(traceback.format_exc()))
+            adieu(1)
+
+    def __check_certificates(self) -> None:
+        try:
+            self._cert_subjects = []
+            if not self.certificates:
+                return
+            self.logger.info(f"serviceMonitoring: Checking {len(self.certificates)} certificate(s)...")
+            results = check_certificates(
+                self.certificates, self.cert_warn_days, self.cert_concurrency,
+                self.cert_timeout, self.cert_cache_seconds, self.cert_file_workers,
+            )
+            metrics = []
+            for result in results:
+                subject = f"cert:{result['name']}"
+                self._cert_subjects.append(subject)
+                chain = " <- ".join(f"{c['subject']} ({c['not_after']})" for c in result["chain"])
+                source = "cache" if result["cached"] else result["source"]
+                if result["status"] == CERT_OK:
+                    self.logger.info(f"serviceMonitoring: Certificate {result['name']} ok, {result['detail']} [{chain}] ({source})", service=subject)
+                else:
+                    self.logger.warning(f"serviceMonitoring: Certificate {result['name']} {result['status']}: {result['detail']} ({source})", service=subject)
+                    # expiring certificates are alerted like inactive services
+                    self._inactive_services.append({
+                        "name": subject,
+                        "host": self.hostname,
+                        "last_state": f"{result['status']}: {result['detail']}"
+                    })
+                if result["days_left"] is not None:
+                    metrics.append(("cert_days_left", result["name"], result["days_left"]))
+                if self.db_conn:
+                    self.db_conn.save_service_check(subject, "active" if result["status"] == CERT_OK else "inactive", active_state=result["status"])
+            if self.db_conn and metrics:
+                self.db_conn.save_metrics("serviceMonitoring", metrics)
+        except Exception:
+            self.logger.error("serviceMonitoring/__check_certificates: {0}".format(traceback.format_exc()))
+            adieu(1)
 
     def check_services(self) -> None:
         try:
@@ -140,36 +259,45 @@ class serviceMonitoring:
             
             # -- Checks all basic services --
             self.__check_if_module_is_active()
-            self.__check_service_statuses()
-            self.__check_dns()
-            self.__check_internet_connectivity()
+            with self.logger.timed("serviceMonitoring", "service_statuses"):
+                self.__check_service_statuses()
+            with self.logger.timed("serviceMonitoring", "dns"):
+                self.__check_dns()
+            with self.logger.timed("serviceMonitoring", "internet_connectivity"):
+                self.__check_internet_connectivity()
+            with self.logger.timed("serviceMonitoring", "probes", probes=len(self.probes)):
+                self.__check_probes()
+            with self.logger.timed("serviceMonitoring", "certificates", certificates=len(self.certificates)):
+                self.__check_certificates()
 
-            # -- Alerting: if there are inactive services and alerting is enabled --
+            # -- Alerting: only state changes (and due reminders) of services are notified --
             try:
-                if getattr(self, "_inactive_services", None) and self.alerting_is_active:
+                inactive = {s["name"]: s for s in getattr(self, "_inactive_services", [])}
+                alert_services = []
+                recovered_services = []
+                for service in list(self.apt_service_list) + getattr(self, "_probe_subjects", []) + getattr(self, "_cert_subjects", []):
+                    is_inactive = service in inactive
+                    decision = self.alert_state.evaluate(service, is_inactive, "inactive" if is_inactive else "active")
+                    if decision in (FIRE, REMIND):
+                        state = self.alert_state.get(service) or {}
+                        alert_services.append(dict(inactive[service], last_seen=state.get("first_seen")))
+                    elif decision == RESOLVE:
+                        recovered_services.append({"name": service, "host": self.hostname, "last_state": "active"})
+
+                if (alert_services or recovered_services) and self.alerting_is_active:
                     ctx = {
-                        "report_title": "Inaktive Services",
+                        "report_title": "Inaktive Services" if alert_services else "Services wieder aktiv",
                         "generated_at": datetime.now().strftime("%Y-%m-%d %H:%M"),
-                        "inactive_services": self._inactive_services,
-                        "footer_note": "Automatische Warnung: Überwachte Services sind inaktiv."
+                        "inactive_services": alert_services,
+                        "recovered_services": recovered_services,
+                        "footer_note": "Automatische Warnung: Überwachte Services sind inaktiv." if alert_services else "Automatische Meldung: Überwachte Services sind wieder aktiv."
                     }
 
-                    # send to mailgun if configured
-                    if getattr(self, "mailgun_alerting_is_active", False):
-                        try:
-                            mg = mailgunConnector()
-                            mg.mailgunSendMailHTML("Inaktive Services auf {0}".format(self.hostname), "serviceMonitoring", ctx)
-                        except Exception:
-                            self.logger.warning(f"serviceMonitoring: mailgun send failed: {traceback.format_exc()}")
-
-                    # send to smtp if configured
-                    if getattr(self, "smtp_alerting_is_active", False):
-                        try:
-                            from alerting.smtpConnector import smtpConnector
-                            smtp = smtpConnector()
-                            smtp.smtpSendMailHTML("Inaktive Services auf {0}".format(self.hostname), "serviceMonitoring", ctx)
-                        except Exception:
-                            self.logger.warning(f"serviceMonitoring: smtp send failed: {traceback.format_exc()}")
+                    subject = "Inaktive Services auf {0}".format(self.hostname) if alert_services else "Services wieder aktiv auf {0}".format(self.hostname)
+                    results = self.alert_dispatcher.dispatch(subject, "serviceMonitoring", ctx)
+                    # the renotify interval only starts once the alert went out (or is queued)
+                    if any(r.get("ok") for r in results or []):
+                        self.alert_state.mark_notified([s["name"] for s in alert_services])
             except Exception:
                 self.logger.warning(f"serviceMonitoring: Failed to send alert: {traceback.format_exc()}")
 
@@ -0,0 +1,48 @@
+import json
+import shutil
+import subprocess
+
+import pytest
+
+import utils.config as config_module
+
+
+@pytest.fixture(scope="session")
+def self_signed_cert(tmp_path_factory):
+    """(cert path, key path) of a self-signed certificate for localhost / 127.0.0.1, valid for 30 days."""
+    if shutil.which("openssl") is None:
+        pytest.skip("openssl is not installed")
+    directory = tmp_path_factory.mktemp("tls")
+    cert, key = directory / "cert.pem", directory / "key.pem"
+    subprocess.run(
+        [
+            "openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "30",
+            "-subj", "/CN=localhost", "-addext", "subjectAltName=DNS:localhost,IP:127.0.0.1",
+            "-keyout", str(key), "-out", str(cert),
+        ],
+        check=True, capture_output=True,
+    )
+    return cert, key
+
+
+@pytest.fixture
+def write_conf(tmp_path, monkeypatch):
+    """Write a conf.json into tmp_path and load it instead of the repo's; returns the path of its results DB.
+
+    general, logging (inactive) and db are filled in; keyword arguments add or replace sections.
+    """
+    def write(**sections):
+        conf = {
+            "general": {"hostname": "host-a", "ip": "127.0.0.1"},
+            "logging": {"is_active": False, "log_file_path": str(tmp_path / "x.log")},
+            "db": {"is_active": True, "db_path": str(tmp_path / "results.db")},
+            **sections,
+        }
+        path = tmp_path / "conf.json"
+        path.write_text(json.dumps(conf))
+        monkeypatch.setattr(config_module, "CONF_PATH", path)
+        config_module.clear_cache()
+        return tmp_path / "results.db"
+
+    yield write
+    config_module.clear_cache()
@@ -0,0 +1,135 @@
+import threading
+import time
+from concurrent.futures import Future
+
+import alerting.alertDispatcher as dispatcher_module
+
+
+class DummyLogger:
+    def __init__(self):
+        self.infos = []
+        self.warnings = []
+        self.errors = []
+
+    def info(self, msg, **fields):
+        self.infos.append(msg)
+
+    def warning(self, msg, **fields):
+        self.warnings.append(msg)
+
+    def error(self, msg, **fields):
+        self.errors.append(msg)
+
+
+class RecordingConnector:
+    def __init__(self, delay=0.0, exc=None):
+        self.delay = delay
+        self.exc = exc
+        self.sent = []
+
+    def send_rendered(self, subject, html, template_context=None):
+        time.sleep(self.delay)
+        if self.exc is not None:
+            raise self.exc
+        self.sent.append((subject, html))
+
+
+def make_dispatcher(monkeypatch, connectors, timeouts=None):
+    logger = DummyLogger()
+
+    def fake_init(self):
+        self.default_timeout = 5.0
+        self.active_connectors = list(connectors)
+        self.timeouts = timeouts or {}
+        self.logger = logger
+
+    monkeypatch.setattr(dispatcher_module.alertDispatcher, "__init__", fake_init)
+    monkeypatch.setattr(dispatcher_module.alertDispatcher, "_get_connector", lambda self, name: connectors[name])
+    renders = []
+    monkeypatch.setattr(dispatcher_module.alertDispatcher, "render", lambda self, t, c: renders.append(t) or "<html>ok</html>")
+    return dispatcher_module.alertDispatcher(), logger, renders
+
+
+def test_dispatch_renders_once_and_sends_to_all(monkeypatch):
+    connectors = {"mailgun": RecordingConnector(), "smtp": RecordingConnector()}
+    dispatcher, logger, renders = make_dispatcher(monkeypatch, connectors)
+
+    results = dispatcher.dispatch("subject", "serviceMonitoring", {})
+
+    assert renders == ["serviceMonitoring"]
+    assert all(r["ok"] for r in results)
+    assert connectors["mailgun"].sent == [("subject", "<html>ok</html>")]
+    assert connectors["smtp"].sent == [("subject", "<html>ok</html>")]
+
+
+def test_dispatch_runs_connectors_in_parallel(monkeypatch):
+    connectors = {"a": RecordingConnector(delay=0.3), "b": RecordingConnector(delay=0.3)}
+    dispatcher, _, _ = make_dispatcher(monkeypatch, connectors)
+
+    start = time.monotonic()
+    dispatcher.dispatch("subject", "hostMonitoring", {})
+
+    assert time.monotonic() - start < 0.55
+
+
+def test_dispatch_reports_failures_and_timeouts_without_exiting(monkeypatch):
+    connectors = {
+        "exits": RecordingConnector(exc=SystemExit(1)),
+        "raises": RecordingConnector(exc=RuntimeError("relay down")),
+        "slow": RecordingConnector(delay=1.0),
+        "ok": RecordingConnector(),
+    }
+    dispatcher, logger, _ = make_dispatcher(monkeypatch, connectors, timeouts={"slow": 0.1})
+
+    results = {r["connector"]: r for r in dispatcher.dispatch("subject", "fileMonitoring", {})}
+
+    assert results["exits"]["ok"] is False
+    assert "relay down" in results["raises"]["error"]
+    assert results["slow"]["error"] == "timeout"
+    assert results["ok"]["ok"] is True
+    assert len(logger.warnings) == 3
+
+
+class BatchingConnector:
+    """Returns a Future that is completed later, like the webhook connector."""
+
+    def __init__(self, exc=None, delay=0.05):
+        self.exc = exc
+        self.delay = delay
+
+    def send_rendered(self, subject, html, template_context=None):
+        delivered = Future()
+
+        def complete():
+            time.sleep(self.delay)
+            if self.exc is not None:
+                delivered.set_exception(self.exc)
+            else:
+                delivered.set_result(None)
+
+        threading.Thread(target=complete, daemon=True).start()
+        return delivered
+
+
+def test_dispatch_reports_the_outcome_of_batched_alerts(monkeypatch):
+    connectors = {
+        "posted": BatchingConnector(),
+        "rejected": BatchingConnector(exc=ConnectionError("HTTP 500")),
+        "digest": BatchingConnector(delay=1.0),
+    }
+    dispatcher, logger, _ = make_dispatcher(monkeypatch, connectors, timeouts={"digest": 0.1})
+
+    results = {r["connector"]: r for r in dispatcher.dispatch("subject", "hostMonitoring", {})}
+
+    assert results["posted"]["ok"] is True and "queued" not in results["posted"]
+    assert results["rejected"]["ok"] is False and "HTTP 500" in results["rejected"]["error"]
+    assert results["digest"]["ok"] is True and results["digest"]["queued"] is True
+    assert len(logger.warnings) == 1
+
+
+def test_register_connector_adds_to_registry(monkeypatch):
+    monkeypatch.setattr(dispatcher_module, "CONNECTOR_REGISTRY", dict(dispatcher_module.CONNECTOR_REGISTRY))
+    dispatcher_module.register_connector("pager", RecordingConnector)
+
+    assert dispatcher_module.CONNECTOR_REGISTRY["pager"] is RecordingConnector
+    assert {"mailgun", "smtp"} <= set(dispatcher_module.CONNECTOR_REGISTRY)
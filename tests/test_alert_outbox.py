@@ -0,0 +1,155 @@
+import sys
+import time
+from concurrent.futures import Future
+
+import pytest
+
+import alerting.alertDispatcher as dispatcher_module
+import alerting.alertOutbox as outbox_module
+
+
+class FlakyConnector:
+    """Fails the first `failures` sends, then accepts everything."""
+
+    instances = []
+
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.calls = 0
+        self.delivered = []
+        FlakyConnector.instances.append(self)
+
+    def send_rendered(self, subject, html, template_context=None):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise ConnectionError("relay down")
+        self.delivered.append(subject)
+
+
+class BatchingConnector(FlakyConnector):
+    """Like FlakyConnector, but reports the outcome through a Future as batching connectors do."""
+
+    def send_rendered(self, subject, html, template_context=None):
+        delivered = Future()
+        try:
+            super().send_rendered(subject, html, template_context)
+            delivered.set_result(None)
+        except ConnectionError as e:
+            delivered.set_exception(e)
+        return delivered
+
+
+@pytest.fixture
+def outbox_conf(write_conf, monkeypatch):
+    def write(failures=0, max_attempts=8, connector=FlakyConnector):
+        monkeypatch.setattr(dispatcher_module, "CONNECTOR_REGISTRY", {"fake": lambda: connector(failures)})
+        monkeypatch.setattr(dispatcher_module, "_CONNECTOR_CACHE", {"config": None, "connectors": {}})
+        monkeypatch.setattr(dispatcher_module.alertDispatcher, "render", lambda self, t, c: "<html>ok</html>")
+        FlakyConnector.instances = []
+        write_conf(alerting={
+            "outbox": {"is_active": True, "max_workers": 2, "max_attempts": max_attempts, "backoff_base_seconds": 0},
+            "implementation": {"fake": {"is_active": True}},
+        })
+
+    return write
+
+
+def test_dispatch_queues_and_background_worker_delivers(outbox_conf):
+    outbox_conf(failures=1)
+    dispatcher = dispatcher_module.alertDispatcher()
+
+    results = dispatcher.dispatch("Inaktive Services", "serviceMonitoring", {"inactive_services": []})
+
+    assert results[0]["queued"] is True
+    assert outbox_module.wait_for_background_drain(5)
+
+    connector = FlakyConnector.instances[0]
+    assert connector.calls == 2
+    assert connector.delivered == ["Inaktive Services"]
+    assert outbox_module.alertOutbox().db_conn.count_alerts_by_status() == {"delivered": 1}
+
+
+def test_outbox_gives_up_after_max_attempts(outbox_conf):
+    outbox_conf(failures=100, max_attempts=3)
+    outbox = outbox_module.alertOutbox()
+    outbox.enqueue(["fake"], "subject", "hostMonitoring", "<html>ok</html>", {})
+
+    stats = outbox.drain()
+
+    assert stats == {"delivered": 0, "retried": 2, "failed": 1}
+    assert outbox.db_conn.count_alerts_by_status() == {"failed": 1}
+
+
+def test_failed_batch_is_not_marked_delivered(outbox_conf):
+    outbox_conf(failures=1, connector=BatchingConnector)
+    outbox = outbox_module.alertOutbox()
+    outbox.backoff_base_seconds = 60
+    outbox.enqueue(["fake"], "subject", "hostMonitoring", "<html>ok</html>", {})
+
+    assert outbox.drain() == {"delivered": 0, "retried": 1, "failed": 0}
+    assert outbox.db_conn.count_alerts_by_status() == {"pending": 1}
+
+
+def test_failed_alert_waits_for_backoff(outbox_conf):
+    outbox_conf(failures=1)
+    outbox = outbox_module.alertOutbox()
+    outbox.backoff_base_seconds = 60
+    outbox.enqueue(["fake"], "subject", "fileMonitoring", "<html>ok</html>", {})
+
+    start = time.monotonic()
+    stats = outbox.drain()
+
+    assert stats == {"delivered": 0, "retried": 1, "failed": 0}
+    assert time.monotonic() - start < 5
+    assert outbox.db_conn.count_alerts_by_status() == {"pending": 1}
+
+
+def test_due_retry_is_sent_by_the_next_run_without_a_new_alert(outbox_conf, monkeypatch, tmp_path):
+    import monitor
+    import monitoring.hostMonitoring as host_module
+
+    outbox_conf(failures=1)
+    outbox = outbox_module.alertOutbox()
+    outbox.backoff_base_seconds = 0.3
+    outbox.enqueue(["fake"], "subject", "hostMonitoring", "<html>ok</html>", {})
+    assert outbox.drain() == {"delivered": 0, "retried": 1, "failed": 0}
+    time.sleep(0.4)
+
+    # the next cron run raises no alert of its own
+    class QuietHost:
+        def check_host_params(self):
+            pass
+
+    monkeypatch.setattr(host_module, "hostMonitoring", QuietHost)
+    monkeypatch.setattr(sys, "argv", ["monitor.py", "--host"])
+    assert monitor.run_monitoring_modules(outbox.logger) == []
+    assert outbox_module.wait_for_background_drain(5)
+
+    assert FlakyConnector.instances[0].delivered == ["subject"]
+    assert outbox.db_conn.count_alerts_by_status() == {"delivered": 1}
+
+
+def test_daemon_drains_the_outbox_on_its_own_interval(outbox_conf, monkeypatch):
+    import monitor
+    import utils.scheduler as scheduler_module
+
+    outbox_conf()
+    jobs = {}
+
+    class RecordingScheduler:
+        def __init__(self, *args, **kwargs):
+            pass
+
+        def add_job(self, name, func, interval_seconds, jitter_seconds=None):
+            jobs[name] = interval_seconds
+
+        def install_signal_handlers(self):
+            pass
+
+        def run(self):
+            pass
+
+    monkeypatch.setattr(scheduler_module, "scheduler", RecordingScheduler)
+    monitor.run_daemon(outbox_module.log())
+
+    assert jobs == {"alertOutbox": 30}
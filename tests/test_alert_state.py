@@ -0,0 +1,116 @@
+import pytest
+
+import alerting.alertState as state_module
+from alerting.alertState import alertStateTracker, threshold_bounds, FIRE, REMIND, RESOLVE
+
+
+@pytest.fixture(autouse=True)
+def isolated_conf(tmp_path, write_conf):
+    write_conf(db={"is_active": False, "db_path": str(tmp_path / "results.db")})
+
+
+def make_tracker(monkeypatch, renotify_seconds=3600.0, notify_on_recovery=True):
+    clock = {"now": 1000.0}
+    monkeypatch.setattr(state_module.time, "time", lambda: clock["now"])
+    tracker = alertStateTracker("serviceMonitoring")
+    tracker.renotify_seconds = renotify_seconds
+    tracker.notify_on_recovery = notify_on_recovery
+    return tracker, clock
+
+
+def test_problem_fires_once_and_resolves_once(monkeypatch):
+    tracker, clock = make_tracker(monkeypatch)
+
+    assert tracker.evaluate("nginx", False) is None
+    assert tracker.evaluate("nginx", True, "inactive") == FIRE
+    tracker.mark_notified(["nginx"])
+    clock["now"] += 60
+    assert tracker.evaluate("nginx", True, "inactive") is None
+    assert tracker.evaluate("nginx", False, "active") == RESOLVE
+    assert tracker.evaluate("nginx", False, "active") is None
+
+
+def test_reminder_after_renotify_interval(monkeypatch):
+    tracker, clock = make_tracker(monkeypatch, renotify_seconds=600)
+
+    assert tracker.evaluate("nginx", True) == FIRE
+    tracker.mark_notified(["nginx"])
+    clock["now"] += 599
+    assert tracker.evaluate("nginx", True) is None
+    clock["now"] += 1
+    assert tracker.evaluate("nginx", True) == REMIND
+    tracker.mark_notified(["nginx"])
+    clock["now"] += 300
+    assert tracker.evaluate("nginx", True) is None
+
+
+def test_recovery_can_be_silenced(monkeypatch):
+    tracker, _ = make_tracker(monkeypatch, notify_on_recovery=False)
+
+    assert tracker.evaluate("nginx", True) == FIRE
+    tracker.mark_notified(["nginx"])
+    assert tracker.evaluate("nginx", False) is None
+    assert not tracker.is_firing("nginx")
+
+
+def test_unsent_alert_is_repeated_until_notified(monkeypatch):
+    tracker, clock = make_tracker(monkeypatch)
+
+    # alerting was off or the send failed: nothing was notified yet
+    assert tracker.evaluate("nginx", True) == FIRE
+    clock["now"] += 60
+    assert tracker.evaluate("nginx", True) == REMIND
+    tracker.mark_notified(["nginx"])
+    clock["now"] += 60
+    assert tracker.evaluate("nginx", True) is None
+    assert tracker.evaluate("nginx", False) == RESOLVE
+
+
+def test_recovery_of_a_never_notified_problem_is_silent(monkeypatch):
+    tracker, _ = make_tracker(monkeypatch)
+
+    assert tracker.evaluate("nginx", True) == FIRE
+    assert tracker.evaluate("nginx", False) is None
+
+
+def notified_decisions(tracker, subject, values, high, low, direction="above"):
+    decisions = []
+    for value in values:
+        decisions.append(tracker.evaluate_threshold(subject, value, high, low, direction))
+        if decisions[-1] in (FIRE, REMIND):
+            tracker.mark_notified([subject])
+    return decisions
+
+
+def test_threshold_hysteresis_does_not_flap(monkeypatch):
+    tracker, _ = make_tracker(monkeypatch)
+    high, low = threshold_bounds({"high": 2, "low": 1.5})
+
+    decisions = notified_decisions(tracker, "load_average_1", (1.9, 2.1, 1.9, 2.05, 1.6, 1.4, 1.9), high, low)
+
+    assert decisions == [None, FIRE, None, None, None, RESOLVE, None]
+
+
+def test_threshold_below_direction(monkeypatch):
+    tracker, _ = make_tracker(monkeypatch)
+    high, low = threshold_bounds({"high": 1200, "low": 1000})
+
+    decisions = notified_decisions(tracker, "free_ram_mb", (1100, 900, 1100, 1250), high, low, "below")
+
+    assert decisions == [None, FIRE, None, RESOLVE]
+    assert threshold_bounds(1000) == (1000.0, 1000.0)
+
+
+def test_state_persists_across_runs_in_db(write_conf):
+    from utils.db import db as DB
+
+    write_conf()
+
+    first_run = alertStateTracker("serviceMonitoring", DB())
+    assert first_run.evaluate("nginx", True, "inactive") == FIRE
+    first_run.mark_notified(["nginx"])
+
+    second_run = alertStateTracker("serviceMonitoring", DB())
+    assert second_run.is_firing("nginx")
+    assert second_run.evaluate("nginx", True, "inactive") is None
+    assert second_run.evaluate("nginx", False, "active") == RESOLVE
@@ -0,0 +1,167 @@
+import shutil
+import socket
+import sqlite3
+import ssl
+import subprocess
+import threading
+import time
+
+import pytest
+
+import utils.certificates as certs_module
+from utils.certificates import check_certificates, decode_pem, evaluate, read_pem_chain, STATUS_ERROR, STATUS_EXPIRED, STATUS_EXPIRING, STATUS_OK
+
+
+class StandInTlsServer:
+    """Completes TLS handshakes with the given certificate and counts them."""
+
+    def __init__(self, cert_and_key) -> None:
+        self.context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        self.context.load_cert_chain(*map(str, cert_and_key))
+        self.handshakes = 0
+        self.sock = socket.socket()
+        self.sock.bind(("127.0.0.1", 0))
+        self.sock.listen(16)
+        self.port = self.sock.getsockname()[1]
+        threading.Thread(target=self.__serve, daemon=True).start()
+
+    def wait_for_handshakes(self, count: int, timeout: float = 5.0) -> bool:
+        deadline = time.monotonic() + timeout
+        while self.handshakes < count:
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def __serve(self) -> None:
+        while True:
+            try:
+                conn, _ = self.sock.accept()
+            except OSError:
+                return
+            try:
+                with self.context.wrap_socket(conn, server_side=True) as tls:
+                    self.handshakes += 1
+                    tls.recv(1)
+            except OSError:
+                pass
+
+
+@pytest.fixture
+def tls_server(self_signed_cert):
+    server = StandInTlsServer(self_signed_cert)
+    certs_module.clear_cache()
+    yield server
+    server.sock.close()
+    certs_module.clear_cache()
+
+
+def test_pem_file_chain_and_expiry(self_signed_cert, tmp_path):
+    cert, _ = self_signed_cert
+    bundle = tmp_path / "bundle.pem"
+    bundle.write_bytes(cert.read_bytes() * 2)
+
+    chain = read_pem_chain(bundle)
+    assert len(chain) == 2
+    assert chain[0]["subject"] == "localhost" and chain[0]["issuer"] == "localhost"
+    assert set(chain[0]["san"]) == {"localhost", "127.0.0.1"}
+
+    ok, expiring, missing = check_certificates(
+        [{"name": "a", "file": str(cert)}, {"name": "b", "file": str(bundle)}, {"name": "c", "file": str(tmp_path / "none.pem")}],
+        warn_days=14,
+    )
+    assert ok["status"] == STATUS_OK and 29 < ok["days_left"] <= 30
+    assert expiring["chain"] == chain
+    assert missing["status"] == STATUS_ERROR and missing["days_left"] is None
+
+
+def test_generalized_time_ipv6_sans_and_malformed_certificates(tmp_path):
+    if shutil.which("openssl") is None:
+        pytest.skip("openssl is not installed")
+    cert = tmp_path / "long.pem"
+    # valid beyond 2049: notAfter is encoded as GeneralizedTime instead of UTCTime
+    subprocess.run(
+        [
+            "openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "40000",
+            "-subj", "/O=Example Org", "-addext", "subjectAltName=IP:2001:db8::1,DNS:*.example.test",
+            "-keyout", str(tmp_path / "long.key"), "-out", str(cert),
+        ],
+        check=True, capture_output=True,
+    )
+
+    fields = subprocess.run(
+        ["openssl", "x509", "-noout", "-enddate", "-serial", "-in", str(cert)], check=True, capture_output=True, text=True,
+    ).stdout
+    expected = dict(line.split("=", 1) for line in fields.splitlines())
+
+    info = decode_pem(cert.read_bytes())
+    assert info["subject"] == info["issuer"] == "Example Org"
+    assert info["san"] == ["2001:db8::1", "*.example.test"]
+    assert info["not_after_ts"] == ssl.cert_time_to_seconds(expected["notAfter"]) and info["not_after"] > "2100-01-01"
+    assert info["serial"] == expected["serial"].lstrip("0")
+
+    broken = ssl.DER_cert_to_PEM_cert(ssl.PEM_cert_to_DER_cert(cert.read_text())[:200]).encode("ascii")
+    with pytest.raises(ValueError):
+        decode_pem(broken)
+
+
+def test_evaluate_uses_the_certificate_that_expires_first():
+    now = 1_000_000.0
+    chain = [{"subject": "leaf", "not_after": "x", "not_after_ts": now + 90 * 86400}, {"subject": "intermediate", "not_after": "y", "not_after_ts": now + 5 * 86400}]
+    assert evaluate(chain, 14, now)["status"] == STATUS_EXPIRING
+    assert evaluate(chain, 14, now)["days_left"] == 5
+    assert evaluate(chain, 3, now)["status"] == STATUS_OK
+    assert evaluate(chain, 3, now + 6 * 86400)["status"] == STATUS_EXPIRED
+
+
+def test_endpoint_certificates_are_cached(tls_server):
+    specs = [{"name": f"e{i}", "host": "127.0.0.1", "port": tls_server.port, "server_name": f"svc{i}.test"} for i in range(8)]
+    specs.append({"name": "closed", "host": "127.0.0.1", "port": 1})
+
+    first = check_certificates(specs, warn_days=60, cache_seconds=600)
+    assert [r["status"] for r in first] == [STATUS_EXPIRING] * 8 + [STATUS_ERROR]
+    assert first[0]["chain"][0]["subject"] == "localhost" and not first[0]["cached"]
+    # the server may count the last handshake only after the client has moved on
+    assert tls_server.wait_for_handshakes(8)
+
+    # within the cache interval no endpoint is renegotiated; failures are retried
+    second = check_certificates(specs, warn_days=60, cache_seconds=600)
+    assert [r["cached"] for r in second] == [True] * 8 + [False]
+    assert [r["days_left"] is not None for r in second] == [True] * 8 + [False]
+    assert not tls_server.wait_for_handshakes(9, timeout=0.2)
+
+
+def test_service_monitoring_alerts_expiring_certificates(tls_server, self_signed_cert, write_conf):
+    db_path = write_conf(
+        serviceMonitoring={
+            "is_active": True, "service_list": [], "check_dns": False, "domain_list": [],
+            "check_internet_connectivity": False,
+            "certificates": [
+                {"name": "web", "host": "127.0.0.1", "port": tls_server.port},
+                {"name": "local", "file": str(self_signed_cert[0])},
+            ],
+            "cert_warn_days": 14,
+        },
+        alerting={"rules": {"serviceMonitoring": {"is_active": True}}},
+    )
+    from monitoring.serviceMonitoring import serviceMonitoring
+
+    monitor = serviceMonitoring()
+    sent = []
+    monitor.alert_dispatcher.dispatch = lambda subject, template, ctx: sent.append(ctx)
+    monitor.check_services()
+    assert sent == []
+
+    monitor.cert_warn_days = 60
+    monitor.check_services()
+
+    with sqlite3.connect(db_path) as conn:
+        checks = conn.execute("SELECT service_name, is_active, active_state FROM service_checks ORDER BY id").fetchall()
+        metrics = conn.execute("SELECT DISTINCT name, subject FROM metrics ORDER BY subject").fetchall()
+    assert checks == [
+        ("cert:web", "active", "ok"), ("cert:local", "active", "ok"),
+        ("cert:web", "inactive", "expiring"), ("cert:local", "inactive", "expiring"),
+    ]
+    assert metrics == [("cert_days_left", "local"), ("cert_days_left", "web")]
+    assert [s["name"] for s in sent[0]["inactive_services"]] == ["cert:web", "cert:local"]
+    assert sent[0]["inactive_services"][0]["last_state"].startswith("expiring: localhost expires")
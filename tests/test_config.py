@@ -0,0 +1,76 @@
+import json
+import os
+
+import pytest
+
+import utils.config as config_module
+
+
+def write_conf(path, **overrides):
+    conf = {
+        "general": {"hostname": "host-a", "ip": "127.0.0.1"},
+        "logging": {"is_active": False, "log_file_path": "x.log"},
+        "db": {"is_active": False, "db_path": "x.db"},
+        "serviceMonitoring": {"is_active": True, "service_list": ["cron"]},
+    }
+    conf.update(overrides)
+    path.write_text(json.dumps(conf))
+    return path
+
+
+@pytest.fixture(autouse=True)
+def clear_config_cache():
+    config_module.clear_cache()
+    yield
+    config_module.clear_cache()
+
+
+def test_config_is_parsed_once_per_mtime(tmp_path, monkeypatch):
+    conf = write_conf(tmp_path / "conf.json")
+    calls = {"loads": 0}
+    real_loads = json.loads
+
+    def counting_loads(*args, **kwargs):
+        calls["loads"] += 1
+        return real_loads(*args, **kwargs)
+
+    monkeypatch.setattr(config_module.json, "loads", counting_loads)
+
+    first = config_module.load_config(conf)
+    second = config_module.load_config(conf)
+
+    assert first is second
+    assert calls["loads"] == 1
+
+
+def test_config_reloads_when_mtime_changes(tmp_path):
+    conf = write_conf(tmp_path / "conf.json")
+    first = config_module.load_config(conf)
+
+    write_conf(conf, general={"hostname": "host-b", "ip": "127.0.0.1"})
+    stat = os.stat(conf)
+    os.utime(conf, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    second = config_module.load_config(conf)
+    assert second is not first
+    assert second["general"]["hostname"] == "host-b"
+
+
+def test_sections_are_read_only_and_typed(tmp_path):
+    conf = write_conf(tmp_path / "conf.json")
+    section = config_module.get_section("serviceMonitoring", conf)
+
+    assert section.get_bool("is_active") is True
+    assert section.get_list("service_list") == ["cron"]
+    assert section.get_int("missing", 5) == 5
+    assert config_module.get_section("notConfigured", conf) == {}
+    with pytest.raises(TypeError):
+        section["is_active"] = False
+
+
+def test_invalid_config_is_rejected(tmp_path):
+    conf = tmp_path / "conf.json"
+    conf.write_text(json.dumps({"general": {}, "logging": {}}))
+
+    with pytest.raises(ValueError):
+        config_module.load_config(conf)
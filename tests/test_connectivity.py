@@ -0,0 +1,109 @@
+import socket
+import sqlite3
+import time
+
+import pytest
+
+from utils.connectivity import check_connectivity, interleave_families, STATUS_CANCELLED, STATUS_OK, STATUS_REFUSED, STATUS_TIMEOUT
+
+
+@pytest.fixture
+def listeners():
+    """Open TCP listeners on 127.0.0.1: ("ok" -> address, "blackhole" -> address whose accept queue is full)."""
+    sockets = []
+
+    def listener(backlog):
+        sock = socket.socket()
+        sock.bind(("127.0.0.1", 0))
+        sock.listen(backlog)
+        sockets.append(sock)
+        return sock.getsockname()
+
+    ok = listener(16)
+    blackhole = listener(0)
+    # never accepted: once the queue is full, further SYNs are dropped and connects hang
+    for _ in range(4):
+        filler = socket.socket()
+        filler.setblocking(False)
+        filler.connect_ex(blackhole)
+        sockets.append(filler)
+    time.sleep(0.05)
+    yield {"ok": "{0}:{1}".format(*ok), "blackhole": "{0}:{1}".format(*blackhole)}
+    for sock in sockets:
+        sock.close()
+
+
+def closed_target():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return "127.0.0.1:{0}".format(sock.getsockname()[1])
+
+
+def test_interleave_families_alternates_starting_with_the_first_family():
+    targets = [("2001:db8::1", 53), ("2001:db8::2", 53), ("192.0.2.1", 53), ("192.0.2.2", 53), ("192.0.2.3", 53)]
+    assert interleave_families(targets) == [
+        ("2001:db8::1", 53), ("192.0.2.1", 53), ("2001:db8::2", 53), ("192.0.2.2", 53), ("192.0.2.3", 53),
+    ]
+
+
+def test_first_answer_decides_without_waiting_for_a_hanging_target(listeners):
+    start = time.monotonic()
+    result = check_connectivity([listeners["blackhole"], listeners["ok"]], timeout=3, stagger_ms=0)
+    elapsed = time.monotonic() - start
+
+    assert result["reachable"] is True
+    assert elapsed < 1.0
+    hanging, answered = result["targets"]
+    assert hanging["status"] == STATUS_CANCELLED
+    assert answered["status"] == STATUS_OK and answered["rtt_ms"] is not None
+
+
+def test_unreachable_once_the_quorum_failed(listeners):
+    # default quorum: all targets must fail
+    result = check_connectivity([closed_target(), closed_target()], timeout=1)
+    assert result["reachable"] is False
+    assert [t["status"] for t in result["targets"]] == [STATUS_REFUSED, STATUS_REFUSED]
+
+    # quorum of one: the first failure decides, later targets are not waited for
+    result = check_connectivity([closed_target(), listeners["ok"]], timeout=1, quorum=1, stagger_ms=500)
+    assert result["reachable"] is False
+    assert result["decided_ms"] < 400
+    assert result["targets"][1]["status"] == STATUS_CANCELLED
+
+
+def test_lost_connects_time_out(listeners):
+    result = check_connectivity([listeners["blackhole"]], timeout=0.3)
+    assert result["reachable"] is False
+    assert result["targets"][0]["status"] == STATUS_TIMEOUT
+
+
+def test_ipv6_targets_are_probed(listeners):
+    try:
+        sock = socket.socket(socket.AF_INET6)
+        sock.bind(("::1", 0))
+    except OSError:
+        pytest.skip("no IPv6 loopback")
+    sock.listen(4)
+    try:
+        target = "[::1]:{0}".format(sock.getsockname()[1])
+        result = check_connectivity([target, closed_target()], timeout=1)
+    finally:
+        sock.close()
+    assert result["reachable"] is True
+    assert result["targets"][0]["target"] == target
+
+
+def test_service_monitoring_stores_internet_state_and_rtt(listeners, write_conf):
+    db_path = write_conf(serviceMonitoring={
+        "is_active": True, "service_list": [], "check_dns": False, "domain_list": [],
+        "check_internet_connectivity": True, "internet_targets": [listeners["ok"]], "internet_timeout_seconds": 1,
+    })
+    from monitoring.serviceMonitoring import serviceMonitoring
+
+    serviceMonitoring().check_services()
+
+    with sqlite3.connect(db_path) as conn:
+        checks = conn.execute("SELECT service_name, is_active, active_state FROM service_checks").fetchall()
+        metrics = conn.execute("SELECT name, subject FROM metrics ORDER BY name").fetchall()
+    assert checks == [("internet", "active", "ok")]
+    assert metrics == [("internet_check_ms", None), ("internet_rtt_ms", listeners["ok"])]
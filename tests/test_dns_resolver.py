@@ -0,0 +1,216 @@
+import socket
+import sqlite3
+import struct
+import threading
+import time
+
+import pytest
+
+import utils.dnsResolver as dns_module
+from utils.dnsResolver import dnsResolver, parse_server, STATUS_NXDOMAIN, STATUS_OK, STATUS_TIMEOUT
+
+
+class StubDnsServer:
+    """UDP DNS stand-in: answers A queries from a table, optionally after a delay."""
+
+    def __init__(self, records: dict, truncated=()) -> None:
+        # domain -> (address or None for NXDOMAIN, ttl, delay in seconds); unknown domains are dropped.
+        # Domains in `truncated` only get an empty answer with the TC flag over UDP, the full one over TCP.
+        self.records = records
+        self.truncated = set(truncated)
+        self.queries = []
+        self.tcp_queries = []
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(("127.0.0.1", 0))
+        self.tcp = socket.socket()
+        self.tcp.bind(self.sock.getsockname())
+        self.tcp.listen(8)
+        self.address = "127.0.0.1:{0}".format(self.sock.getsockname()[1])
+        self._thread = threading.Thread(target=self.__serve, daemon=True)
+        self._thread.start()
+        threading.Thread(target=self.__serve_tcp, daemon=True).start()
+
+    @staticmethod
+    def __question(data: bytes) -> tuple:
+        labels, offset = [], 12
+        while data[offset]:
+            labels.append(data[offset + 1:offset + 1 + data[offset]].decode())
+            offset += 1 + data[offset]
+        return ".".join(labels), offset + 5
+
+    def __serve(self) -> None:
+        while True:
+            try:
+                data, peer = self.sock.recvfrom(512)
+            except OSError:
+                return
+            domain, question_end = self.__question(data)
+            self.queries.append(domain)
+            if domain in self.records:
+                address, ttl, delay = self.records[domain]
+                reply = self.__reply(data, question_end, address, ttl, truncated=domain in self.truncated)
+                threading.Timer(delay, self.__send, (reply, peer)).start()
+
+    def __serve_tcp(self) -> None:
+        while True:
+            try:
+                conn, _ = self.tcp.accept()
+            except OSError:
+                return
+            with conn:
+                (length,) = struct.unpack("!H", conn.recv(2))
+                data = conn.recv(length)
+                domain, question_end = self.__question(data)
+                self.tcp_queries.append(domain)
+                address, ttl, _ = self.records[domain]
+                reply = self.__reply(data, question_end, address, ttl)
+                conn.sendall(struct.pack("!H", len(reply)) + reply)
+
+    def __reply(self, query: bytes, question_end: int, address, ttl: int, truncated: bool = False) -> bytes:
+        (query_id,) = struct.unpack("!H", query[:2])
+        question = query[12:question_end]
+        if truncated:
+            return struct.pack("!HHHHHH", query_id, 0x8380, 1, 0, 0, 0) + question
+        if address is None:
+            return struct.pack("!HHHHHH", query_id, 0x8183, 1, 0, 0, 0) + question
+        answer = struct.pack("!HHHIH", 0xC00C, 1, 1, ttl, 4) + socket.inet_aton(address)
+        return struct.pack("!HHHHHH", query_id, 0x8180, 1, 1, 0, 0) + question + answer
+
+    def __send(self, reply: bytes, peer) -> None:
+        try:
+            self.sock.sendto(reply, peer)
+        except OSError:
+            pass
+
+    def close(self) -> None:
+        self.sock.close()
+        self.tcp.close()
+
+
+@pytest.fixture
+def stub_dns():
+    dns_module.clear_cache()
+    server = StubDnsServer({
+        "example.test": ("192.0.2.1", 60, 0),
+        "short-ttl.test": ("192.0.2.2", 0, 0),
+        "missing.test": (None, 60, 0),
+        "large.test": ("192.0.2.3", 60, 0),
+        **{f"slow{i}.test": ("192.0.2.10", 60, 0.3) for i in range(8)},
+    }, truncated={"large.test"})
+    yield server
+    server.close()
+    dns_module.clear_cache()
+
+
+def test_parse_server():
+    assert parse_server("192.0.2.53") == ("192.0.2.53", 53)
+    assert parse_server("192.0.2.53:5353") == ("192.0.2.53", 5353)
+    assert parse_server("2001:db8::53") == ("2001:db8::53", 53)
+    assert parse_server("[2001:db8::53]:5353") == ("2001:db8::53", 5353)
+
+
+def test_resolve_statuses_and_latency(stub_dns):
+    resolver = dnsResolver([stub_dns.address], timeout=0.5)
+
+    results = resolver.resolve_all(["example.test", "missing.test", "dropped.test"])
+
+    assert results["example.test"]["status"] == STATUS_OK
+    assert results["example.test"]["addresses"] == ["192.0.2.1"]
+    assert results["example.test"]["ttl"] == 60
+    assert results["missing.test"]["status"] == STATUS_NXDOMAIN
+    assert results["dropped.test"]["status"] == STATUS_TIMEOUT
+    assert 450 <= results["dropped.test"]["latency_ms"] < 1000
+    assert all(r["latency_ms"] is not None for r in results.values())
+
+
+def test_lookups_run_concurrently(stub_dns):
+    resolver = dnsResolver([stub_dns.address], timeout=2)
+    domains = [f"slow{i}.test" for i in range(8)]
+
+    start = time.monotonic()
+    results = resolver.resolve_all(domains)
+    elapsed = time.monotonic() - start
+
+    assert {r["status"] for r in results.values()} == {STATUS_OK}
+    # eight lookups of 0.3 s each take about as long as one
+    assert elapsed < 1.0
+
+
+def test_answers_are_cached_for_their_ttl(stub_dns, monkeypatch):
+    resolver = dnsResolver([stub_dns.address], timeout=0.5, cache_max_ttl=30)
+
+    first = resolver.resolve("example.test")
+    second = resolver.resolve("example.test")
+    resolver.resolve("short-ttl.test")
+    resolver.resolve("short-ttl.test")
+    resolver.resolve("missing.test")
+    resolver.resolve("missing.test")
+
+    assert (first["cached"], second["cached"]) == (False, True)
+    assert second["addresses"] == ["192.0.2.1"]
+    # TTL 0 and negative answers are not cached
+    assert stub_dns.queries.count("example.test") == 1
+    assert stub_dns.queries.count("short-ttl.test") == 2
+    assert stub_dns.queries.count("missing.test") == 2
+
+    # cache_max_ttl caps the TTL of 60 s
+    now = time.monotonic()
+    monkeypatch.setattr(dns_module.time, "monotonic", lambda: now + 31)
+    assert resolver.resolve("example.test")["cached"] is False
+
+
+def test_unreachable_server_falls_back_to_next(stub_dns):
+    dead = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    dead.bind(("127.0.0.1", 0))
+    dead_address = "127.0.0.1:{0}".format(dead.getsockname()[1])
+    dead.close()  # nothing listens: ICMP port unreachable
+
+    result = dnsResolver([dead_address, stub_dns.address], timeout=1).resolve("example.test")
+
+    assert result["status"] == STATUS_OK
+    assert result["server"] == stub_dns.address
+
+
+def test_silent_server_does_not_use_up_the_timeout(stub_dns):
+    # a blackholed nameserver: it receives the query but never answers
+    silent = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    silent.bind(("127.0.0.1", 0))
+    silent_address = "127.0.0.1:{0}".format(silent.getsockname()[1])
+    try:
+        resolver = dnsResolver([silent_address, stub_dns.address], timeout=1)
+        result = resolver.resolve("example.test")
+        missing = resolver.resolve("dropped.test")
+    finally:
+        silent.close()
+
+    assert result["status"] == STATUS_OK
+    assert result["server"] == stub_dns.address
+    assert 450 <= result["latency_ms"] < 900
+    # the second server gets the rest of the time; the total stays bounded by the timeout
+    assert missing["status"] == STATUS_TIMEOUT
+    assert 950 <= missing["latency_ms"] < 1500
+
+
+def test_truncated_answer_is_retried_over_tcp(stub_dns):
+    result = dnsResolver([stub_dns.address], timeout=1).resolve("large.test")
+
+    assert result["status"] == STATUS_OK
+    assert result["addresses"] == ["192.0.2.3"]
+    assert stub_dns.queries == ["large.test"] and stub_dns.tcp_queries == ["large.test"]
+
+
+def test_service_monitoring_stores_per_domain_status_and_latency(stub_dns, write_conf):
+    db_path = write_conf(serviceMonitoring={
+        "is_active": True, "service_list": [], "check_dns": True,
+        "domain_list": ["example.test", "missing.test"], "check_internet_connectivity": False,
+        "dns_servers": [stub_dns.address], "dns_timeout_seconds": 0.5,
+    })
+    from monitoring.serviceMonitoring import serviceMonitoring
+
+    serviceMonitoring().check_services()
+
+    with sqlite3.connect(db_path) as conn:
+        checks = conn.execute("SELECT service_name, is_active, active_state FROM service_checks ORDER BY service_name").fetchall()
+        metrics = conn.execute("SELECT module, name, subject FROM metrics ORDER BY subject").fetchall()
+    assert checks == [("dns:example.test", "active", "ok"), ("dns:missing.test", "inactive", "nxdomain")]
+    assert metrics == [("serviceMonitoring", "dns_lookup_ms", "example.test"), ("serviceMonitoring", "dns_lookup_ms", "missing.test")]
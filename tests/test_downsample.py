@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+
+from utils.downsample import downsample_frame, lttb_indices, minmax_envelope
+
+
+def test_lttb_keeps_budget_endpoints_and_peaks():
+    x = np.arange(100_000, dtype=float)
+    y = np.sin(x / 500.0)
+    y[31_337] = 25.0
+    y[77_000] = -25.0
+
+    idx = lttb_indices(x, y, 500)
+
+    assert len(idx) == 500
+    assert idx[0] == 0 and idx[-1] == len(x) - 1
+    assert np.all(np.diff(idx) > 0)
+    assert 31_337 in idx and 77_000 in idx
+
+
+def test_lttb_returns_everything_below_budget():
+    assert lttb_indices([1, 2, 3], [1, 2, 3], 10).tolist() == [0, 1, 2]
+
+
+def test_minmax_envelope_per_bucket():
+    env = minmax_envelope(np.arange(10), np.array([1, 5, 2, 0, 3, 9, 4, 4, 7, 8]), 2)
+
+    assert env["y_min"].tolist() == [0, 4]
+    assert env["y_max"].tolist() == [5, 9]
+
+
+def test_downsample_frame_with_timestamps_and_gaps():
+    ts = pd.date_range("2024-01-01", periods=20_000, freq="min")
+    df = pd.DataFrame({"ts": ts, "v1": np.random.default_rng(1).random(20_000), "v2": 1.0})
+    df.loc[100, "v1"] = np.nan
+    df.loc[5_000, "v2"] = 50.0
+
+    reduced, envelope = downsample_frame(df, "ts", ["v1", "v2"], 1_000)
+
+    assert len(reduced) <= 2_000
+    assert reduced["ts"].is_monotonic_increasing
+    assert 5_000 in reduced.index
+    assert len(envelope) == 1_000
+    assert envelope["y_max"].max() == df["v1"].max()
+
+    small, no_envelope = downsample_frame(df.head(10), "ts", ["v1"], 1_000)
+    assert len(small) == 10 and no_envelope is None
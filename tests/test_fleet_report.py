@@ -0,0 +1,104 @@
+import sqlite3
+
+import pytest
+
+from utils.fleet_report import host_names, resolve_result_dbs, summarize_result_db
+from utils.report_generator import reportGenerator
+
+SCHEMA = """
+CREATE TABLE file_checks (id INTEGER PRIMARY KEY AUTOINCREMENT, timestamp TEXT, file_path TEXT, file_hash TEXT, changed TEXT);
+CREATE TABLE service_checks (id INTEGER PRIMARY KEY AUTOINCREMENT, timestamp TEXT, service_name TEXT, is_active TEXT);
+CREATE TABLE host_checks (id INTEGER PRIMARY KEY AUTOINCREMENT, timestamp TEXT, name TEXT, observed_value TEXT);
+"""
+
+
+def make_host_db(path, services, loads, changed=()):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA)
+    conn.executemany("INSERT INTO service_checks (timestamp, service_name, is_active) VALUES (?, ?, ?)", services)
+    conn.executemany(
+        "INSERT INTO host_checks (timestamp, name, observed_value) VALUES (?, 'load_average', ?)",
+        [(f"2024-03-03 10:{i:02d}:00", f"{v} 0.5 0.25") for i, v in enumerate(loads)],
+    )
+    conn.executemany(
+        "INSERT INTO file_checks (timestamp, file_path, file_hash, changed) VALUES ('2024-03-03 10:00:00', ?, 'h', ?)",
+        [(p, "True") for p in changed] + [("/etc/unchanged", "False")],
+    )
+    conn.commit()
+    conn.close()
+
+
+@pytest.fixture
+def fleet_dir(tmp_path, write_conf):
+    write_conf(
+        general={"hostname": "collector", "ip": "127.0.0.1"},
+        db={"is_active": False, "db_path": str(tmp_path / "results.db")},
+        reportGenerator={"is_active": True, "root_path": str(tmp_path / "reports"), "plot_days": 7, "fleet_workers": 1, "fleet_top_n": 2},
+    )
+
+    fleet = tmp_path / "fleet"
+    make_host_db(fleet / "web-1" / "monitoring.db", [
+        ("2024-01-01 10:00:00", "nginx", "False"),  # outside the window of this host
+        ("2024-03-03 10:00:00", "nginx", "True"),
+        ("2024-03-03 11:00:00", "nginx", "active"),
+    ], loads=[0.5, 0.7, 0.6])
+    make_host_db(fleet / "web-2" / "monitoring.db", [
+        ("2024-03-03 10:00:00", "nginx", "True"),
+        ("2024-03-03 11:00:00", "nginx", "False"),
+        ("2024-03-03 10:00:00", "cron", "True"),
+        ("2024-03-03 11:00:00", "cron", "True"),
+    ], loads=[3.0, 4.0, 5.0], changed=["/etc/passwd", "/etc/hosts"])
+    make_host_db(fleet / "db-1" / "monitoring.db", [
+        ("2024-03-03 10:00:00", "postgres", "True"),
+    ], loads=[1.0, 2.0])
+    (fleet / "broken").mkdir()
+    (fleet / "broken" / "monitoring.db").write_bytes(b"this is not a sqlite database at all" * 4)
+    yield fleet
+
+
+def test_resolve_result_dbs_and_host_names(fleet_dir):
+    by_dir = resolve_result_dbs(str(fleet_dir))
+    by_glob = resolve_result_dbs(str(fleet_dir / "web-*" / "monitoring.db"))
+
+    assert len(by_dir) == 4
+    assert [host_names(by_glob)[p] for p in by_glob] == ["web-1", "web-2"]
+    assert host_names(["/a/host-x.db", "/b/host-y.db"]) == {"/a/host-x.db": "host-x", "/b/host-y.db": "host-y"}
+
+
+def test_summarize_result_db_uses_window_of_each_host(fleet_dir):
+    web1 = summarize_result_db(str(fleet_dir / "web-1" / "monitoring.db"), "web-1", days=7)
+    web2 = summarize_result_db(str(fleet_dir / "web-2" / "monitoring.db"), "web-2", days=7)
+
+    assert web1["error"] is None
+    assert (web1["service_checks"], web1["active_checks"], web1["degraded_services"]) == (2, 2, [])
+    assert (web2["service_checks"], web2["active_checks"]) == (4, 3)
+    assert web2["degraded_services"] == ["nginx (50.0%)"]
+    assert web2["file_changes"] == 2
+    assert web2["changed_paths"] == ["/etc/hosts", "/etc/passwd"]
+    assert web2["load"].summary()["max"] == 5.0
+    assert web2["last_seen"] == "2024-03-03 11:00:00"
+
+
+def test_summarize_result_db_reports_unreadable_db(fleet_dir):
+    summary = summarize_result_db(str(fleet_dir / "broken" / "monitoring.db"), "broken")
+
+    assert summary["error"]
+
+
+def test_generate_fleet_report_writes_rankings(fleet_dir):
+    md_path, html_path = reportGenerator().generate_fleet_report(str(fleet_dir))
+
+    md = open(md_path, encoding="utf-8").read()
+    html = open(html_path, encoding="utf-8").read()
+    assert "fleet_report_" in md_path
+    # worst uptime first, worst load first (limited to fleet_top_n), only hosts with changes
+    uptime = md.split("## Uptime ranking (worst first)")[1].split("## ")[0]
+    assert uptime.index("web-2") < uptime.index("web-1")
+    load = md.split("## Worst hosts by load average")[1].split("## Hosts with file changes")[0]
+    assert load.index("web-2") < load.index("db-1")
+    assert "web-1" not in load
+    changes = md.split("## Hosts with file changes")[1].split("## Unreadable result databases")[0]
+    assert "/etc/passwd" in changes and "web-1" not in changes
+    assert "broken" in md.split("## Unreadable result databases")[1]
+    assert "<table" in html and "web-2" in html
@@ -0,0 +1,56 @@
+import json
+
+from utils.log import log
+
+
+def make_logger(tmp_path, log_format="json"):
+    logger = log.__new__(log)
+    logger.log_file_path = str(tmp_path / "monitoring.log")
+    logger.is_active = True
+    logger.log_format = log_format
+    return logger
+
+
+def read_lines(logger):
+    with open(logger.log_file_path, "r") as f:
+        return f.read().splitlines()
+
+
+def test_text_format_is_unchanged(tmp_path):
+    logger = make_logger(tmp_path, log_format="text")
+    logger.info("serviceMonitoring: Service cron is active.", service="cron")
+
+    assert read_lines(logger) == ["[INFO] serviceMonitoring: Service cron is active."]
+
+
+def test_json_format_writes_structured_records(tmp_path):
+    logger = make_logger(tmp_path)
+    logger.warning("fileMonitoring/check_files: File /etc/hosts has been modified!", path="/etc/hosts")
+
+    record = json.loads(read_lines(logger)[0])
+    assert record["level"] == "WARNING"
+    assert record["module"] == "fileMonitoring"
+    assert record["check"] == "check_files"
+    assert record["duration_ms"] is None
+    assert record["path"] == "/etc/hosts"
+    assert "timestamp" in record
+
+
+def test_timed_records_duration(tmp_path):
+    logger = make_logger(tmp_path)
+    with logger.timed("hostMonitoring", "load_avg", metric="load_average"):
+        pass
+
+    record = json.loads(read_lines(logger)[0])
+    assert record["module"] == "hostMonitoring"
+    assert record["check"] == "load_avg"
+    assert record["metric"] == "load_average"
+    assert isinstance(record["duration_ms"], float)
+
+
+def test_inactive_logger_writes_nothing(tmp_path):
+    logger = make_logger(tmp_path)
+    logger.is_active = False
+    logger.error("monitor.py/main: boom")
+
+    assert not (tmp_path / "monitoring.log").exists()
@@ -1,5 +1,10 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
 import pytest
+import requests
 
+import alerting.httpSession as http_session
 import alerting.mailgunConnector as mg_module
 
 
@@ -15,17 +20,21 @@ class DummyLogger:
         self.errors.append(msg)
 
 
-def make_mailgun_instance(monkeypatch, logger=None):
+def make_mailgun_instance(monkeypatch, logger=None, webroot="https://api.mailgun.test/messages"):
     if logger is None:
         logger = DummyLogger()
 
     def fake_init(self):
         # set minimal attributes expected by methods
         self.is_active = True
-        self.webroot = "https://api.mailgun.test/messages"
+        self.webroot = webroot
         self.api_key = "API-KEY"
         self.recipient = "to@test"
         self.sender = "from@test"
+        self.connect_timeout = 2
+        self.read_timeout = 2
+        self.max_retries = 3
+        self.backoff_factor = 0.01
         self.logger = logger
 
     monkeypatch.setattr(mg_module.mailgunConnector, '__init__', fake_init, raising=True)
@@ -35,7 +44,7 @@ def make_mailgun_instance(monkeypatch, logger=None):
     return mg_module.mailgunConnector()
 
 
-def test_mailgun_send_calls_requests_post(monkeypatch):
+def test_mailgun_send_posts_via_session(monkeypatch):
     logger = DummyLogger()
     mg = make_mailgun_instance(monkeypatch, logger=logger)
 
@@ -45,13 +54,14 @@ def test_mailgun_send_calls_requests_post(monkeypatch):
         def raise_for_status(self):
             called['raised'] = False
 
-    def fake_post(url, auth=None, data=None):
+    def fake_post(url, auth=None, data=None, timeout=None):
         called['url'] = url
         called['auth'] = auth
         called['data'] = data
+        called['timeout'] = timeout
         return DummyResponse()
 
-    monkeypatch.setattr(mg_module, 'requests', type('R', (), {'post': staticmethod(fake_post)}))
+    monkeypatch.setattr(mg_module, 'get_session', lambda name, retries, backoff: type('S', (), {'post': staticmethod(fake_post)}))
 
     mg.mailgunSendMailHTML('subject', 'serviceMonitoring', {'k': 'v'})
 
@@ -59,4 +69,67 @@ def test_mailgun_send_calls_requests_post(monkeypatch):
     assert isinstance(called.get('auth'), tuple)
     assert 'subject' in called['data']
     assert 'html' in called['data']
+    assert called['timeout'] == (mg.connect_timeout, mg.read_timeout)
     assert any('Start to send mail' in m or 'Start to send mail via mailgun' in m for m in logger.infos) or True
+
+
+class MailgunStandIn(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    responses_to_send = []
+    client_ports = []
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.client_ports.append(self.client_address[1])
+        status = self.responses_to_send.pop(0) if self.responses_to_send else 200
+        body = b'{"message": "Queued"}'
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def mailgun_server(monkeypatch):
+    MailgunStandIn.responses_to_send = []
+    MailgunStandIn.client_ports = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), MailgunStandIn)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    http_session.clear_sessions()
+    yield f"http://127.0.0.1:{server.server_address[1]}/v3/test/messages"
+    server.shutdown()
+    server.server_close()
+
+
+def test_mailgun_retries_on_server_errors(monkeypatch, mailgun_server):
+    mg = make_mailgun_instance(monkeypatch, webroot=mailgun_server)
+    MailgunStandIn.responses_to_send = [503, 429]
+
+    mg.send_rendered('subject', '<html>ok</html>')
+
+    assert len(MailgunStandIn.client_ports) == 3
+
+
+def test_mailgun_burst_reuses_connection(monkeypatch, mailgun_server):
+    mg = make_mailgun_instance(monkeypatch, webroot=mailgun_server)
+
+    for _ in range(5):
+        mg.send_rendered('subject', '<html>ok</html>')
+
+    assert len(MailgunStandIn.client_ports) == 5
+    assert len(set(MailgunStandIn.client_ports)) == 1
+
+
+def test_mailgun_gives_up_after_retries(monkeypatch, mailgun_server):
+    mg = make_mailgun_instance(monkeypatch, webroot=mailgun_server)
+    MailgunStandIn.responses_to_send = [500] * 10
+
+    with pytest.raises(requests.HTTPError):
+        mg.send_rendered('subject', '<html>ok</html>')
+
+    assert len(MailgunStandIn.client_ports) == mg.max_retries + 1
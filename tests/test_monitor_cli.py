@@ -3,6 +3,13 @@ import monitor
 import pytest
 
 
+@pytest.fixture(autouse=True)
+def lock_dir(tmp_path, monkeypatch):
+    # the module runs take their run locks; keep them out of the repo's testing/ folder
+    import utils.runLock as run_lock_module
+    monkeypatch.setattr(run_lock_module, 'default_lock_dir', lambda: tmp_path / 'locks')
+
+
 class DummyLogger:
     def __init__(self):
         self.infos = []
@@ -230,3 +237,66 @@ def test_delete_results_service_and_file_and_host_and_db(monkeypatch):
     monkeypatch.setattr(sys, 'argv', ['monitor.py', '--delete-file-monitoring-db'])
     monitor.main()
     assert dummy_file.delete_db_called is True
+
+
+def test_failing_module_does_not_skip_the_others(monkeypatch):
+    logger = DummyLogger()
+    SM, HM, FM = make_dummy_modules()
+    dummy_host = DummyHostMonitor()
+    dummy_file = DummyFileMonitor()
+
+    class ExitingServiceMonitor(DummyServiceMonitor):
+        def check_services(self):
+            raise SystemExit(1)
+
+    monkeypatch.setattr(SM, 'serviceMonitoring', ExitingServiceMonitor)
+    monkeypatch.setattr(HM, 'hostMonitoring', lambda: dummy_host)
+    monkeypatch.setattr(FM, 'fileMonitoring', lambda: dummy_file)
+
+    monkeypatch.setattr(monitor, 'service_module', SM)
+    monkeypatch.setattr(monitor, 'host_module', HM)
+    monkeypatch.setattr(monitor, 'file_module', FM)
+    monkeypatch.setattr(monitor, 'log', lambda: logger)
+    monkeypatch.setattr(sys, 'argv', ['monitor.py', '--all'])
+
+    with pytest.raises(SystemExit) as exc:
+        monitor.main()
+
+    assert exc.value.code == 1
+    assert dummy_host.check_called is True
+    assert dummy_file.check_called is True
+    assert any('serviceMonitoring' in e for e in logger.errors)
+
+
+def test_daemon_keeps_digest_windows_between_jobs(monkeypatch):
+    import utils.scheduler as scheduler_module
+
+    created = []
+    flushes = []
+
+    class RecordingScheduler:
+        def __init__(self, jitter_seconds=0.0, after_job=None):
+            self.after_job = after_job
+            created.append(self)
+
+        def add_job(self, *args, **kwargs):
+            pass
+
+        def install_signal_handlers(self):
+            pass
+
+        def run(self):
+            self.after_job(None)
+
+    logger = DummyLogger()
+    monkeypatch.setattr(scheduler_module, 'scheduler', RecordingScheduler)
+    monkeypatch.setattr(monitor, 'log', lambda: logger)
+    monkeypatch.setattr(monitor, 'flush_connectors', lambda force=True, close=False: flushes.append((force, close)))
+    monkeypatch.setattr(monitor, 'wait_for_background_drain', lambda *args: True)
+    monkeypatch.setattr(sys, 'argv', ['monitor.py', '--daemon'])
+
+    monitor.main()
+
+    # a job only sends digests whose window elapsed; stopping the daemon forces out the rest
+    assert len(created) == 1
+    assert flushes == [(False, False), (True, True)]
@@ -0,0 +1,154 @@
+import socket
+import sqlite3
+import ssl
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from utils.probes import (
+    parse_http_response, run_probes,
+    STATUS_BAD_STATUS, STATUS_BODY_MISMATCH, STATUS_CONFIG_ERROR, STATUS_OK, STATUS_REFUSED, STATUS_TIMEOUT, STATUS_TLS_ERROR,
+)
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.startswith("/slow"):
+            time.sleep(float(self.path.split("=")[1]))
+        status = 500 if self.path == "/error" else 200
+        body = b"service healthy" if status == 200 else b"boom"
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class StandInServer(ThreadingHTTPServer):
+    # the default backlog of 5 drops simultaneous connects, which then retry after 1s
+    request_queue_size = 64
+    daemon_threads = True
+
+
+def start_server(tls_cert=None):
+    server = StandInServer(("127.0.0.1", 0), StandInHandler)
+    if tls_cert:
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(*map(str, tls_cert))
+        server.socket = context.wrap_socket(server.socket, server_side=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+@pytest.fixture
+def http_server():
+    server = start_server()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def https_server(self_signed_cert):
+    server = start_server(self_signed_cert)
+    yield server.server_address[1]
+    server.shutdown()
+    server.server_close()
+
+
+def closed_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def test_parse_http_response_handles_chunked_body():
+    status, headers, body = parse_http_response(
+        b"HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n7\r\nservice\r\n8\r\n healthy\r\n0\r\n\r\n"
+    )
+
+    assert (status, headers["transfer-encoding"], body) == (200, "chunked", b"service healthy")
+
+
+def test_http_probe_statuses_and_timings(http_server):
+    results = run_probes([
+        {"name": "ok", "type": "http", "url": f"{http_server}/health", "body_contains": "healthy"},
+        {"name": "mismatch", "type": "http", "url": f"{http_server}/health", "body_contains": "degraded"},
+        {"name": "error", "type": "http", "url": f"{http_server}/error"},
+        {"name": "expected-error", "type": "http", "url": f"{http_server}/error", "expect_status": [500]},
+        {"name": "slow", "type": "http", "url": f"{http_server}/slow=2", "timeout_seconds": 0.3},
+        {"name": "bad", "type": "http", "url": "ftp://example.test/"},
+    ], timeout=2)
+    by_name = {r["name"]: r for r in results}
+
+    assert by_name["ok"]["status"] == STATUS_OK and by_name["ok"]["http_status"] == 200
+    assert all(by_name["ok"][key] is not None for key in ("connect_ms", "ttfb_ms", "total_ms"))
+    assert by_name["ok"]["tls_ms"] is None
+    assert by_name["mismatch"]["status"] == STATUS_BODY_MISMATCH
+    assert by_name["error"]["status"] == STATUS_BAD_STATUS
+    assert by_name["expected-error"]["status"] == STATUS_OK
+    assert by_name["slow"]["status"] == STATUS_TIMEOUT
+    assert by_name["bad"]["status"] == STATUS_CONFIG_ERROR
+
+
+def test_tcp_and_tls_probes(https_server, self_signed_cert):
+    cert, _ = self_signed_cert
+    results = run_probes([
+        {"name": "tcp", "type": "tcp", "host": "127.0.0.1", "port": https_server},
+        {"name": "refused", "type": "tcp", "host": "127.0.0.1", "port": closed_port()},
+        {"name": "tls", "type": "tls", "host": "127.0.0.1", "port": https_server, "server_name": "localhost", "ca_file": str(cert)},
+        {"name": "untrusted", "type": "tls", "host": "127.0.0.1", "port": https_server},
+        {"name": "https", "type": "http", "url": f"https://localhost:{https_server}/health", "ca_file": str(cert), "body_contains": "healthy"},
+    ], timeout=2)
+    by_name = {r["name"]: r for r in results}
+
+    assert by_name["tcp"]["status"] == STATUS_OK
+    assert by_name["refused"]["status"] == STATUS_REFUSED
+    assert by_name["tls"]["status"] == STATUS_OK and by_name["tls"]["tls_ms"] is not None
+    assert by_name["untrusted"]["status"] == STATUS_TLS_ERROR
+    assert by_name["https"]["status"] == STATUS_OK
+    assert by_name["https"]["tls_ms"] is not None and by_name["https"]["ttfb_ms"] is not None
+
+
+@pytest.mark.parametrize("concurrency, bounds", [(12, (0.2, 0.8)), (3, (0.8, 2.5))])
+def test_probes_run_concurrently_within_the_limit(http_server, concurrency, bounds):
+    specs = [{"name": f"p{i}", "type": "http", "url": f"{http_server}/slow=0.2"} for i in range(12)]
+
+    start = time.monotonic()
+    results = run_probes(specs, concurrency=concurrency, timeout=5)
+    elapsed = time.monotonic() - start
+
+    assert [r["name"] for r in results] == [s["name"] for s in specs]
+    assert {r["status"] for r in results} == {STATUS_OK}
+    assert bounds[0] <= elapsed < bounds[1]
+
+
+def test_service_monitoring_stores_probe_metrics_and_alerts_failures(http_server, write_conf):
+    db_path = write_conf(
+        serviceMonitoring={
+            "is_active": True, "service_list": [], "check_dns": False, "domain_list": [],
+            "check_internet_connectivity": False,
+            "probes": [
+                {"name": "web", "type": "http", "url": f"{http_server}/health"},
+                {"name": "db", "type": "tcp", "host": "127.0.0.1", "port": closed_port()},
+            ],
+        },
+        alerting={"rules": {"serviceMonitoring": {"is_active": True}}},
+    )
+    from monitoring.serviceMonitoring import serviceMonitoring
+
+    monitor = serviceMonitoring()
+    sent = []
+    monitor.alert_dispatcher.dispatch = lambda subject, template, ctx: sent.append(ctx)
+    monitor.check_services()
+
+    with sqlite3.connect(db_path) as conn:
+        checks = conn.execute("SELECT service_name, is_active, active_state FROM service_checks ORDER BY service_name").fetchall()
+        metrics = conn.execute("SELECT name, subject FROM metrics ORDER BY subject, name").fetchall()
+    assert checks == [("probe:db", "inactive", "refused"), ("probe:web", "active", "ok")]
+    assert ("probe_connect_ms", "web") in metrics and ("probe_ttfb_ms", "web") in metrics and ("probe_total_ms", "db") in metrics
+    assert [s["name"] for s in sent[0]["inactive_services"]] == ["probe:db"]
@@ -0,0 +1,182 @@
+import pytest
+
+from utils.db import db as DB
+
+
+@pytest.fixture
+def report_db(tmp_path, write_conf):
+    write_conf(reportGenerator={"is_active": True, "root_path": str(tmp_path / "reports"), "plot_days": 7})
+
+    conn = DB()
+    rows = {
+        "file_checks": [
+            ("2024-01-01 10:00:00", "/etc/old", "h", "True"),
+            ("2024-03-01 10:00:00", "/etc/a", "h", "True"),
+            ("2024-03-01 11:00:00", "/etc/b", "h", "False"),
+            ("2024-03-01 12:00:00", "/etc/c", "h", "yes"),
+            ("2024-03-03 12:00:00", "/etc/a", "h", "1"),
+            ("2024-03-03 13:00:00", "/etc/b", "h", None),
+        ],
+        "service_checks": [
+            ("2024-01-01 10:00:00", "nginx", "False"),
+            ("2024-03-02 10:00:00", "nginx", "True"),
+            ("2024-03-02 11:00:00", "nginx", "False"),
+            ("2024-03-03 10:00:00", "nginx", "active"),
+            ("2024-03-03 10:00:00", "cron", "True"),
+        ],
+    }
+    conn.cursor.executemany("INSERT INTO file_checks (timestamp, file_path, file_hash, changed) VALUES (?, ?, ?, ?)", rows["file_checks"])
+    conn.cursor.executemany("INSERT INTO service_checks (timestamp, service_name, is_active) VALUES (?, ?, ?)", rows["service_checks"])
+    conn.cursor.executemany("INSERT INTO host_checks (timestamp, name, observed_value) VALUES (?, ?, ?)", [
+        ("2024-01-01 10:00:00", "free_ram_mb", "100"),
+        ("2024-03-03 10:00:00", "free_ram_mb", "2048"),
+        ("2024-03-03 10:00:00", "load_average", "1.0 0.5 0.25"),
+    ])
+    conn.conn.commit()
+    yield conn
+
+
+def test_daily_file_changes_are_aggregated_within_window(report_db):
+    daily = report_db.aggregate_daily_file_changes(7)
+
+    assert daily.to_dict("records") == [
+        {"date": "2024-03-01", "changed_files": 2},
+        {"date": "2024-03-03", "changed_files": 1},
+    ]
+    assert len(report_db.aggregate_daily_file_changes(0)) == 3
+
+
+def test_service_uptime_and_down_events(report_db):
+    uptime = report_db.aggregate_service_uptime(7).sort_values("service_name")
+    down = report_db.aggregate_daily_down_events(7)
+
+    assert uptime.to_dict("records") == [
+        {"service_name": "cron", "checks": 1, "active_checks": 1},
+        {"service_name": "nginx", "checks": 3, "active_checks": 2},
+    ]
+    assert down.to_dict("records") == [
+        {"date": "2024-03-02", "down_events": 1},
+        {"date": "2024-03-03", "down_events": 0},
+    ]
+
+
+def test_host_metric_window_and_totals(report_db):
+    ram = report_db.load_host_metric("free_ram_mb", 7)
+
+    assert ram["observed_value"].tolist() == ["2048"]
+    assert report_db.count_rows("file_checks") == 6
+
+
+@pytest.mark.parametrize("plot_workers", [1, 2])
+def test_report_is_built_from_aggregates(report_db, monkeypatch, plot_workers):
+    import matplotlib
+    from utils.report_generator import reportGenerator
+
+    assert matplotlib.get_backend().lower() == "agg"
+
+    original = DB.load_table_for_report
+
+    def previews_only(self, table_name, limit=0):
+        assert limit, f"full table {table_name} loaded into pandas"
+        return original(self, table_name, limit)
+
+    monkeypatch.setattr(DB, "load_table_for_report", previews_only)
+    generator = reportGenerator()
+    generator.plot_workers = plot_workers
+    generator.generate_report()
+
+    report = (generator.markdown_dir / "monitoring_report.md").read_text()
+    assert "**Total rows:** 6" in report
+    assert "| nginx" in report
+    assert (generator.plots_dir / "file_changes_timeline.png").exists()
+    assert (generator.plots_dir / "service_down_events.png").exists()
+    assert (generator.plots_dir / "free_ram_mb.png").exists()
+    assert (generator.plots_dir / "cpu_load_average.png").exists()
+
+
+def test_aggregates_only_fold_new_rows(report_db):
+    assert report_db.refresh_report_aggregates() == {"file_checks": 6, "service_checks": 5}
+    assert report_db.refresh_report_aggregates() == {"file_checks": 0, "service_checks": 0}
+
+    report_db.cursor.execute("INSERT INTO service_checks (timestamp, service_name, is_active) VALUES ('2024-03-03 11:00:00', 'cron', 'False')")
+    report_db.conn.commit()
+
+    assert report_db.refresh_report_aggregates() == {"file_checks": 0, "service_checks": 1}
+    uptime = report_db.aggregate_service_uptime(7).set_index("service_name")
+    assert uptime.loc["cron"].tolist() == [2, 1]
+
+    report_db.delete_db_data("service_checks")
+    assert report_db.aggregate_service_uptime(7).empty
+
+
+def test_unchanged_report_is_skipped_and_plots_are_reused(report_db, monkeypatch):
+    import utils.report_plots as plots_module
+    from utils.report_generator import reportGenerator
+
+    rendered = []
+    original = plots_module.plot_time_series
+
+    def counting_plot(**kwargs):
+        rendered.append(kwargs["title"])
+        return original(**kwargs)
+
+    monkeypatch.setattr(plots_module, "plot_time_series", counting_plot)
+
+    def run():
+        generator = reportGenerator()
+        generator.plot_workers = 1
+        generator.generate_report()
+        return generator
+
+    first = run()
+    assert sorted(rendered) == ["Down events per day", "File changes per day", "free_ram_mb over time"]
+
+    # no new rows: no new report directory, nothing rendered
+    rendered.clear()
+    second = run()
+    assert second.report_root == first.report_root
+    assert rendered == []
+    assert len(list(first.report_root.parent.glob("report_*"))) == 1
+
+    # a new RAM value only re-renders the RAM plot
+    report_db.cursor.execute("INSERT INTO host_checks (timestamp, name, observed_value) VALUES ('2024-03-03 11:00:00', 'free_ram_mb', '1024')")
+    report_db.conn.commit()
+    third = run()
+    assert third.report_root != first.report_root
+    assert rendered == ["free_ram_mb over time"]
+    assert (third.plots_dir / "file_changes_timeline.png").exists()
+
+
+def test_streaming_mode_matches_in_memory_statistics(report_db, monkeypatch):
+    from utils.report_generator import reportGenerator
+
+    rows = [(f"2024-03-0{1 + i % 3} {i % 24:02d}:00:00", "free_ram_mb", str(1000 + i)) for i in range(500)]
+    report_db.cursor.executemany("INSERT INTO host_checks (timestamp, name, observed_value) VALUES (?, ?, ?)", rows)
+    report_db.conn.commit()
+
+    chunks = []
+    original = DB.iter_host_metric
+
+    def counting_iter(self, name, days=0, chunk_size=50_000):
+        for chunk in original(self, name, days, chunk_size):
+            chunks.append(len(chunk))
+            yield chunk
+
+    monkeypatch.setattr(DB, "iter_host_metric", counting_iter)
+
+    reports = {}
+    for streaming in (False, True):
+        generator = reportGenerator()
+        generator.plot_workers = 1
+        generator.skip_unchanged = False
+        generator.streaming = streaming
+        generator.chunk_size = 64
+        generator.generate_report()
+        reports[streaming] = (generator.markdown_dir / "monitoring_report.md").read_text()
+        assert (generator.plots_dir / "free_ram_mb.png").exists()
+
+    assert chunks and max(chunks) <= 64
+    stats_line = next(line for line in reports[False].splitlines() if line.startswith("| free_ram_mb"))
+    streamed_line = next(line for line in reports[True].splitlines() if line.startswith("| free_ram_mb"))
+    # count, mean, min and max are exact in both modes
+    assert stats_line.split("|")[2:6] == streamed_line.split("|")[2:6]
@@ -0,0 +1,42 @@
+import math
+
+import pandas as pd
+
+from utils.report_parsing import parse_disk_free_gb, parse_load_averages, parse_observed
+
+
+def as_list(series):
+    return [None if isinstance(v, float) and math.isnan(v) else v for v in series.tolist()]
+
+
+def test_disk_free_units_are_converted_to_gb():
+    values = pd.Series(["195G", "2T", "512M", "1048576K", "10", " 1.5 g ", "12X", None])
+
+    assert as_list(parse_disk_free_gb(values)) == [195.0, 2048.0, 0.5, 1.0, 10.0, 1.5, None, None]
+    assert as_list(parse_disk_free_gb(pd.Series(["1.5G"]))) == [1.5]
+
+
+def test_load_averages_are_split_into_columns():
+    clean = pd.Series(["1.08 1.14 1.12", " 0.5\t0.25  0.1 "], index=[10, 11])
+    parsed = parse_load_averages(clean)
+    assert parsed.index.tolist() == [10, 11]
+    assert parsed.to_dict("list") == {"v1": [1.08, 0.5], "v2": [1.14, 0.25], "v3": [1.12, 0.1]}
+
+    # rows with more or fewer values must not shift the columns of their neighbours
+    messy = pd.Series(["1 2 3 4", "5 6", "abc 7 8", None, ""])
+    parsed = parse_load_averages(messy)
+    assert as_list(parsed["v1"]) == [1.0, 5.0, None, None, None]
+    assert as_list(parsed["v2"]) == [2.0, 6.0, 7.0, None, None]
+    assert as_list(parsed["v3"]) == [3.0, None, 8.0, None, None]
+
+    # no row with extra values: parsed in one go, still row by row
+    parsed = parse_load_averages(pd.Series(["5 6", "abc 7 8", None, '"1" 2 3', "1 2\n3", "4 5 6"]))
+    assert as_list(parsed["v1"]) == [5.0, None, None, None, 1.0, 4.0]
+    assert as_list(parsed["v2"]) == [6.0, 7.0, None, 2.0, 2.0, 5.0]
+    assert as_list(parsed["v3"]) == [None, 8.0, None, 3.0, 3.0, 6.0]
+
+
+def test_parse_observed_dispatches_by_metric():
+    assert as_list(parse_observed(pd.Series(["1.5 2 3"]), "load_average")) == [1.5]
+    assert as_list(parse_observed(pd.Series(["2T"]), "disk_free")) == [2048.0]
+    assert as_list(parse_observed(pd.Series([" 1024 ", "n/a"]), "free_ram_mb")) == [1024.0, None]
@@ -0,0 +1,131 @@
+import os
+import sqlite3
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from utils.runLock import LOCK_DIR_NAME, OVERLAP_SKIP, runLock, run_locked
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+
+@pytest.fixture
+def db_path(write_conf):
+    return write_conf()
+
+
+def overlap_metrics(db_path):
+    with sqlite3.connect(db_path) as conn:
+        return conn.execute("SELECT module, name, value FROM metrics").fetchall()
+
+
+def test_lock_is_exclusive_until_released(tmp_path):
+    first, second = runLock("hostMonitoring", tmp_path), runLock("hostMonitoring", tmp_path)
+
+    assert first.acquire() is True
+    assert second.acquire() is False
+    assert runLock("fileMonitoring", tmp_path).acquire() is True
+    first.release()
+    assert second.acquire() is True
+    second.release()
+
+
+def test_lock_held_by_other_process_and_released_when_it_dies(tmp_path):
+    holder = subprocess.Popen(
+        [sys.executable, "-c", (
+            "import sys; from utils.runLock import runLock; "
+            f"assert runLock('serviceMonitoring', {str(tmp_path)!r}).acquire(); "
+            "print('locked', flush=True); sys.stdin.read()"
+        )],
+        cwd=REPO_ROOT, stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True,
+    )
+    try:
+        assert holder.stdout.readline().strip() == "locked"
+        assert runLock("serviceMonitoring", tmp_path).acquire() is False
+    finally:
+        holder.kill()
+        holder.wait()
+
+    lock = runLock("serviceMonitoring", tmp_path)
+    assert lock.acquire() is True
+    lock.release()
+
+
+def test_overlapping_invocations_are_coalesced_into_one_rerun(tmp_path, db_path):
+    runs = []
+
+    def check():
+        runs.append(len(runs))
+        if len(runs) == 1:
+            # two cron ticks arrive while the first run is still busy
+            assert run_locked("fileMonitoring", check, lock_dir=tmp_path) is False
+            assert run_locked("fileMonitoring", check, lock_dir=tmp_path) is False
+
+    assert run_locked("fileMonitoring", check, lock_dir=tmp_path) is True
+
+    assert runs == [0, 1]
+    assert not (tmp_path / "fileMonitoring.rerun").exists()
+    assert overlap_metrics(db_path) == [("fileMonitoring", "run_overlap", 1.0)] * 2
+
+
+def test_skip_policy_leaves_no_rerun_marker(tmp_path, db_path):
+    holder = runLock("hostMonitoring", tmp_path)
+    assert holder.acquire()
+    try:
+        assert run_locked("hostMonitoring", lambda: None, lock_dir=tmp_path, overlap_policy=OVERLAP_SKIP) is False
+    finally:
+        holder.release()
+
+    assert not (tmp_path / "hostMonitoring.rerun").exists()
+    assert overlap_metrics(db_path) == [("hostMonitoring", "run_overlap", 1.0)]
+
+
+def test_lock_is_released_when_the_module_exits(tmp_path):
+    def exits():
+        raise SystemExit(1)
+
+    with pytest.raises(SystemExit):
+        run_locked("serviceMonitoring", exits, lock_dir=tmp_path)
+
+    lock = runLock("serviceMonitoring", tmp_path)
+    assert lock.acquire() is True
+    lock.release()
+
+
+def test_lock_files_are_not_followed_through_symlinks(tmp_path):
+    victim = tmp_path / "victim.txt"
+    victim.write_text("important\n")
+    lock_dir = tmp_path / "locks"
+    lock_dir.mkdir()
+    (lock_dir / "hostMonitoring.lock").symlink_to(victim)
+    (lock_dir / "hostMonitoring.rerun").symlink_to(victim)
+
+    lock = runLock("hostMonitoring", lock_dir)
+    with pytest.raises(OSError):
+        lock.acquire()
+    with pytest.raises(OSError):
+        lock.request_rerun()
+
+    assert victim.read_text() == "important\n"
+
+
+def test_lock_dir_writable_by_others_is_refused(tmp_path):
+    shared = tmp_path / "shared"
+    shared.mkdir()
+    os.chmod(shared, 0o777)
+
+    with pytest.raises(PermissionError):
+        runLock("fileMonitoring", shared).acquire()
+    assert not (shared / "fileMonitoring.lock").exists()
+
+
+def test_default_lock_dir_is_private_and_next_to_the_db(db_path):
+    lock = runLock("serviceMonitoring")
+    assert lock.acquire() is True
+    lock.release()
+
+    assert lock.lock_dir == db_path.parent / LOCK_DIR_NAME
+    assert (lock.lock_dir.stat().st_mode & 0o777) == 0o700
+    assert (lock.lock_path.stat().st_mode & 0o777) == 0o600
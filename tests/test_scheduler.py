@@ -0,0 +1,134 @@
+import os
+import signal
+import threading
+import time
+
+import pytest
+
+from utils.scheduler import MODULE_FAILED, MODULE_OK, MODULE_TIMEOUT, moduleRunner, run_modules, scheduler
+
+
+@pytest.fixture(autouse=True)
+def isolated_conf(tmp_path, write_conf):
+    def write(**sections):
+        return write_conf(db={"is_active": False, "db_path": str(tmp_path / "results.db")}, **sections)
+
+    write()
+    return write
+
+
+def run_for(daemon, seconds):
+    timer = threading.Timer(seconds, daemon.stop)
+    timer.start()
+    try:
+        daemon.run()
+    finally:
+        timer.cancel()
+
+
+def test_jobs_run_on_independent_intervals():
+    runs = {"fast": 0, "slow": 0}
+    daemon = scheduler()
+    daemon.add_job("fast", lambda: runs.__setitem__("fast", runs["fast"] + 1), 0.05)
+    daemon.add_job("slow", lambda: runs.__setitem__("slow", runs["slow"] + 1), 0.25)
+
+    run_for(daemon, 0.6)
+
+    assert 8 <= runs["fast"] <= 14
+    assert 2 <= runs["slow"] <= 4
+
+
+def test_failing_and_exiting_jobs_do_not_stop_the_daemon():
+    after = []
+
+    def exits():
+        raise SystemExit(0)
+
+    def fails():
+        raise RuntimeError("boom")
+
+    daemon = scheduler(after_job=lambda job: after.append(job.name))
+    exiting = daemon.add_job("exits", exits, 0.05)
+    failing = daemon.add_job("fails", fails, 0.05)
+
+    run_for(daemon, 0.3)
+
+    assert exiting.runs >= 3 and failing.runs >= 3
+    assert after.count("exits") == exiting.runs
+
+
+def test_sigterm_stops_the_daemon():
+    daemon = scheduler()
+    job = daemon.add_job("tick", lambda: None, 0.05)
+    previous = daemon.install_signal_handlers()
+    timer = threading.Timer(0.2, os.kill, (os.getpid(), signal.SIGTERM))
+    timer.start()
+    try:
+        daemon.run()
+    finally:
+        timer.cancel()
+        for sig, handler in previous.items():
+            signal.signal(sig, handler)
+
+    assert daemon.stopped
+    assert job.runs >= 2
+
+
+def test_module_runner_reuses_instance_until_config_changes(isolated_conf):
+    created = []
+
+    class Module:
+        def __init__(self):
+            self.checks = 0
+            created.append(self)
+
+        def check(self):
+            self.checks += 1
+
+    runner = moduleRunner("module", Module, "check")
+    runner()
+    runner()
+    assert len(created) == 1 and created[0].checks == 2
+
+    isolated_conf(general={"hostname": "host-b", "ip": "127.0.0.1"})
+    runner()
+    assert len(created) == 2 and created[1].checks == 1
+
+
+def test_add_job_rejects_non_positive_interval():
+    with pytest.raises(ValueError):
+        scheduler().add_job("never", lambda: None, 0)
+
+
+def test_run_modules_isolates_failures_and_timeouts():
+    release = threading.Event()
+    done = []
+
+    def ok():
+        done.append("ok")
+
+    def exits():
+        raise SystemExit(1)
+
+    def hangs():
+        release.wait(5)
+
+    try:
+        results = run_modules({"ok": ok, "exits": exits, "hangs": hangs}, timeouts={"hangs": 0.2}, default_timeout=5)
+    finally:
+        release.set()
+
+    assert results == {"ok": MODULE_OK, "exits": MODULE_FAILED, "hangs": MODULE_TIMEOUT}
+    assert done == ["ok"]
+
+
+@pytest.mark.parametrize("parallel, bounds", [(True, (0.3, 0.55)), (False, (0.9, 2.0))])
+def test_run_modules_latency_is_max_not_sum_when_parallel(parallel, bounds):
+    tasks = {name: (lambda: time.sleep(0.3)) for name in ("service", "host", "file")}
+
+    start = time.monotonic()
+    results = run_modules(tasks, parallel=parallel)
+    elapsed = time.monotonic() - start
+
+    assert set(results.values()) == {MODULE_OK}
+    assert bounds[0] <= elapsed < bounds[1]
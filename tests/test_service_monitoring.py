@@ -0,0 +1,147 @@
+import json
+import sqlite3
+import sys
+import textwrap
+
+import pytest
+
+from utils.systemd import parse_show_output, query_units
+
+# stand-in for systemctl: answers `show -p ... -- units...` from a JSON state file and logs every call
+FAKE_SYSTEMCTL = textwrap.dedent("""\
+    #!{python}
+    import json, sys
+    with open({calls!r}, "a") as f:
+        f.write(json.dumps(sys.argv[1:]) + "\\n")
+    states = json.load(open({states!r}))
+    units = sys.argv[sys.argv.index("--") + 1:]
+    blocks = []
+    for unit in units:
+        s = states.get(unit, {{"Id": unit + ".service", "LoadState": "not-found", "ActiveState": "inactive", "SubState": "dead", "NRestarts": "0"}})
+        blocks.append("\\n".join(f"{{k}}={{v}}" for k, v in s.items()))
+    print("\\n\\n".join(blocks))
+""")
+
+
+@pytest.fixture
+def fake_systemctl(tmp_path):
+    states = tmp_path / "states.json"
+    calls = tmp_path / "calls.jsonl"
+    states.write_text(json.dumps({
+        "nginx": {"Id": "nginx.service", "LoadState": "loaded", "ActiveState": "active", "SubState": "running", "NRestarts": "0"},
+        "sshd": {"Id": "ssh.service", "LoadState": "loaded", "ActiveState": "reloading", "SubState": "reload", "NRestarts": "1"},
+        "postgres": {"Id": "postgres.service", "LoadState": "loaded", "ActiveState": "failed", "SubState": "failed", "NRestarts": "5"},
+    }))
+    script = tmp_path / "systemctl"
+    script.write_text(FAKE_SYSTEMCTL.format(python=sys.executable, calls=str(calls), states=str(states)))
+    script.chmod(0o755)
+    return script, calls
+
+
+@pytest.fixture
+def service_conf(write_conf, fake_systemctl):
+    def write(services, systemctl=str(fake_systemctl[0])):
+        return write_conf(
+            serviceMonitoring={
+                "is_active": True, "service_list": services, "check_dns": False, "domain_list": [],
+                "check_internet_connectivity": False, "systemctl_path": systemctl,
+            },
+            alerting={"rules": {"serviceMonitoring": {"is_active": False}}},
+        )
+
+    return write
+
+
+def stored_checks(db_path):
+    with sqlite3.connect(db_path) as conn:
+        return conn.execute(
+            "SELECT service_name, is_active, active_state, sub_state, n_restarts FROM service_checks ORDER BY id"
+        ).fetchall()
+
+
+def test_parse_show_output_maps_blocks_by_argument_order():
+    output = "Id=ssh.service\nActiveState=active\nSubState=running\nNRestarts=2\n\nId=x.service\nLoadState=not-found\nActiveState=inactive\nSubState=dead\nNRestarts=\n"
+
+    states = parse_show_output(output, ["sshd", "x"])
+
+    assert states["sshd"]["unit"] == "ssh.service"
+    assert states["sshd"]["is_active"] is True and states["sshd"]["n_restarts"] == 2
+    assert states["x"]["is_active"] is False and states["x"]["n_restarts"] is None
+
+
+def test_query_units_uses_one_call_for_all_units(fake_systemctl):
+    script, calls = fake_systemctl
+    units = ["nginx", "sshd", "postgres", "does-not-exist", "nginx"]
+
+    states = query_units(units, systemctl=str(script))
+
+    assert [json.loads(line) for line in calls.read_text().splitlines()] == [
+        ["show", "--no-pager", "-p", "Id,LoadState,ActiveState,SubState,NRestarts", "--", "nginx", "sshd", "postgres", "does-not-exist"],
+    ]
+    assert {unit: s["is_active"] for unit, s in states.items()} == {"nginx": True, "sshd": True, "postgres": False, "does-not-exist": False}
+    assert states["does-not-exist"]["load_state"] == "not-found"
+
+
+def test_unit_names_are_not_interpreted_by_a_shell(fake_systemctl, tmp_path):
+    script, calls = fake_systemctl
+
+    states = query_units(["nginx; touch pwned"], systemctl=str(script))
+
+    assert states["nginx; touch pwned"]["is_active"] is False
+    assert not (tmp_path / "pwned").exists()
+
+
+def test_service_check_stores_systemd_details(service_conf, fake_systemctl):
+    from monitoring.serviceMonitoring import serviceMonitoring
+    db_path = service_conf(["nginx", "sshd", "postgres"])
+
+    monitor = serviceMonitoring()
+    monitor.check_services()
+
+    assert stored_checks(db_path) == [
+        ("nginx", "active", "active", "running", 0),
+        ("sshd", "active", "reloading", "reload", 1),
+        ("postgres", "inactive", "failed", "failed", 5),
+    ]
+    assert len(fake_systemctl[1].read_text().splitlines()) == 1
+
+
+def test_missing_systemctl_marks_services_inactive(service_conf, tmp_path):
+    from monitoring.serviceMonitoring import serviceMonitoring
+    db_path = service_conf(["nginx"], systemctl=str(tmp_path / "no-such-systemctl"))
+
+    serviceMonitoring().check_services()
+
+    assert stored_checks(db_path) == [("nginx", "inactive", "unknown", "unknown", None)]
+
+
+def test_old_service_checks_table_is_migrated(service_conf):
+    db_path = service_conf(["nginx"])
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("CREATE TABLE service_checks (id INTEGER PRIMARY KEY AUTOINCREMENT, timestamp TEXT, service_name TEXT, is_active TEXT)")
+        conn.execute("INSERT INTO service_checks (timestamp, service_name, is_active) VALUES ('2024-01-01 00:00:00', 'nginx', 'True')")
+
+    from monitoring.serviceMonitoring import serviceMonitoring
+    serviceMonitoring().check_services()
+
+    assert stored_checks(db_path) == [("nginx", "True", None, None, None), ("nginx", "active", "active", "running", 0)]
+
+
+def test_alert_is_repeated_until_it_was_dispatched(service_conf):
+    from monitoring.serviceMonitoring import serviceMonitoring
+    service_conf(["postgres"])
+
+    monitor = serviceMonitoring()
+    sent = []
+    monitor.alert_dispatcher.dispatch = lambda subject, template, ctx: sent.append(ctx) or [{"ok": outcome}]
+
+    # the outage starts while alerting is off, then the first send fails
+    monitor.check_services()
+    monitor.alerting_is_active = True
+    outcome = False
+    monitor.check_services()
+    outcome = True
+    monitor.check_services()
+    monitor.check_services()
+
+    assert [[s["name"] for s in ctx["inactive_services"]] for ctx in sent] == [["postgres"], ["postgres"]]
@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+
+from utils.sketch import streamingStats, tDigest, timeBuckets
+
+
+def test_tdigest_quantiles_in_bounded_memory():
+    data = np.random.default_rng(7).exponential(size=200_000)
+    digest = tDigest(compression=100)
+    for chunk in np.array_split(data, 37):
+        digest.update(chunk)
+
+    assert len(digest.means) <= 110
+    assert digest.count == len(data)
+    for q in (0.01, 0.5, 0.95, 0.99):
+        assert abs(digest.quantile(q) - np.quantile(data, q)) < 0.02 * max(1.0, np.quantile(data, q))
+    assert digest.quantile(0) == data.min() and digest.quantile(1) == data.max()
+
+
+def test_merged_digests_match_one_digest():
+    rng = np.random.default_rng(3)
+    a, b = rng.normal(0, 1, 50_000), rng.normal(5, 1, 50_000)
+    left, right = streamingStats(), streamingStats()
+    left.update(a)
+    right.update(b)
+
+    left.merge(right)
+    summary = left.summary()
+
+    both = np.concatenate((a, b))
+    assert summary["count"] == 100_000
+    assert abs(summary["mean"] - both.mean()) < 1e-9
+    assert summary["min"] == both.min() and summary["max"] == both.max()
+    assert abs(summary["p50"] - np.median(both)) < 0.1
+
+
+def test_time_buckets_fold_chunks():
+    ts = pd.date_range("2024-01-01", periods=1_000, freq="min")
+    values = np.arange(1_000, dtype=float)
+    buckets = timeBuckets(ts[0].value, ts[-1].value, 10, ["v"])
+    for part in np.array_split(np.arange(1_000), 7):
+        buckets.update(ts[part].to_numpy(dtype="datetime64[ns]").astype("int64"), values[part])
+
+    df, envelope = buckets.frame("ts")
+
+    assert len(df) == 10
+    assert buckets.counts.sum() == 1_000
+    assert envelope["y_min"].iloc[0] == 0 and envelope["y_max"].iloc[-1] == 999
+    assert abs(df["v"].mean() - values.mean()) < 1.0
+
+
+def test_time_buckets_over_a_multi_year_window():
+    # five years in ns times 2000 buckets is far beyond the int64 range
+    ts = pd.date_range("2020-01-01", "2025-01-01", freq="h")
+    values = np.arange(len(ts), dtype=float)
+    buckets = timeBuckets(ts[0].value, ts[-1].value, 2_000, ["v"])
+    for part in np.array_split(np.arange(len(ts)), 5):
+        buckets.update(ts[part].to_numpy(dtype="datetime64[ns]").astype("int64"), values[part])
+
+    df, _ = buckets.frame("ts")
+
+    assert len(df) == 2_000 and (buckets.counts[0] > 0).all()
+    assert df["ts"].is_monotonic_increasing
+    assert ts[0] < df["ts"].iloc[0] and df["ts"].iloc[-1] < ts[-1]
+    # hourly values rise steadily, so the bucket means must as well
+    assert df["v"].is_monotonic_increasing
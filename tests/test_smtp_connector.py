@@ -1,3 +1,8 @@
+import socket
+import socketserver
+import threading
+import time
+
 import pytest
 
 import alerting.smtpConnector as smtp_module
@@ -14,15 +19,21 @@ class DummyLogger:
     def error(self, msg):
         self.errors.append(msg)
 
+    def warning(self, msg):
+        self.errors.append(msg)
+
 
-def make_smtp_instance(monkeypatch, logger=None, use_ssl=False, use_tls=False):
+def make_smtp_instance(monkeypatch, logger=None, use_ssl=False, use_tls=False, host='smtp.test', port=25, digest_window_seconds=0):
     if logger is None:
         logger = DummyLogger()
 
     def fake_init(self):
         self.is_active = True
-        self.host = 'smtp.test'
-        self.port = 25
+        self.timeout = 5
+        self.keepalive_seconds = 60
+        self.digest_window_seconds = digest_window_seconds
+        self.host = host
+        self.port = port
         self.username = None
         self.password = None
         self.use_tls = use_tls
@@ -44,7 +55,7 @@ def test_smtp_send_uses_smtplib(monkeypatch):
     calls = {'sendmail': 0}
 
     class DummySMTP:
-        def __init__(self, host, port):
+        def __init__(self, host, port, timeout=None):
             self.host = host
             self.port = port
 
@@ -82,7 +93,7 @@ def test_smtp_send_uses_smtplib_ssl(monkeypatch):
     calls = {'sendmail': 0}
 
     class DummySMTPSSL:
-        def __init__(self, host, port, context=None):
+        def __init__(self, host, port, context=None, timeout=None):
             self.host = host
             self.port = port
 
@@ -103,3 +114,159 @@ def test_smtp_send_uses_smtplib_ssl(monkeypatch):
     inst.smtpSendMailHTML('subj', 'serviceMonitoring', {'to': 'x@test'})
 
     assert calls['sendmail'] == 1
+
+
+class SMTPStandIn(socketserver.StreamRequestHandler):
+    """Just enough SMTP to accept mail; records connections and received messages."""
+
+    def handle(self):
+        server = self.server
+        server.connections += 1
+        self.wfile.write(b"220 stand-in ESMTP\r\n")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode().strip().upper()
+            if command.startswith(("EHLO", "HELO")):
+                self.wfile.write(b"250-stand-in\r\n250 OK\r\n")
+            elif command.startswith("RCPT") and server.refuse_recipients:
+                self.wfile.write(b"550 no such user\r\n")
+            elif command.startswith(("MAIL", "RCPT", "RSET", "NOOP")):
+                self.wfile.write(b"250 OK\r\n")
+            elif command == "DATA":
+                self.wfile.write(b"354 go ahead\r\n")
+                data = []
+                while True:
+                    chunk = self.rfile.readline()
+                    if chunk in (b".\r\n", b""):
+                        break
+                    data.append(chunk)
+                server.messages.append(b"".join(data).decode())
+                time.sleep(server.data_reply_delay)
+                self.wfile.write(b"250 queued\r\n")
+                if server.drop_after_message:
+                    server.drop_after_message = False
+                    return
+            elif command == "QUIT":
+                self.wfile.write(b"221 bye\r\n")
+                return
+            else:
+                self.wfile.write(b"502 not implemented\r\n")
+
+
+@pytest.fixture
+def smtp_server():
+    server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), SMTPStandIn)
+    server.daemon_threads = True
+    server.connections = 0
+    server.messages = []
+    server.drop_after_message = False
+    server.refuse_recipients = False
+    server.data_reply_delay = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_smtp_session_is_reused(monkeypatch, smtp_server):
+    inst = make_smtp_instance(monkeypatch, host='127.0.0.1', port=smtp_server.server_address[1])
+
+    for i in range(3):
+        inst.send_rendered(f'subj {i}', '<html>ok</html>', {})
+    inst.close()
+
+    assert smtp_server.connections == 1
+    assert len(smtp_server.messages) == 3
+
+
+def test_smtp_reconnects_after_dropped_session(monkeypatch, smtp_server):
+    inst = make_smtp_instance(monkeypatch, host='127.0.0.1', port=smtp_server.server_address[1])
+    smtp_server.drop_after_message = True
+
+    inst.send_rendered('first', '<html>ok</html>', {})
+    inst.send_rendered('second', '<html>ok</html>', {})
+    inst.close()
+
+    assert smtp_server.connections == 2
+    assert len(smtp_server.messages) == 2
+
+
+def test_smtp_permanent_failure_is_not_resent(monkeypatch, smtp_server):
+    inst = make_smtp_instance(monkeypatch, host='127.0.0.1', port=smtp_server.server_address[1])
+    smtp_server.refuse_recipients = True
+
+    with pytest.raises(smtp_module.smtplib.SMTPRecipientsRefused):
+        inst.send_rendered('refused', '<html>ok</html>', {})
+    inst.close()
+
+    assert smtp_server.connections == 1
+
+
+def test_smtp_digest_merges_alerts(monkeypatch, smtp_server):
+    inst = make_smtp_instance(monkeypatch, host='127.0.0.1', port=smtp_server.server_address[1], digest_window_seconds=300)
+
+    inst.send_rendered('Inaktive Services', '<html><body><p>cron</p></body></html>', {})
+    inst.send_rendered('Dateiaenderungen', '<html><body><p>/etc/hosts</p></body></html>', {})
+    assert smtp_server.messages == []
+
+    inst.flush()
+    inst.close()
+
+    assert len(smtp_server.messages) == 1
+    assert 'Sammelmeldung: 2 Alarme' in smtp_server.messages[0]
+    assert 'Inaktive Services' in smtp_server.messages[0]
+    assert 'Dateiaenderungen' in smtp_server.messages[0]
+
+
+def test_smtp_failed_digest_is_reported_to_its_alerts(monkeypatch, smtp_server):
+    inst = make_smtp_instance(monkeypatch, host='127.0.0.1', port=smtp_server.server_address[1], digest_window_seconds=300)
+    smtp_server.refuse_recipients = True
+
+    outcomes = [inst.send_rendered(subject, '<html><body><p>x</p></body></html>', {}) for subject in ('a', 'b')]
+    assert not any(outcome.done() for outcome in outcomes)
+
+    with pytest.raises(smtp_module.smtplib.SMTPRecipientsRefused):
+        inst.flush()
+    inst.close()
+
+    # the popped digest is not silently dropped: every alert in it learns about the failure
+    assert all(isinstance(outcome.exception(timeout=0), smtp_module.smtplib.SMTPRecipientsRefused) for outcome in outcomes)
+    assert smtp_server.messages == []
+
+
+def test_smtp_timeout_after_data_is_not_resent(monkeypatch, smtp_server):
+    inst = make_smtp_instance(monkeypatch, host='127.0.0.1', port=smtp_server.server_address[1])
+    inst.timeout = 0.2
+    # the server queues the message but answers DATA too late
+    smtp_server.data_reply_delay = 0.5
+
+    # on a fresh session and on a reused one
+    for subject in ('fresh', 'reused'):
+        with pytest.raises(smtp_module.smtplib.SMTPServerDisconnected):
+            inst.send_rendered(subject, '<html>ok</html>', {})
+        if subject == 'fresh':
+            smtp_server.data_reply_delay = 0
+            inst.send_rendered('ok', '<html>ok</html>', {})
+            smtp_server.data_reply_delay = 0.5
+    inst.close()
+
+    assert smtp_server.connections == 2
+    assert len(smtp_server.messages) == 3
+
+
+def test_smtp_failed_connect_is_not_retried(monkeypatch):
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    inst = make_smtp_instance(monkeypatch, host='127.0.0.1', port=port)
+    connects = []
+    real_smtp = smtp_module.smtplib.SMTP
+    monkeypatch.setattr(smtp_module.smtplib, 'SMTP', lambda *a, **kw: connects.append(a) or real_smtp(*a, **kw))
+
+    with pytest.raises(ConnectionRefusedError):
+        inst.send_rendered('unreachable', '<html>ok</html>', {})
+
+    assert len(connects) == 1
@@ -0,0 +1,50 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# libraries only the report/export code paths (and the connectors that actually send) may load
+HEAVY_MODULES = ("pandas", "numpy", "matplotlib", "requests")
+
+# cumulative import time of the monitoring entry points; generous for slow CI runners
+# (with pandas and matplotlib at module level monitor.py took ~900 ms)
+STARTUP_BUDGET_US = 300_000
+
+
+def import_times(module: str) -> dict:
+    """module -> cumulative import time in microseconds, measured with python -X importtime."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=REPO_ROOT, capture_output=True, text=True, check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit():
+            times[name.strip()] = int(cumulative)
+    return times
+
+
+@pytest.mark.parametrize("module", [
+    "monitor",
+    "monitoring.serviceMonitoring",
+    "monitoring.hostMonitoring",
+    "monitoring.fileMonitoring",
+])
+def test_monitoring_commands_do_not_import_heavy_dependencies(module):
+    times = import_times(module)
+
+    assert module in times
+    assert [name for name in times if name.split(".")[0] in HEAVY_MODULES] == []
+    assert times[module] < STARTUP_BUDGET_US, f"{module} took {times[module] / 1000:.0f} ms to import"
+
+
+def test_report_generator_still_imports_its_dependencies():
+    times = import_times("utils.report_generator")
+
+    assert "pandas" in times and "matplotlib" in times
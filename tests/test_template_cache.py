@@ -0,0 +1,52 @@
+import os
+
+import pytest
+
+import alerting.templateCache as template_module
+
+
+@pytest.fixture(autouse=True)
+def isolated_environment(tmp_path, monkeypatch):
+    monkeypatch.setattr(template_module, "_bytecode_cache_dir", lambda: tmp_path / "jinja_cache")
+    template_module.reset_environment()
+    yield tmp_path / "jinja_cache"
+    template_module.reset_environment()
+
+
+def test_environment_is_shared():
+    assert template_module.get_environment() is template_module.get_environment()
+
+
+def test_template_is_compiled_once(isolated_environment):
+    env = template_module.get_environment()
+    first = env.get_template("serviceMonitoring.html")
+    html = template_module.render_template("serviceMonitoring.html", {"report_title": "Inaktive Services"})
+
+    assert env.get_template("serviceMonitoring.html") is first
+    assert "Inaktive Services" in html
+
+
+def test_precompile_fills_bytecode_cache(isolated_environment):
+    compiled = template_module.precompile_templates()
+
+    assert set(template_module.TEMPLATE_FILES.values()) <= set(compiled)
+    assert len(list(isolated_environment.iterdir())) == len(compiled)
+
+
+def test_shared_cache_dir_of_another_user_is_not_used(tmp_path, monkeypatch):
+    planted = tmp_path / "shared_cache"
+    planted.mkdir()
+    os.chmod(planted, 0o777)
+    monkeypatch.setattr(template_module, "_bytecode_cache_dir", lambda: planted)
+    template_module.reset_environment()
+
+    assert template_module.get_environment().bytecode_cache is None
+
+
+def test_default_cache_dir_is_jinjas_private_one(monkeypatch):
+    monkeypatch.setattr(template_module, "_bytecode_cache_dir", lambda: None)
+    template_module.reset_environment()
+
+    cache_dir = template_module.get_environment().bytecode_cache.directory
+    assert str(os.geteuid()) in cache_dir
+    assert os.stat(cache_dir).st_mode & 0o077 == 0
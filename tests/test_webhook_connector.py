@@ -0,0 +1,211 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import jinja2
+import pytest
+
+import alerting.httpSession as http_session
+import alerting.mailgunConnector as mg_module
+import alerting.webhookConnector as wh_module
+
+
+class DummyLogger:
+    def __init__(self):
+        self.infos = []
+        self.errors = []
+
+    def info(self, msg):
+        self.infos.append(msg)
+
+    def warning(self, msg):
+        self.errors.append(msg)
+
+    def error(self, msg):
+        self.errors.append(msg)
+
+
+def make_webhook_instance(monkeypatch, url, batch_size=20, batch_window_seconds=30, payload_template=""):
+    def fake_init(self):
+        # set minimal attributes expected by methods
+        self.is_active = True
+        self.url = url
+        self.headers = {"Authorization": "Bearer TOKEN"}
+        self.payload_template = payload_template
+        self.hostname = "host-a"
+        self.batch_size = batch_size
+        self.batch_window_seconds = batch_window_seconds
+        self.connect_timeout = 2
+        self.read_timeout = 2
+        self.max_retries = 3
+        self.backoff_factor = 0.01
+        self.logger = DummyLogger()
+        self._template = jinja2.Environment(autoescape=False).from_string(payload_template) if payload_template else None
+        self._cond = threading.Condition()
+        self._pending = []
+        self._in_flight = 0
+        self._first_pending_at = None
+        self._flush_requested = False
+        self._closed = False
+        self._sender = None
+
+    monkeypatch.setattr(wh_module.webhookConnector, '__init__', fake_init, raising=True)
+    return wh_module.webhookConnector()
+
+
+class WebhookStandIn(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    responses_to_send = []
+    requests_seen = []
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        status = self.responses_to_send.pop(0) if self.responses_to_send else 200
+        self.requests_seen.append({"port": self.client_address[1], "headers": dict(self.headers), "body": body, "status": status})
+        self.send_response(status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def webhook_server(monkeypatch):
+    WebhookStandIn.responses_to_send = []
+    WebhookStandIn.requests_seen = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), WebhookStandIn)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    http_session.clear_sessions()
+    yield f"http://127.0.0.1:{server.server_address[1]}/hooks/monitoring"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def second_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), WebhookStandIn)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/v3/test/messages"
+    server.shutdown()
+    server.server_close()
+
+
+def delivered(status=200):
+    return [r for r in WebhookStandIn.requests_seen if r["status"] == status]
+
+
+def test_alerts_of_a_run_are_batched_into_one_request(monkeypatch, webhook_server):
+    wh = make_webhook_instance(monkeypatch, webhook_server)
+
+    for i in range(5):
+        wh.send_rendered(f"alert {i}", "<html>ok</html>", {"service": f"svc{i}"})
+
+    # nothing is posted before the batch window elapsed or the run flushes
+    assert WebhookStandIn.requests_seen == []
+    assert wh.flush(force=True, timeout=5)
+
+    assert len(WebhookStandIn.requests_seen) == 1
+    request = WebhookStandIn.requests_seen[0]
+    assert request["headers"]["Authorization"] == "Bearer TOKEN"
+    assert request["headers"]["Content-Type"] == "application/json"
+    payload = json.loads(request["body"])
+    assert payload["host"] == "host-a"
+    assert [a["subject"] for a in payload["alerts"]] == [f"alert {i}" for i in range(5)]
+    assert payload["alerts"][2]["context"] == {"service": "svc2"}
+
+
+def test_full_batches_go_out_over_one_connection(monkeypatch, webhook_server):
+    wh = make_webhook_instance(monkeypatch, webhook_server, batch_size=2)
+
+    for i in range(5):
+        wh.send_rendered(f"alert {i}", "<html>ok</html>")
+    assert wh.flush(force=True, timeout=5)
+
+    assert [json.loads(r["body"])["count"] for r in WebhookStandIn.requests_seen] == [2, 2, 1]
+    assert len({r["port"] for r in WebhookStandIn.requests_seen}) == 1
+
+
+def test_batch_window_sends_without_flush(monkeypatch, webhook_server):
+    wh = make_webhook_instance(monkeypatch, webhook_server, batch_window_seconds=0.05)
+
+    wh.send_rendered("alert", "<html>ok</html>")
+    with wh._cond:
+        wh._cond.wait_for(lambda: not wh._pending and not wh._in_flight, timeout=5)
+
+    assert len(WebhookStandIn.requests_seen) == 1
+
+
+def test_server_errors_are_retried(monkeypatch, webhook_server):
+    wh = make_webhook_instance(monkeypatch, webhook_server)
+    WebhookStandIn.responses_to_send = [503, 429]
+
+    wh.send_rendered("alert", "<html>ok</html>")
+    assert wh.flush(force=True, timeout=5)
+
+    assert [r["status"] for r in WebhookStandIn.requests_seen] == [503, 429, 200]
+    assert wh.logger.errors == []
+
+
+def test_failed_batch_is_logged_not_raised(monkeypatch, webhook_server):
+    wh = make_webhook_instance(monkeypatch, webhook_server)
+    WebhookStandIn.responses_to_send = [500] * 10
+
+    outcome = wh.send_rendered("alert", "<html>ok</html>")
+    assert wh.flush(force=True, timeout=5)
+
+    assert len(WebhookStandIn.requests_seen) == wh.max_retries + 1
+    assert any("Could not post batch" in m for m in wh.logger.errors)
+    # the caller learns that the alert was not delivered
+    assert outcome.exception(timeout=5) is not None
+
+
+def test_delivery_future_completes_after_the_post(monkeypatch, webhook_server):
+    wh = make_webhook_instance(monkeypatch, webhook_server)
+
+    outcome = wh.send_rendered("alert", "<html>ok</html>")
+    assert not outcome.done()
+    assert wh.flush(force=True, timeout=5)
+
+    assert outcome.result(timeout=5) is None
+    assert len(WebhookStandIn.requests_seen) == 1
+
+
+def test_payload_template_and_restart_after_close(monkeypatch, webhook_server):
+    template = '{"text": {{ alerts | map(attribute="subject") | join("\\n") | tojson }}, "host": {{ host | tojson }}}'
+    wh = make_webhook_instance(monkeypatch, webhook_server, payload_template=template)
+
+    wh.send_rendered('Service "nginx" down', "<html>ok</html>")
+    wh.send_rendered("Load high", "<html>ok</html>")
+    wh.close()
+    wh.send_rendered("next cycle", "<html>ok</html>")
+    wh.close()
+
+    bodies = [json.loads(r["body"]) for r in WebhookStandIn.requests_seen]
+    assert bodies == [
+        {"text": 'Service "nginx" down\nLoad high', "host": "host-a"},
+        {"text": "next cycle", "host": "host-a"},
+    ]
+
+
+def test_connectors_keep_their_own_pooled_connection(monkeypatch, webhook_server, second_server):
+    wh = make_webhook_instance(monkeypatch, webhook_server)
+    mailgun = mg_module.mailgunConnector.__new__(mg_module.mailgunConnector)
+    # same retry settings as the webhook, posting to another host
+    mailgun.__dict__.update(
+        is_active=True, webroot=second_server, api_key="API-KEY", recipient="to@test", sender="from@test",
+        connect_timeout=2, read_timeout=2, max_retries=wh.max_retries, backoff_factor=wh.backoff_factor, logger=DummyLogger(),
+    )
+
+    for i in range(3):
+        wh.send_rendered(f"alert {i}", "<html>ok</html>")
+        assert wh.flush(force=True, timeout=5)
+        mailgun.send_rendered(f"mail {i}", "<html>ok</html>")
+
+    ports = {}
+    for request in WebhookStandIn.requests_seen:
+        ports.setdefault(request["headers"]["Host"], set()).add(request["port"])
+    assert len(WebhookStandIn.requests_seen) == 6
+    # one connection per host, reused across the interleaved sends
+    assert sorted(len(p) for p in ports.values()) == [1, 1]
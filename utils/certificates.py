@@ -0,0 +1,269 @@
+import asyncio
+import calendar
+import ipaddress
+import re
+import ssl
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+# Certificate expiry check for TLS endpoints (host:port) and local PEM files. The handshakes
+# run concurrently on one asyncio event loop, the files are parsed in a thread pool. The
+# certificates of an endpoint are cached, so hundreds of endpoints are not renegotiated on
+# every run; days left are always computed from the cached notAfter at check time.
+
+STATUS_OK = "ok"
+STATUS_EXPIRING = "expiring"
+STATUS_EXPIRED = "expired"
+STATUS_ERROR = "error"
+
+PEM_BLOCK = re.compile(rb"-----BEGIN CERTIFICATE-----.+?-----END CERTIFICATE-----", re.DOTALL)
+
+# process-wide handshake cache ((host, port, server_name) -> (expires_at, chain)), kept by the daemon across runs
+_CACHE_LOCK = threading.Lock()
+_CACHE = {}
+
+
+def clear_cache() -> None:
+    with _CACHE_LOCK:
+        _CACHE.clear()
+
+
+# DER tags and object identifiers of the few X.509 fields the check reads
+TAG_INTEGER = 0x02
+TAG_OCTET_STRING = 0x04
+TAG_OID = 0x06
+TAG_SEQUENCE = 0x30
+TAG_SET = 0x31
+TAG_UTC_TIME = 0x17
+TAG_GENERALIZED_TIME = 0x18
+TAG_VERSION = 0xA0  # [0] EXPLICIT
+TAG_EXTENSIONS = 0xA3  # [3] EXPLICIT
+TAG_SAN_DNS = 0x82  # [2] dNSName
+TAG_SAN_IP = 0x87  # [7] iPAddress
+OID_COMMON_NAME = bytes.fromhex("550403")
+OID_ORGANIZATION = bytes.fromhex("55040a")
+OID_SUBJECT_ALT_NAME = bytes.fromhex("551d11")
+
+# string types of attribute values -> codec
+_STRING_CODECS = {0x0C: "utf-8", 0x13: "ascii", 0x16: "ascii", 0x14: "latin-1", 0x1E: "utf-16-be", 0x1C: "utf-32-be"}
+
+
+def _tlv(der: bytes, offset: int) -> tuple:
+    # (tag, start of the value, end of the value) of the DER element at offset
+    tag, length = der[offset], der[offset + 1]
+    offset += 2
+    if length & 0x80:
+        size = length & 0x7F
+        if not 0 < size <= 4:
+            raise ValueError("unsupported DER length")
+        length = int.from_bytes(der[offset:offset + size], "big")
+        offset += size
+    if offset + length > len(der):
+        raise ValueError("truncated DER element")
+    return tag, offset, offset + length
+
+
+def _children(der: bytes, start: int, end: int) -> list:
+    items = []
+    while start < end:
+        item = _tlv(der, start)
+        items.append(item)
+        start = item[2]
+    return items
+
+
+def _expect(item: tuple, tag: int) -> tuple:
+    if item[0] != tag:
+        raise ValueError(f"unexpected DER tag 0x{item[0]:02x} (expected 0x{tag:02x})")
+    return item
+
+
+def _name(der: bytes, item: tuple) -> str:
+    # Name = SEQUENCE OF SET OF (type OID, value); commonName, else organizationName
+    fields = {}
+    for _, set_start, set_end in _children(der, item[1], item[2]):
+        for _, start, end in _children(der, set_start, set_end):
+            oid, value = _children(der, start, end)[:2]
+            codec = _STRING_CODECS.get(value[0], "latin-1")
+            fields.setdefault(der[oid[1]:oid[2]], der[value[1]:value[2]].decode(codec, errors="replace"))
+    return fields.get(OID_COMMON_NAME) or fields.get(OID_ORGANIZATION) or ""
+
+
+def _time(der: bytes, item: tuple) -> float:
+    text = der[item[1]:item[2]].decode("ascii").rstrip("Z")
+    if item[0] == TAG_UTC_TIME:
+        # two-digit years: 50-99 are 19xx, 00-49 are 20xx (RFC 5280)
+        text = ("19" if int(text[:2]) >= 50 else "20") + text
+    elif item[0] != TAG_GENERALIZED_TIME:
+        raise ValueError("unexpected DER time type")
+    return float(calendar.timegm(time.strptime(text[:14], "%Y%m%d%H%M%S")))
+
+
+def _subject_alt_names(der: bytes, extensions: tuple) -> list:
+    names = []
+    for _, start, end in _children(der, *_expect(_children(der, extensions[1], extensions[2])[0], TAG_SEQUENCE)[1:]):
+        fields = _children(der, start, end)
+        if der[fields[0][1]:fields[0][2]] != OID_SUBJECT_ALT_NAME:
+            continue
+        value = _expect(fields[-1], TAG_OCTET_STRING)
+        general_names = _expect(_tlv(der, value[1]), TAG_SEQUENCE)
+        for tag, name_start, name_end in _children(der, general_names[1], general_names[2]):
+            if tag == TAG_SAN_DNS:
+                names.append(der[name_start:name_end].decode("ascii", errors="replace"))
+            elif tag == TAG_SAN_IP:
+                names.append(str(ipaddress.ip_address(der[name_start:name_end])))
+    return names
+
+
+def decode_der(der: bytes) -> dict:
+    """Subject, issuer, serial, notAfter and SANs of one DER certificate.
+
+    The stdlib has no public X.509 parser, so the few fields needed here are read from
+    the DER structure directly (Certificate -> TBSCertificate, RFC 5280 4.1).
+    """
+    try:
+        certificate = _expect(_tlv(der, 0), TAG_SEQUENCE)
+        tbs = _expect(_children(der, certificate[1], certificate[2])[0], TAG_SEQUENCE)
+        fields = _children(der, tbs[1], tbs[2])
+        if fields[0][0] == TAG_VERSION:
+            fields = fields[1:]
+        serial, _, issuer, validity, subject = fields[:5]
+        serial_bytes = der[_expect(serial, TAG_INTEGER)[1]:serial[2]].lstrip(b"\x00") or b"\x00"
+        not_after = _time(der, _children(der, _expect(validity, TAG_SEQUENCE)[1], validity[2])[1])
+        extensions = [item for item in fields[5:] if item[0] == TAG_EXTENSIONS]
+        return {
+            "subject": _name(der, _expect(subject, TAG_SEQUENCE)),
+            "issuer": _name(der, _expect(issuer, TAG_SEQUENCE)),
+            "serial": serial_bytes.hex().upper(),
+            "san": _subject_alt_names(der, extensions[0]) if extensions else [],
+            "not_after": datetime.fromtimestamp(not_after, timezone.utc).strftime("%Y-%m-%d %H:%M:%S"),
+            "not_after_ts": not_after,
+        }
+    except (IndexError, UnicodeError) as e:
+        raise ValueError(f"malformed certificate: {e}") from e
+
+
+def decode_pem(pem: bytes) -> dict:
+    """Subject, issuer, serial, notAfter and SANs of one PEM certificate."""
+    return decode_der(ssl.PEM_cert_to_DER_cert(pem.decode("ascii")))
+
+
+def read_pem_chain(path) -> list:
+    """All certificates of a PEM file (leaf first, as they appear in the file)."""
+    blocks = PEM_BLOCK.findall(Path(path).read_bytes())
+    if not blocks:
+        raise ValueError(f"no PEM certificate in {path}")
+    return [decode_pem(block + b"\n") for block in blocks]
+
+
+def evaluate(chain: list, warn_days: float, now: float = None) -> dict:
+    """Status of a chain by the certificate in it that expires first."""
+    now = time.time() if now is None else now
+    first = min(chain, key=lambda cert: cert["not_after_ts"])
+    days_left = round((first["not_after_ts"] - now) / 86400.0, 2)
+    if days_left <= 0:
+        status = STATUS_EXPIRED
+    elif days_left <= warn_days:
+        status = STATUS_EXPIRING
+    else:
+        status = STATUS_OK
+    detail = f"{first['subject'] or 'certificate'} expires {first['not_after']} UTC ({days_left:g} days)"
+    return {"status": status, "days_left": days_left, "not_after": first["not_after"], "detail": detail}
+
+
+async def _fetch_chain(host: str, port: int, server_name: str, timeout: float) -> list:
+    # no verification: the point is to read the expiry, also of self-signed or expired certificates
+    context = ssl.create_default_context()
+    context.check_hostname = False
+    context.verify_mode = ssl.CERT_NONE
+    loop = asyncio.get_running_loop()
+    transport, _ = await asyncio.wait_for(
+        loop.create_connection(asyncio.Protocol, host, port, ssl=context, server_hostname=server_name), timeout,
+    )
+    try:
+        ssl_object = transport.get_extra_info("ssl_object")
+        # the full chain sent by the server is only exposed from Python 3.13 on
+        get_chain = getattr(ssl_object, "get_unverified_chain", None)
+        ders = (list(get_chain()) if get_chain else []) or [ssl_object.getpeercert(binary_form=True)]
+    finally:
+        transport.abort()
+    return [decode_der(der) for der in ders]
+
+
+def _result(spec: dict, source: str) -> dict:
+    return {
+        "name": spec.get("name") or source, "source": source, "status": STATUS_ERROR, "detail": "",
+        "days_left": None, "not_after": None, "chain": [], "cached": False,
+    }
+
+
+async def _check_endpoint(spec: dict, semaphore, timeout: float, cache_seconds: float, warn_days: float) -> dict:
+    host, port = spec.get("host"), int(spec.get("port", 443))
+    server_name = spec.get("server_name") or host
+    result = _result(spec, f"{host}:{port}")
+    if not host:
+        result["detail"] = "certificate spec needs either host or file"
+        return result
+    key = (host, port, server_name)
+    with _CACHE_LOCK:
+        cached = _CACHE.get(key)
+    if cached and cached[0] > time.monotonic():
+        chain, result["cached"] = cached[1], True
+    else:
+        try:
+            async with semaphore:
+                chain = await _fetch_chain(host, port, server_name, timeout)
+        except asyncio.TimeoutError:
+            result["detail"] = f"no TLS handshake within {timeout:g}s"
+            return result
+        except (OSError, ssl.SSLError, ValueError) as e:
+            result["detail"] = str(e) or type(e).__name__
+            return result
+        if cache_seconds > 0:
+            with _CACHE_LOCK:
+                _CACHE[key] = (time.monotonic() + cache_seconds, chain)
+    result["chain"] = chain
+    result.update(evaluate(chain, warn_days))
+    return result
+
+
+async def _check_endpoints(specs: list, concurrency: int, timeout: float, cache_seconds: float, warn_days: float) -> list:
+    semaphore = asyncio.Semaphore(max(1, int(concurrency)))
+    return await asyncio.gather(*(_check_endpoint(spec, semaphore, timeout, cache_seconds, warn_days) for spec in specs))
+
+
+def _check_file(spec: dict, warn_days: float) -> dict:
+    result = _result(spec, str(spec["file"]))
+    try:
+        result["chain"] = read_pem_chain(spec["file"])
+    except (OSError, ssl.SSLError, ValueError, KeyError) as e:
+        result["detail"] = str(e) or type(e).__name__
+        return result
+    result.update(evaluate(result["chain"], warn_days))
+    return result
+
+
+def check_certificates(specs: list, warn_days: float = 14.0, concurrency: int = 50, timeout: float = 5.0,
+                       cache_seconds: float = 3600.0, file_workers: int = 4) -> list:
+    """Expiry of every certificate spec ({"host", "port", "server_name"} or {"file"}); results in the order of specs.
+
+    Result dict: name, source, status (ok / expiring / expired / error), detail, days_left,
+    not_after (UTC), chain (subject, issuer, serial, san, not_after per certificate) and
+    cached (endpoint certificates read from the cache instead of a new handshake).
+    """
+    specs = [dict(spec) for spec in specs]
+    endpoints = [spec for spec in specs if "file" not in spec]
+    files = [spec for spec in specs if "file" in spec]
+    by_id = {}
+    if files:
+        with ThreadPoolExecutor(max_workers=max(1, min(int(file_workers), len(files))), thread_name_prefix="certs") as pool:
+            for spec, result in zip(files, pool.map(lambda s: _check_file(s, warn_days), files)):
+                by_id[id(spec)] = result
+    if endpoints:
+        results = asyncio.run(_check_endpoints(endpoints, concurrency, float(timeout), float(cache_seconds), float(warn_days)))
+        for spec, result in zip(endpoints, results):
+            by_id[id(spec)] = result
+    return [by_id[id(spec)] for spec in specs]
@@ -0,0 +1,108 @@
+from pathlib import Path
+from collections.abc import Mapping
+import json
+import os
+import threading
+
+CONF_PATH = Path(__file__).resolve().parent.parent / "conf.json"
+
+# sections every module relies on; everything else is optional and read with defaults
+REQUIRED_SECTIONS = ("general", "logging", "db")
+
+_LOCK = threading.Lock()
+_CACHE = {"path": None, "mtime_ns": None, "data": None}
+
+
+class configSection(Mapping):
+    """Read-only view on one (nested) section of conf.json with typed accessors."""
+
+    def __init__(self, data: dict, name: str = "conf.json") -> None:
+        self._name = name
+        self._data = {key: _freeze(value, f"{name}.{key}") for key, value in data.items()}
+
+    def __getitem__(self, key):
+        return self._data[key]
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __repr__(self) -> str:
+        return f"configSection({self._name}, keys={list(self._data)})"
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    def section(self, key: str) -> "configSection":
+        """Return a nested section; a missing section is returned as an empty view."""
+        value = self._data.get(key)
+        if value is None:
+            return configSection({}, f"{self._name}.{key}")
+        if not isinstance(value, configSection):
+            raise ValueError(f"{self._name}.{key} is not a section")
+        return value
+
+    def get_bool(self, key: str, default: bool = False) -> bool:
+        return bool(self._data.get(key, default))
+
+    def get_int(self, key: str, default: int = 0) -> int:
+        return int(self._data.get(key, default))
+
+    def get_float(self, key: str, default: float = 0.0) -> float:
+        return float(self._data.get(key, default))
+
+    def get_str(self, key: str, default: str = "") -> str:
+        value = self._data.get(key, default)
+        return default if value is None else str(value)
+
+    def get_list(self, key: str, default: tuple = ()) -> list:
+        return list(self._data.get(key, default) or ())
+
+
+def _freeze(value, name: str):
+    if isinstance(value, dict):
+        return configSection(value, name)
+    if isinstance(value, list):
+        return tuple(_freeze(v, name) for v in value)
+    return value
+
+
+def _validate(raw, path: Path) -> None:
+    if not isinstance(raw, dict):
+        raise ValueError(f"{path}: top-level element must be an object")
+    for name in REQUIRED_SECTIONS:
+        if not isinstance(raw.get(name), dict):
+            raise ValueError(f"{path}: required section '{name}' is missing or not an object")
+    for name, section in raw.items():
+        if isinstance(section, dict) and "is_active" in section and not isinstance(section["is_active"], bool):
+            raise ValueError(f"{path}: '{name}.is_active' must be true or false")
+
+
+def load_config(path=None) -> configSection:
+    """Return the parsed conf.json, re-reading it only when its mtime changed."""
+    conf_path = Path(path) if path else CONF_PATH
+    mtime_ns = os.stat(conf_path).st_mtime_ns
+
+    with _LOCK:
+        if _CACHE["data"] is not None and _CACHE["path"] == conf_path and _CACHE["mtime_ns"] == mtime_ns:
+            return _CACHE["data"]
+
+        with open(conf_path, "r") as f:
+            raw = json.loads(f.read())
+        _validate(raw, conf_path)
+
+        data = configSection(raw)
+        _CACHE.update(path=conf_path, mtime_ns=mtime_ns, data=data)
+        return data
+
+
+def get_section(name: str, path=None) -> configSection:
+    return load_config(path).section(name)
+
+
+def clear_cache() -> None:
+    with _LOCK:
+        _CACHE.update(path=None, mtime_ns=None, data=None)
@@ -0,0 +1,101 @@
+import asyncio
+import socket
+import time
+
+from utils.dnsResolver import parse_server
+
+# Internet connectivity check against several well-known targets (IPv4 and IPv6), in the
+# style of happy eyeballs (RFC 8305): the connects start a few milliseconds apart,
+# alternating between the address families, and the first answer decides. A single lost
+# packet therefore no longer marks the internet as down, and a reachable internet is
+# detected in about one round trip instead of waiting for the slowest target.
+
+DEFAULT_TARGETS = ["1.1.1.1:53", "8.8.8.8:53", "[2606:4700:4700::1111]:53", "[2001:4860:4860::8888]:53"]
+
+STATUS_OK = "ok"
+STATUS_TIMEOUT = "timeout"
+STATUS_REFUSED = "refused"
+STATUS_ERROR = "error"
+# started, but the verdict was reached before it finished
+STATUS_CANCELLED = "cancelled"
+
+
+def _family(host: str) -> int:
+    return socket.AF_INET6 if ":" in host else socket.AF_INET
+
+
+def _label(host: str, port: int) -> str:
+    return f"[{host}]:{port}" if ":" in host else f"{host}:{port}"
+
+
+def interleave_families(targets: list) -> list:
+    """(host, port) targets in alternating address families, starting with the family of the first one."""
+    if not targets:
+        return []
+    first = _family(targets[0][0])
+    same = [t for t in targets if _family(t[0]) == first]
+    other = [t for t in targets if _family(t[0]) != first]
+    ordered = []
+    for i in range(max(len(same), len(other))):
+        ordered += same[i:i + 1] + other[i:i + 1]
+    return ordered
+
+
+async def _attempt(host: str, port: int, delay: float, timeout: float) -> dict:
+    result = {"target": _label(host, port), "status": STATUS_OK, "rtt_ms": None, "detail": ""}
+    await asyncio.sleep(delay)
+    loop = asyncio.get_running_loop()
+    start = time.perf_counter()
+    try:
+        transport, _ = await asyncio.wait_for(loop.create_connection(asyncio.Protocol, host, port), timeout)
+        result["rtt_ms"] = round((time.perf_counter() - start) * 1000.0, 3)
+        transport.abort()
+    except asyncio.TimeoutError:
+        result.update(status=STATUS_TIMEOUT, detail=f"no answer within {timeout:g}s")
+    except ConnectionRefusedError as e:
+        result.update(status=STATUS_REFUSED, detail=str(e))
+    except OSError as e:
+        result.update(status=STATUS_ERROR, detail=str(e) or type(e).__name__)
+    return result
+
+
+async def _check(targets: list, timeout: float, quorum: int, stagger: float) -> dict:
+    start = time.perf_counter()
+    ordered = interleave_families(targets)
+    tasks = [asyncio.ensure_future(_attempt(host, port, i * stagger, timeout)) for i, (host, port) in enumerate(ordered)]
+    finished = {}
+    reachable = False
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            result = await next_done
+            finished[result["target"]] = result
+            if result["status"] == STATUS_OK:
+                reachable = True
+                break
+            if sum(1 for r in finished.values() if r["status"] != STATUS_OK) >= quorum:
+                break
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    decided_ms = round((time.perf_counter() - start) * 1000.0, 3)
+
+    results = []
+    for host, port in targets:
+        name = _label(host, port)
+        results.append(finished.get(name) or {"target": name, "status": STATUS_CANCELLED, "rtt_ms": None, "detail": ""})
+    return {"reachable": reachable, "decided_ms": decided_ms, "targets": results}
+
+
+def check_connectivity(targets: list = None, timeout: float = 3.0, quorum: int = 0, stagger_ms: float = 50.0) -> dict:
+    """Probe all targets ("ip:port", "[ipv6]:port"; port defaults to 53) concurrently.
+
+    The internet counts as reachable as soon as one target accepts a TCP connection, and
+    as unreachable once `quorum` targets failed (0 = all of them). Every connect is bounded
+    by `timeout`. Returns reachable, decided_ms (time to the verdict) and one result per
+    target (in the configured order) with status and rtt_ms.
+    """
+    parsed = list(dict.fromkeys(parse_server(t) for t in (targets or DEFAULT_TARGETS)))
+    quorum = int(quorum)
+    quorum = len(parsed) if quorum <= 0 else min(quorum, len(parsed))
+    return asyncio.run(_check(parsed, float(timeout), quorum, max(0.0, float(stagger_ms)) / 1000.0))
@@ -1,24 +1,42 @@
 import sqlite3
-import json
+import threading
+import time
 import traceback
-from pathlib import Path
 from datetime import datetime
 from sys import exit as adieu
-import pandas as pd
+from typing import TYPE_CHECKING
 
 from utils.log import log
+from utils.config import load_config
+
+if TYPE_CHECKING:
+    # pandas is heavy: it is only imported by the report/export methods that need it
+    import pandas as pd
+
+# values the report treats as "true"/"false"; anything else counts as true if it is a non-zero number
+TRUE_VALUES = ("1", "true", "t", "yes", "y", "active", "up", "on")
+FALSE_VALUES = ("0", "false", "f", "no", "n", "inactive", "down", "off")
+
+
+def sql_is_true(column: str) -> str:
+    """SQL expression that evaluates a TEXT column to 1/0 with the report's truthiness rules."""
+    true_list = ", ".join(f"'{v}'" for v in TRUE_VALUES)
+    false_list = ", ".join(f"'{v}'" for v in FALSE_VALUES)
+    return (
+        f"CASE WHEN LOWER(TRIM({column})) IN ({true_list}) THEN 1 "
+        f"WHEN LOWER(TRIM({column})) IN ({false_list}) THEN 0 "
+        f"WHEN CAST(TRIM({column}) AS REAL) != 0 THEN 1 ELSE 0 END"
+    )
+
 
 class db:
     def __init__(self) -> None:
         try:
             # -- Get config-parameters --
-            path = Path(__file__).resolve().parent.parent / "conf.json"
-
-            with open(f"{path}", "r") as f:
-                j = json.loads(f.read())
+            j = load_config()
 
-                self.is_active: bool = j["db"]["is_active"]
-                self.db_path: str = j["db"]["db_path"]
+            self.is_active: bool = j["db"]["is_active"]
+            self.db_path: str = j["db"]["db_path"]
 
             self.logger = log()
 
@@ -30,7 +48,9 @@ class db:
                 return
 
             # connect and initialize DB
-            self.conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+            self._lock = threading.RLock()
+            # modules of one run write concurrently through their own connections: wait for the lock instead of failing
+            self.conn = sqlite3.connect(str(self.db_path), check_same_thread=False, timeout=30)
             self.conn.row_factory = sqlite3.Row
             self.cursor = self.conn.cursor()
 
@@ -71,10 +91,15 @@ class db:
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
                     timestamp TEXT,
                     service_name TEXT,
-                    is_active TEXT
+                    is_active TEXT,
+                    active_state TEXT,
+                    sub_state TEXT,
+                    n_restarts INTEGER
                 )
                 """
             )
+            # DBs created before the systemd details were stored get the new columns
+            self.__add_missing_columns("service_checks", {"active_state": "TEXT", "sub_state": "TEXT", "n_restarts": "INTEGER"})
 
             self.cursor.execute(
                 """
@@ -87,12 +112,99 @@ class db:
                 """
             )
 
+            self.cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS alert_outbox (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    created_at TEXT,
+                    connector TEXT,
+                    subject TEXT,
+                    template_id TEXT,
+                    html TEXT,
+                    context TEXT,
+                    status TEXT,
+                    attempts INTEGER DEFAULT 0,
+                    next_attempt_at REAL,
+                    claimed_at REAL,
+                    last_error TEXT,
+                    delivered_at TEXT
+                )
+                """
+            )
+            self.cursor.execute(
+                "CREATE INDEX IF NOT EXISTS idx_alert_outbox_due ON alert_outbox (status, next_attempt_at)"
+            )
+
+            self.cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS alert_state (
+                    module TEXT,
+                    subject TEXT,
+                    state TEXT,
+                    value TEXT,
+                    first_seen TEXT,
+                    last_change REAL,
+                    last_notified REAL,
+                    PRIMARY KEY (module, subject)
+                )
+                """
+            )
+
+            # per-day report aggregates, maintained incrementally (see refresh_report_aggregates)
+            self.cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS report_daily_aggregates (
+                    source TEXT,
+                    date TEXT,
+                    key TEXT,
+                    total INTEGER,
+                    true_count INTEGER,
+                    PRIMARY KEY (source, date, key)
+                )
+                """
+            )
+            self.cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS report_state (
+                    name TEXT PRIMARY KEY,
+                    value TEXT
+                )
+                """
+            )
+
+            # numeric measurements of the script itself and of checks (latencies, run overlaps, ...);
+            # subject names what was measured, e.g. a domain or probe
+            self.cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS metrics (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    timestamp TEXT,
+                    module TEXT,
+                    name TEXT,
+                    subject TEXT,
+                    value REAL
+                )
+                """
+            )
+            self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_metrics_name_ts ON metrics (name, timestamp)")
+
+            # the report filters every table by its plot window (relative to the newest timestamp)
+            self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_file_checks_ts ON file_checks (timestamp)")
+            self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_service_checks_ts ON service_checks (timestamp)")
+            self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_host_checks_name_ts ON host_checks (name, timestamp)")
+
             self.conn.commit()
             self.logger.info("sqlite_handler: Tables ready.")
         except Exception:
             self.logger.error("sqlite_handler/init_db: {0}".format(traceback.format_exc()))
             adieu(1)
 
+    def __add_missing_columns(self, table: str, columns: dict) -> None:
+        existing = {row[1] for row in self.cursor.execute(f"PRAGMA table_info({table})").fetchall()}
+        for name, sql_type in columns.items():
+            if name not in existing:
+                self.cursor.execute(f"ALTER TABLE {table} ADD COLUMN {name} {sql_type}")
+
     def save_file_check(self, file_path: str, file_hash: str, changed: str) -> None:
         try:
             # skip ingestion when DB module is deactivated
@@ -110,12 +222,12 @@ class db:
                 (ts, file_path, file_hash, changed),
             )
             self.conn.commit()
-            self.logger.info(f"sqlite_handler: Saved file check for {file_path} (changed={changed})")
+            self.logger.info(f"sqlite_handler: Saved file check for {file_path} (changed={changed})", path=file_path)
         except Exception:
             self.logger.error("sqlite_handler/save_file_check: {0}".format(traceback.format_exc()))
             adieu(1)
 
-    def save_service_check(self, service_name: str, is_active: str) -> None:
+    def save_service_check(self, service_name: str, is_active: str, active_state: str = None, sub_state: str = None, n_restarts: int = None) -> None:
         try:
             # skip ingestion when DB module is deactivated
             if not getattr(self, "is_active", False) or not getattr(self, "conn", None):
@@ -128,11 +240,11 @@ class db:
             ts = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
             self.cursor.execute(
-                "INSERT INTO service_checks (timestamp, service_name, is_active) VALUES (?, ?, ?)",
-                (ts, service_name, is_active),
+                "INSERT INTO service_checks (timestamp, service_name, is_active, active_state, sub_state, n_restarts) VALUES (?, ?, ?, ?, ?, ?)",
+                (ts, service_name, is_active, active_state, sub_state, n_restarts),
             )
             self.conn.commit()
-            self.logger.info(f"sqlite_handler: Saved service check for {service_name} (is_active={is_active})")
+            self.logger.info(f"sqlite_handler: Saved service check for {service_name} (is_active={is_active})", service=service_name)
         except Exception:
             self.logger.error("sqlite_handler/save_service_check: {0}".format(traceback.format_exc()))
             adieu(1)
@@ -154,12 +266,38 @@ class db:
                 (ts, name, observed_value),
             )
             self.conn.commit()
-            self.logger.info(f"sqlite_handler: Saved host check for {name} (value={observed_value})")
+            self.logger.info(f"sqlite_handler: Saved host check for {name} (value={observed_value})", metric=name)
         except Exception:
             self.logger.error("sqlite_handler/save_host_check: {0}".format(traceback.format_exc()))
             adieu(1)
 
-    def load_table_for_report(self, table_name: str, limit: int = 0) -> pd.DataFrame:
+    def save_metrics(self, module: str, metrics: list) -> None:
+        """Store numeric metrics given as (name, subject, value) tuples in one transaction."""
+        try:
+            if not getattr(self, "is_active", False) or not getattr(self, "conn", None):
+                try:
+                    self.logger.info(f"sqlite_handler: DB disabled - skipping {len(metrics)} metric(s) of {module}")
+                except Exception:
+                    pass
+                return
+
+            ts = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            with self._lock:
+                self.cursor.executemany(
+                    "INSERT INTO metrics (timestamp, module, name, subject, value) VALUES (?, ?, ?, ?, ?)",
+                    [(ts, module, name, subject, None if value is None else float(value)) for name, subject, value in metrics],
+                )
+                self.conn.commit()
+            self.logger.info(f"sqlite_handler: Saved {len(metrics)} metric(s) of {module}", module=module)
+        except Exception:
+            self.logger.error("sqlite_handler/save_metrics: {0}".format(traceback.format_exc()))
+            adieu(1)
+
+    def save_metric(self, module: str, name: str, value: float, subject: str = None) -> None:
+        self.save_metrics(module, [(name, subject, value)])
+
+    def load_table_for_report(self, table_name: str, limit: int = 0) -> "pd.DataFrame":
+        import pandas as pd
         try:
             if limit == 0:
                 return pd.read_sql_query(f"SELECT * FROM {table_name}", self.conn)
@@ -209,6 +347,281 @@ class db:
             self.logger.error("sqlite_handler/get_recent_host_checks: {0}".format(traceback.format_exc()))
             adieu(1)
 
+    def __window_clause(self, source: str, days: int) -> tuple:
+        # days of the last `days` days before the newest aggregated day, matching the plots' x-axis range
+        if not days or int(days) <= 0:
+            return "source = ?", (source,)
+        return (
+            "source = ? AND date >= (SELECT date(MAX(date), ?) FROM report_daily_aggregates WHERE source = ?)",
+            (source, f"-{int(days)} days", source),
+        )
+
+    def count_rows(self, table_name: str) -> int:
+        try:
+            with self._lock:
+                self.cursor.execute(f"SELECT COUNT(*) FROM {table_name}")
+                return int(self.cursor.fetchone()[0])
+        except Exception:
+            self.logger.error("sqlite_handler/count_rows: {0}".format(traceback.format_exc()))
+            return 0
+
+    def max_row_id(self, table_name: str) -> int:
+        with self._lock:
+            self.cursor.execute(f"SELECT COALESCE(MAX(id), 0) FROM {table_name}")
+            return int(self.cursor.fetchone()[0])
+
+    def get_report_state(self, name: str, default: str = None) -> str:
+        with self._lock:
+            self.cursor.execute("SELECT value FROM report_state WHERE name = ?", (name,))
+            row = self.cursor.fetchone()
+        return row[0] if row else default
+
+    def set_report_state(self, name: str, value: str) -> None:
+        with self._lock:
+            self.cursor.execute("INSERT OR REPLACE INTO report_state (name, value) VALUES (?, ?)", (name, str(value)))
+            self.conn.commit()
+
+    def refresh_report_aggregates(self) -> dict:
+        """Fold rows ingested since the last refresh into report_daily_aggregates.
+
+        Per source table the id of the last folded row is kept as high-water mark in
+        report_state, so every refresh only reads the new rows. Returns the number of
+        newly folded rows per table.
+        """
+        sources = {
+            # table -> (key column, truth column); file changes are counted per day only
+            "file_checks": ("''", "changed"),
+            "service_checks": ("service_name", "is_active"),
+        }
+        folded = {}
+        try:
+            with self._lock:
+                for table, (key_col, flag_col) in sources.items():
+                    hwm = int(self.get_report_state(f"hwm_{table}", 0))
+                    max_id = self.max_row_id(table)
+                    if max_id < hwm:
+                        # the table was emptied or recreated: rebuild its aggregates
+                        self.cursor.execute("DELETE FROM report_daily_aggregates WHERE source = ?", (table,))
+                        hwm = 0
+                    if max_id == hwm:
+                        folded[table] = 0
+                        continue
+
+                    self.cursor.execute(
+                        f"""
+                        INSERT INTO report_daily_aggregates (source, date, key, total, true_count)
+                        SELECT ?, date(timestamp), {key_col}, COUNT(*), SUM({sql_is_true(flag_col)})
+                        FROM {table}
+                        WHERE id > ? AND id <= ? AND date(timestamp) IS NOT NULL
+                        GROUP BY date(timestamp), {key_col}
+                        ON CONFLICT (source, date, key) DO UPDATE SET
+                            total = total + excluded.total,
+                            true_count = true_count + excluded.true_count
+                        """,
+                        (table, hwm, max_id),
+                    )
+                    self.cursor.execute(
+                        "INSERT OR REPLACE INTO report_state (name, value) VALUES (?, ?)", (f"hwm_{table}", str(max_id))
+                    )
+                    folded[table] = max_id - hwm
+                self.conn.commit()
+            return folded
+        except Exception:
+            self.conn.rollback()
+            self.logger.error("sqlite_handler/refresh_report_aggregates: {0}".format(traceback.format_exc()))
+            adieu(1)
+
+    def aggregate_daily_file_changes(self, days: int = 0) -> "pd.DataFrame":
+        """Changed files per day (columns: date, changed_files)."""
+        import pandas as pd
+        try:
+            self.refresh_report_aggregates()
+            where, params = self.__window_clause("file_checks", days)
+            query = (
+                "SELECT date, SUM(true_count) AS changed_files FROM report_daily_aggregates "
+                f"WHERE {where} GROUP BY date ORDER BY date"
+            )
+            return pd.read_sql_query(query, self.conn, params=params)
+        except Exception:
+            self.logger.error("sqlite_handler/aggregate_daily_file_changes: {0}".format(traceback.format_exc()))
+            adieu(1)
+
+    def aggregate_service_uptime(self, days: int = 0) -> "pd.DataFrame":
+        """Checks and active checks per service (columns: service_name, checks, active_checks)."""
+        import pandas as pd
+        try:
+            self.refresh_report_aggregates()
+            where, params = self.__window_clause("service_checks", days)
+            query = (
+                "SELECT key AS service_name, SUM(total) AS checks, SUM(true_count) AS active_checks "
+                f"FROM report_daily_aggregates WHERE {where} GROUP BY key"
+            )
+            return pd.read_sql_query(query, self.conn, params=params)
+        except Exception:
+            self.logger.error("sqlite_handler/aggregate_service_uptime: {0}".format(traceback.format_exc()))
+            adieu(1)
+
+    def aggregate_daily_down_events(self, days: int = 0) -> "pd.DataFrame":
+        """Inactive service checks per day (columns: date, down_events)."""
+        import pandas as pd
+        try:
+            self.refresh_report_aggregates()
+            where, params = self.__window_clause("service_checks", days)
+            query = (
+                "SELECT date, SUM(total - true_count) AS down_events FROM report_daily_aggregates "
+                f"WHERE {where} GROUP BY date ORDER BY date"
+            )
+            return pd.read_sql_query(query, self.conn, params=params)
+        except Exception:
+            self.logger.error("sqlite_handler/aggregate_daily_down_events: {0}".format(traceback.format_exc()))
+            adieu(1)
+
+    def __host_metric_query(self, select: str, name: str, days: int) -> tuple:
+        if not days or int(days) <= 0:
+            return f"SELECT {select} FROM host_checks WHERE name = ?", (name,)
+        query = (
+            f"SELECT {select} FROM host_checks WHERE name = ? "
+            "AND timestamp >= (SELECT date(MAX(timestamp), ?) FROM host_checks WHERE name = ?)"
+        )
+        return query, (name, f"-{int(days)} days", name)
+
+    def load_metric(self, name: str, days: int = 0) -> "pd.DataFrame":
+        """Values of one metric of the metrics table within the plot window (columns: timestamp, subject, value)."""
+        import pandas as pd
+
+        try:
+            query = "SELECT timestamp, subject, value FROM metrics WHERE name = ?"
+            params = (name,)
+            if days and int(days) > 0:
+                query += " AND timestamp >= (SELECT date(MAX(timestamp), ?) FROM metrics WHERE name = ?)"
+                params = (name, f"-{int(days)} days", name)
+            return pd.read_sql_query(query, self.conn, params=params)
+        except Exception:
+            self.logger.error("sqlite_handler/load_metric: {0}".format(traceback.format_exc()))
+            adieu(1)
+
+    def load_host_metric(self, name: str, days: int = 0) -> "pd.DataFrame":
+        """Raw values of one host metric within the plot window (columns: timestamp, observed_value)."""
+        import pandas as pd
+        try:
+            query, params = self.__host_metric_query("timestamp, observed_value", name, days)
+            return pd.read_sql_query(query, self.conn, params=params)
+        except Exception:
+            self.logger.error("sqlite_handler/load_host_metric: {0}".format(traceback.format_exc()))
+            adieu(1)
+
+    def iter_host_metric(self, name: str, days: int = 0, chunk_size: int = 50_000):
+        """Like load_host_metric, but yields DataFrames of at most chunk_size rows."""
+        import pandas as pd
+        query, params = self.__host_metric_query("timestamp, observed_value", name, days)
+        yield from pd.read_sql_query(query, self.conn, params=params, chunksize=int(chunk_size))
+
+    def host_metric_time_range(self, name: str, days: int = 0) -> tuple:
+        """(first, last) timestamp of one host metric within the plot window, or (None, None)."""
+        try:
+            query, params = self.__host_metric_query("MIN(timestamp), MAX(timestamp)", name, days)
+            with self._lock:
+                self.cursor.execute(query, params)
+                row = self.cursor.fetchone()
+            return (row[0], row[1]) if row else (None, None)
+        except Exception:
+            self.logger.error("sqlite_handler/host_metric_time_range: {0}".format(traceback.format_exc()))
+            return (None, None)
+
+    def enqueue_alert(self, connector: str, subject: str, template_id: str, html: str, context: str) -> int:
+        try:
+            if not getattr(self, "is_active", False) or not getattr(self, "conn", None):
+                raise RuntimeError("DB module is deactivated; alert outbox is not available")
+
+            ts = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+            with self._lock:
+                self.cursor.execute(
+                    "INSERT INTO alert_outbox (created_at, connector, subject, template_id, html, context, status, attempts, next_attempt_at) VALUES (?, ?, ?, ?, ?, ?, 'pending', 0, ?)",
+                    (ts, connector, subject, template_id, html, context, time.time()),
+                )
+                self.conn.commit()
+                alert_id = self.cursor.lastrowid
+            self.logger.info(f"sqlite_handler: Queued alert {alert_id} for {connector}", check="alert_outbox")
+            return alert_id
+        except Exception:
+            self.logger.error("sqlite_handler/enqueue_alert: {0}".format(traceback.format_exc()))
+            raise
+
+    def claim_due_alerts(self, limit: int = 50, stale_after_seconds: float = 600.0) -> list:
+        """Mark up to `limit` due alerts as 'sending' and return them.
+
+        Alerts left in 'sending' by a crashed worker are picked up again after stale_after_seconds.
+        """
+        try:
+            now = time.time()
+            with self._lock:
+                self.cursor.execute(
+                    """
+                    SELECT id, connector, subject, template_id, html, context, attempts FROM alert_outbox
+                    WHERE (status = 'pending' AND next_attempt_at <= ?)
+                       OR (status = 'sending' AND claimed_at < ?)
+                    ORDER BY id LIMIT ?
+                    """,
+                    (now, now - stale_after_seconds, limit),
+                )
+                rows = [dict(row) for row in self.cursor.fetchall()]
+                if rows:
+                    self.cursor.executemany(
+                        "UPDATE alert_outbox SET status = 'sending', claimed_at = ? WHERE id = ?",
+                        [(now, row["id"]) for row in rows],
+                    )
+                    self.conn.commit()
+            return rows
+        except Exception:
+            self.logger.error("sqlite_handler/claim_due_alerts: {0}".format(traceback.format_exc()))
+            return []
+
+    def update_alert_status(self, alert_id: int, status: str, attempts: int, last_error: str = None, next_attempt_at: float = None) -> None:
+        try:
+            delivered_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S") if status == "delivered" else None
+            with self._lock:
+                self.cursor.execute(
+                    "UPDATE alert_outbox SET status = ?, attempts = ?, last_error = ?, next_attempt_at = ?, delivered_at = ? WHERE id = ?",
+                    (status, attempts, last_error, next_attempt_at, delivered_at, alert_id),
+                )
+                self.conn.commit()
+        except Exception:
+            self.logger.error("sqlite_handler/update_alert_status: {0}".format(traceback.format_exc()))
+
+    def count_alerts_by_status(self) -> dict:
+        try:
+            with self._lock:
+                self.cursor.execute("SELECT status, COUNT(*) AS n FROM alert_outbox GROUP BY status")
+                return {row["status"]: row["n"] for row in self.cursor.fetchall()}
+        except Exception:
+            self.logger.error("sqlite_handler/count_alerts_by_status: {0}".format(traceback.format_exc()))
+            return {}
+
+    def get_alert_state(self, module: str, subject: str) -> dict:
+        try:
+            with self._lock:
+                self.cursor.execute(
+                    "SELECT module, subject, state, value, first_seen, last_change, last_notified FROM alert_state WHERE module = ? AND subject = ?",
+                    (module, subject),
+                )
+                row = self.cursor.fetchone()
+            return dict(row) if row else None
+        except Exception:
+            self.logger.error("sqlite_handler/get_alert_state: {0}".format(traceback.format_exc()))
+            return None
+
+    def save_alert_state(self, module: str, subject: str, state: str, value: str, first_seen: str, last_change: float, last_notified: float) -> None:
+        try:
+            with self._lock:
+                self.cursor.execute(
+                    "INSERT OR REPLACE INTO alert_state (module, subject, state, value, first_seen, last_change, last_notified) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (module, subject, state, value, first_seen, last_change, last_notified),
+                )
+                self.conn.commit()
+        except Exception:
+            self.logger.error("sqlite_handler/save_alert_state: {0}".format(traceback.format_exc()))
+
     def delete_db_data(self, table_name: str) -> None:
         try:
             if not getattr(self, "is_active", False) or not getattr(self, "conn", None):
@@ -219,6 +632,9 @@ class db:
                 return
 
             self.cursor.execute(f"DELETE FROM {table_name}")
+            # aggregates of deleted rows must not show up in later reports
+            self.cursor.execute("DELETE FROM report_daily_aggregates WHERE source = ?", (table_name,))
+            self.cursor.execute("DELETE FROM report_state WHERE name = ?", (f"hwm_{table_name}",))
             self.conn.commit()
             self.logger.info(f"sqlite_handler: Deleted all data from table {table_name}")
         except Exception:
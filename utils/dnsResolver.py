@@ -0,0 +1,209 @@
+import random
+import socket
+import struct
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Minimal DNS client (A records over UDP, TCP for truncated answers) for the DNS check.
+# Unlike socket.gethostbyname every query has a timeout, all domains are resolved
+# concurrently and the TTL of the answer is known, so answers can be cached for exactly
+# as long as they are valid.
+# It asks the DNS servers only: /etc/hosts, nsswitch.conf and the search domains of
+# resolv.conf are not consulted, so domain_list entries must be fully qualified.
+
+RESOLV_CONF = Path("/etc/resolv.conf")
+
+TYPE_A = 1
+CLASS_IN = 1
+RCODE_NXDOMAIN = 3
+FLAG_TRUNCATED = 0x0200  # TC: the answer did not fit into the UDP datagram
+
+STATUS_OK = "ok"
+STATUS_NXDOMAIN = "nxdomain"
+STATUS_NO_ADDRESS = "no_address"
+STATUS_ERROR = "error"
+STATUS_TIMEOUT = "timeout"
+
+# process-wide answer cache (domain -> (expires_at, result)), shared by all resolvers so a
+# daemon keeps it across runs and config reloads
+_CACHE_LOCK = threading.Lock()
+_CACHE = {}
+
+
+def clear_cache() -> None:
+    with _CACHE_LOCK:
+        _CACHE.clear()
+
+
+def parse_server(server: str) -> tuple:
+    """'192.0.2.53', '192.0.2.53:5353', '2001:db8::53' or '[2001:db8::53]:5353' -> (host, port)."""
+    server = server.strip()
+    if server.startswith("["):
+        host, _, port = server[1:].partition("]")
+        return host, int(port.lstrip(":") or 53)
+    if server.count(":") == 1:
+        host, port = server.split(":")
+        return host, int(port)
+    return server, 53
+
+
+def system_nameservers(path: Path = RESOLV_CONF) -> list:
+    try:
+        lines = path.read_text().splitlines()
+    except OSError:
+        return []
+    servers = []
+    for line in lines:
+        parts = line.split()
+        if len(parts) >= 2 and parts[0] == "nameserver":
+            servers.append(parts[1].split("%")[0])  # drop the zone of link-local IPv6 servers
+    return servers
+
+
+def build_query(query_id: int, domain: str) -> bytes:
+    header = struct.pack("!HHHHHH", query_id, 0x0100, 1, 0, 0, 0)  # recursion desired, one question
+    labels = b"".join(bytes([len(label)]) + label for label in domain.rstrip(".").encode("idna").split(b".") if label)
+    return header + labels + b"\x00" + struct.pack("!HH", TYPE_A, CLASS_IN)
+
+
+def _skip_name(message: bytes, offset: int) -> int:
+    while True:
+        length = message[offset]
+        if length & 0xC0 == 0xC0:  # compression pointer ends the name
+            return offset + 2
+        offset += 1
+        if length == 0:
+            return offset
+        offset += length
+
+
+def parse_response(message: bytes) -> dict:
+    """rcode, A record addresses and the smallest TTL of the answer section."""
+    query_id, flags, qdcount, ancount = struct.unpack("!HHHH", message[:8])
+    offset = 12
+    for _ in range(qdcount):
+        offset = _skip_name(message, offset) + 4
+    addresses, ttls = [], []
+    for _ in range(ancount):
+        offset = _skip_name(message, offset)
+        rtype, rclass, ttl, rdlength = struct.unpack("!HHIH", message[offset:offset + 10])
+        offset += 10
+        if rtype == TYPE_A and rclass == CLASS_IN and rdlength == 4:
+            addresses.append(socket.inet_ntoa(message[offset:offset + 4]))
+        ttls.append(ttl)  # CNAMEs on the way count as well
+        offset += rdlength
+    return {
+        "id": query_id, "rcode": flags & 0x000F, "truncated": bool(flags & FLAG_TRUNCATED),
+        "addresses": addresses, "ttl": min(ttls) if ttls else 0,
+    }
+
+
+class dnsResolver:
+    """Resolves many domains concurrently with a per-query timeout and a TTL-aware cache."""
+
+    def __init__(self, servers: list = None, timeout: float = 2.0, max_workers: int = 16, cache_max_ttl: float = 300.0) -> None:
+        self.servers = [parse_server(s) for s in (servers or system_nameservers() or ["127.0.0.1"])]
+        self.timeout = float(timeout)
+        self.max_workers = max(1, int(max_workers))
+        # answers are cached for their TTL, but never longer than this (0 disables the cache)
+        self.cache_max_ttl = float(cache_max_ttl)
+
+    def __query(self, domain: str, host: str, port: int, deadline: float) -> dict:
+        family = socket.AF_INET6 if ":" in host else socket.AF_INET
+        query_id = random.randrange(0x10000)
+        with socket.socket(family, socket.SOCK_DGRAM) as sock:
+            sock.connect((host, port))  # only datagrams from this server are received
+            sock.send(build_query(query_id, domain))
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise socket.timeout()
+                sock.settimeout(remaining)
+                answer = parse_response(sock.recv(4096))
+                if answer["id"] == query_id:
+                    break
+        if answer["truncated"]:
+            # a large record set: ask the same server again over TCP for the complete answer
+            return self.__query_tcp(domain, host, port, deadline)
+        return answer
+
+    def __query_tcp(self, domain: str, host: str, port: int, deadline: float) -> dict:
+        query_id = random.randrange(0x10000)
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise socket.timeout()
+        with socket.create_connection((host, port), timeout=remaining) as sock:
+            query = build_query(query_id, domain)
+            sock.sendall(struct.pack("!H", len(query)) + query)
+            # DNS over TCP: every message is prefixed with its length (RFC 1035 4.2.2)
+            (length,) = struct.unpack("!H", self.__recv_exactly(sock, 2, deadline))
+            answer = parse_response(self.__recv_exactly(sock, length, deadline))
+        if answer["id"] != query_id:
+            raise OSError("DNS answer over TCP does not match the query")
+        return answer
+
+    @staticmethod
+    def __recv_exactly(sock, size: int, deadline: float) -> bytes:
+        data = b""
+        while len(data) < size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise socket.timeout()
+            sock.settimeout(remaining)
+            chunk = sock.recv(size - len(data))
+            if not chunk:
+                raise OSError("DNS server closed the TCP connection")
+            data += chunk
+        return data
+
+    def resolve(self, domain: str) -> dict:
+        """Result dict: domain, status, addresses, ttl, latency_ms, cached, server."""
+        now = time.monotonic()
+        with _CACHE_LOCK:
+            cached = _CACHE.get(domain)
+        if cached and cached[0] > now:
+            return dict(cached[1], cached=True)
+
+        start = time.monotonic()
+        # the timeout bounds the whole lookup; servers are tried in order, each within its
+        # share of the time that is left, so a silent first server cannot use all of it
+        deadline = start + self.timeout
+        result = {"domain": domain, "status": STATUS_TIMEOUT, "addresses": [], "ttl": 0, "latency_ms": None, "cached": False, "server": None}
+        for index, (host, port) in enumerate(self.servers):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                answer = self.__query(domain, host, port, time.monotonic() + remaining / (len(self.servers) - index))
+            except socket.timeout:
+                continue
+            except (OSError, struct.error, IndexError, UnicodeError) as e:
+                result.update(status=STATUS_ERROR, error=str(e) or type(e).__name__)
+                continue
+            if answer["rcode"] == RCODE_NXDOMAIN:
+                status = STATUS_NXDOMAIN
+            elif answer["rcode"] != 0:
+                status = STATUS_ERROR
+            else:
+                status = STATUS_OK if answer["addresses"] else STATUS_NO_ADDRESS
+            result.update(status=status, addresses=answer["addresses"], ttl=answer["ttl"], server=f"{host}:{port}")
+            result.pop("error", None)
+            if status in (STATUS_OK, STATUS_NXDOMAIN):
+                break
+        result["latency_ms"] = round((time.monotonic() - start) * 1000.0, 3)
+
+        ttl = min(float(result["ttl"]), self.cache_max_ttl)
+        if result["status"] == STATUS_OK and ttl > 0:
+            with _CACHE_LOCK:
+                _CACHE[domain] = (time.monotonic() + ttl, result)
+        return result
+
+    def resolve_all(self, domains: list) -> dict:
+        """domain -> result; all lookups run at the same time, so this takes about as long as the slowest one."""
+        domains = list(dict.fromkeys(domains))
+        if not domains:
+            return {}
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(domains)), thread_name_prefix="dns") as pool:
+            return dict(zip(domains, pool.map(self.resolve, domains)))
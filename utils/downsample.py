@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+
+# Downsampling of long time series before plotting. The cost of a plot then depends on
+# the point budget only, not on the length of the history.
+
+
+def _as_float(x) -> np.ndarray:
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64):
+        return x.astype("datetime64[ns]").astype("int64").astype("float64")
+    return x.astype("float64")
+
+
+def lttb_indices(x, y, threshold: int) -> np.ndarray:
+    """Indices of the points kept by Largest-Triangle-Three-Buckets.
+
+    x must be sorted ascending. The first and last point are always kept; from every
+    bucket in between the point forming the largest triangle with the previously kept
+    point and the average of the next bucket is selected, which preserves peaks.
+    """
+    x = _as_float(x)
+    y = np.asarray(y, dtype="float64")
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    # bucket boundaries for the n - 2 inner points
+    edges = (np.arange(threshold - 1) * (n - 2) / (threshold - 2)).astype(np.int64) + 1
+    edges[-1] = n - 1
+
+    # average point of every bucket (vectorized); the one after the last bucket is the last point
+    csx = np.concatenate(([0.0], np.cumsum(x)))
+    csy = np.concatenate(([0.0], np.cumsum(y)))
+    counts = edges[1:] - edges[:-1]
+    avg_x = np.append((csx[edges[1:]] - csx[edges[:-1]]) / counts, x[-1])
+    avg_y = np.append((csy[edges[1:]] - csy[edges[:-1]]) / counts, y[-1])
+
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        bx, by = x[start:end], y[start:end]
+        # twice the triangle area between point a, each candidate and the next bucket's average
+        area = np.abs((x[a] - avg_x[i + 1]) * (by - y[a]) - (x[a] - bx) * (avg_y[i + 1] - y[a]))
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+
+def minmax_envelope(x, y, buckets: int) -> pd.DataFrame:
+    """Min and max of y per bucket of consecutive points (columns: x, y_min, y_max)."""
+    x = np.asarray(x)
+    y = np.asarray(y, dtype="float64")
+    n = len(x)
+    if n == 0:
+        return pd.DataFrame({"x": x, "y_min": y, "y_max": y})
+    buckets = max(1, min(int(buckets), n))
+    starts = (np.arange(buckets) * n / buckets).astype(np.int64)
+    centers = np.minimum((starts + np.append(starts[1:], n)) // 2, n - 1)
+    return pd.DataFrame({
+        "x": x[centers],
+        "y_min": np.minimum.reduceat(y, starts),
+        "y_max": np.maximum.reduceat(y, starts),
+    })
+
+
+def downsample_frame(df: pd.DataFrame, x_col: str, y_cols: list, max_points: int) -> tuple:
+    """Reduce df to at most ~max_points rows per y column for plotting.
+
+    Returns (reduced frame, envelope of the first y column or None). The reduced frame
+    contains the union of the LTTB selections of all y columns; the envelope is only
+    returned when points were actually dropped.
+    """
+    if not max_points or len(df) <= max_points:
+        return df, None
+
+    keep = np.zeros(len(df), dtype=bool)
+    for col in y_cols:
+        valid = np.flatnonzero(df[col].notna().to_numpy())
+        if len(valid) == 0:
+            continue
+        picked = lttb_indices(df[x_col].to_numpy()[valid], df[col].to_numpy(dtype="float64")[valid], max_points)
+        keep[valid[picked]] = True
+
+    first = df[[x_col, y_cols[0]]].dropna()
+    envelope = minmax_envelope(first[x_col].to_numpy(), first[y_cols[0]].to_numpy(dtype="float64"), max_points)
+    return df.iloc[np.flatnonzero(keep)], envelope
@@ -0,0 +1,111 @@
+from utils.db import sql_is_true
+from utils.report_parsing import parse_load_averages
+from utils.sketch import streamingStats
+
+import glob
+import pandas as pd
+import sqlite3
+import traceback
+from pathlib import Path
+
+# Summaries of many hosts' result DBs for the fleet report. summarize_result_db runs in
+# worker processes: it only reads (the DB is opened read-only), keeps memory bounded and
+# returns a small picklable dict per host.
+
+RESULT_DB_PATTERN = "*.db"
+
+
+def resolve_result_dbs(spec: str) -> list:
+    """Result DB files for a directory (searched recursively) or a glob pattern."""
+    path = Path(spec)
+    if path.is_dir():
+        files = sorted(p for p in path.rglob(RESULT_DB_PATTERN) if p.is_file())
+    else:
+        files = sorted(Path(p) for p in glob.glob(spec, recursive=True) if Path(p).is_file())
+    return [str(p) for p in files]
+
+
+def host_names(paths: list) -> dict:
+    """path -> host name: the file name without suffix, or the parent folder when file names repeat
+    (e.g. <host>/monitoring_script_results.db)."""
+    stems = [Path(p).stem for p in paths]
+    names = {}
+    for path, stem in zip(paths, stems):
+        names[path] = Path(path).parent.name if stems.count(stem) > 1 else stem
+    return names
+
+
+def _window(table: str, days: int, extra: str = "") -> tuple:
+    # rows of the last `days` days before the newest row of this DB (like the single-host report)
+    where = f"WHERE 1 = 1 {extra}"
+    if not days or int(days) <= 0:
+        return where, ()
+    return (
+        f"{where} AND timestamp >= (SELECT date(MAX(timestamp), ?) FROM {table} WHERE 1 = 1 {extra})",
+        (f"-{int(days)} days",),
+    )
+
+
+def _table_exists(conn, table: str) -> bool:
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)).fetchone() is not None
+
+
+def summarize_result_db(path: str, host: str, days: int = 7, chunk_size: int = 50_000, max_changed_paths: int = 10) -> dict:
+    """Per-host aggregates of one result DB within the plot window."""
+    summary = {
+        "host": host, "path": path, "error": None,
+        "service_checks": 0, "active_checks": 0, "services": 0, "degraded_services": [],
+        "file_changes": 0, "changed_paths": [],
+        "load": streamingStats(), "last_seen": None,
+    }
+    try:
+        conn = sqlite3.connect(f"{Path(path).resolve().as_uri()}?mode=ro", uri=True)
+    except Exception:
+        summary["error"] = traceback.format_exc(limit=1).strip().splitlines()[-1]
+        return summary
+
+    try:
+        last_seen = []
+        if _table_exists(conn, "service_checks"):
+            where, params = _window("service_checks", days)
+            rows = conn.execute(
+                f"SELECT service_name, COUNT(*), SUM({sql_is_true('is_active')}) FROM service_checks {where} GROUP BY service_name",
+                params,
+            ).fetchall()
+            for service, checks, active in rows:
+                summary["service_checks"] += int(checks)
+                summary["active_checks"] += int(active or 0)
+                if active < checks:
+                    summary["degraded_services"].append(f"{service} ({100.0 * (active or 0) / checks:.1f}%)")
+            summary["services"] = len(rows)
+            last_seen.append(conn.execute("SELECT MAX(timestamp) FROM service_checks").fetchone()[0])
+
+        if _table_exists(conn, "file_checks"):
+            where, params = _window("file_checks", days, f"AND {sql_is_true('changed')} = 1")
+            summary["file_changes"] = int(conn.execute(f"SELECT COUNT(*) FROM file_checks {where}", params).fetchone()[0])
+            summary["changed_paths"] = [
+                row[0] for row in conn.execute(
+                    f"SELECT DISTINCT file_path FROM file_checks {where} ORDER BY file_path LIMIT ?", params + (int(max_changed_paths),)
+                )
+            ]
+            last_seen.append(conn.execute("SELECT MAX(timestamp) FROM file_checks").fetchone()[0])
+
+        if _table_exists(conn, "host_checks"):
+            # load averages are streamed in chunks into a quantile sketch (1 min value)
+            where, params = _window("host_checks", days, "AND name = 'load_average'")
+            cursor = conn.execute(f"SELECT observed_value FROM host_checks {where}", params)
+            while True:
+                rows = cursor.fetchmany(int(chunk_size))
+                if not rows:
+                    break
+                values = parse_load_averages(pd.Series([r[0] for r in rows], dtype=object))["v1"]
+                summary["load"].update(values.to_numpy())
+            last_seen.append(conn.execute("SELECT MAX(timestamp) FROM host_checks").fetchone()[0])
+
+        seen = [ts for ts in last_seen if ts]
+        summary["last_seen"] = max(seen) if seen else None
+    except Exception:
+        summary["error"] = traceback.format_exc(limit=1).strip().splitlines()[-1]
+    finally:
+        conn.close()
+    return summary
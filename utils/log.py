@@ -1,29 +1,76 @@
 from pathlib import Path
+from contextlib import contextmanager
+from datetime import datetime
 import json
+import threading
+import time
+
+from utils.config import load_config
+
+# one encoder for all JSON-lines records instead of building a new one per call
+_JSON_ENCODER = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"), default=str)
+_WRITE_LOCK = threading.Lock()
 
 class log:
 
     def __init__(self) -> None:
-        with open(Path(__file__).resolve().parent.parent / "conf.json", "r") as f:
-            j = json.loads(f.read())
-            
-            self.log_file_path: str = j["logging"]["log_file_path"]
-            self.is_active: bool = j["logging"]["is_active"]
-
-    def info(self, message: str) -> None:
-        if self.is_active:
-            with open(self.log_file_path, "a") as log_file:
-                log_file.write(f"[INFO] {message}\n")
+        j = load_config()
 
-    def warning(self, message: str) -> None:
-        if self.is_active:       
-            with open(self.log_file_path, "a") as log_file:
-                log_file.write(f"[WARNING] {message}\n")
+        self.log_file_path: str = j["logging"]["log_file_path"]
+        self.is_active: bool = j["logging"]["is_active"]
+        # "text" keeps the classic "[LEVEL] message" lines, "json" writes one JSON object per line
+        self.log_format: str = j["logging"].get("log_format", "text")
+
+    def __split_origin(self, message: str) -> tuple:
+        """Derive (module, check) from the 'module/check: ...' prefix used throughout the code base."""
+        head, sep, _ = message.partition(": ")
+        if not sep or " " in head:
+            return None, None
+        module, _, check = head.partition("/")
+        return module, (check or None)
+
+    def __format_json(self, level: str, message: str, fields: dict) -> str:
+        module, check = self.__split_origin(message)
+        record = {
+            "timestamp": datetime.now().isoformat(timespec="milliseconds"),
+            "level": level,
+            "module": fields.pop("module", module),
+            "check": fields.pop("check", check),
+            "duration_ms": fields.pop("duration_ms", None),
+            "message": message,
+        }
+        record.update(fields)
+        return _JSON_ENCODER.encode(record)
 
-    def error(self, message: str) -> None:
-        if self.is_active:      
+    def __write(self, level: str, message: str, fields: dict) -> None:
+        if not self.is_active:
+            return
+        if getattr(self, "log_format", "text") == "json":
+            line = self.__format_json(level, message, fields)
+        else:
+            line = f"[{level}] {message}"
+        with _WRITE_LOCK:
             with open(self.log_file_path, "a") as log_file:
-                log_file.write(f"[ERROR] {message}\n")
+                log_file.write(f"{line}\n")
+
+    def info(self, message: str, **fields) -> None:
+        self.__write("INFO", message, fields)
+
+    def warning(self, message: str, **fields) -> None:
+        self.__write("WARNING", message, fields)
+
+    def error(self, message: str, **fields) -> None:
+        self.__write("ERROR", message, fields)
+
+    @contextmanager
+    def timed(self, module: str, check: str, **fields):
+        """Log the wall-clock duration of the wrapped block as 'duration_ms'."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration_ms = round((time.perf_counter() - start) * 1000.0, 3)
+            self.info(f"{module}: Check '{check}' finished in {duration_ms} ms", module=module, check=check, duration_ms=duration_ms, **fields)
 
     def delete_logs(self) -> None:
         try:
@@ -32,4 +79,4 @@ class log:
         except FileNotFoundError:
             self.warning("Log file not found. Nothing to delete.")
         except Exception as e:
-            self.error(f"An error occurred while deleting log file: {e}")
\ No newline at end of file
+            self.error(f"An error occurred while deleting log file: {e}")
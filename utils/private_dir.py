@@ -0,0 +1,26 @@
+import os
+import stat
+from pathlib import Path
+
+
+def ensure_private_dir(path) -> Path:
+    """Create `path` (mode 0700) if needed and make sure no other user can write to it.
+
+    Raises PermissionError when it is a symlink or no directory, is not owned by the
+    effective user or is writable by group or others, e.g. because another local user
+    created it first to plant files in it.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        os.mkdir(path, 0o700)
+    except FileExistsError:
+        pass
+    st = os.lstat(path)
+    if not stat.S_ISDIR(st.st_mode):
+        raise PermissionError(f"{path} is not a directory")
+    if st.st_uid != os.geteuid():
+        raise PermissionError(f"{path} is owned by uid {st.st_uid}, not by the running user")
+    if st.st_mode & (stat.S_IWGRP | stat.S_IWOTH):
+        raise PermissionError(f"{path} is writable by other users (mode {stat.S_IMODE(st.st_mode):o})")
+    return path
@@ -0,0 +1,204 @@
+import asyncio
+import ssl
+import time
+from urllib.parse import urlsplit
+
+# Endpoint probes (TCP connect, TLS handshake, HTTP(S) request) on one asyncio event loop.
+# Hundreds of probes run concurrently from a single thread; a semaphore bounds how many
+# connections are open at the same time.
+
+PROBE_TYPES = ("tcp", "tls", "http")
+
+STATUS_OK = "ok"
+STATUS_TIMEOUT = "timeout"
+STATUS_REFUSED = "refused"
+STATUS_TLS_ERROR = "tls_error"
+STATUS_BAD_STATUS = "bad_status"
+STATUS_BODY_MISMATCH = "body_mismatch"
+STATUS_ERROR = "error"
+STATUS_CONFIG_ERROR = "config_error"
+
+# only the start of a response is needed for status and body match
+MAX_RESPONSE_BYTES = 256 * 1024
+USER_AGENT = "python-monitoring-script"
+
+
+def _ms(start: float, end: float) -> float:
+    return round((end - start) * 1000.0, 3)
+
+
+class _probeProtocol(asyncio.Protocol):
+    """Collects the response and the time of its first byte."""
+
+    def __init__(self, loop) -> None:
+        self.transport = None
+        self.buffer = bytearray()
+        self.first_byte = loop.create_future()
+        self.closed = loop.create_future()
+
+    def connection_made(self, transport) -> None:
+        self.transport = transport
+
+    def data_received(self, data: bytes) -> None:
+        if not self.first_byte.done():
+            self.first_byte.set_result(time.perf_counter())
+        self.buffer += data
+        if len(self.buffer) >= MAX_RESPONSE_BYTES:
+            self.transport.close()
+
+    def connection_lost(self, exc) -> None:
+        # results, not exceptions: nobody may be waiting for these futures
+        if not self.first_byte.done():
+            self.first_byte.set_result(None)
+        if not self.closed.done():
+            self.closed.set_result(exc)
+
+
+def _tls_context(spec: dict, verify: bool) -> ssl.SSLContext:
+    context = ssl.create_default_context(cafile=spec.get("ca_file") or None)
+    if not spec.get("verify", verify):
+        context.check_hostname = False
+        context.verify_mode = ssl.CERT_NONE
+    return context
+
+
+def _decode_chunked(body: bytes) -> bytes:
+    out = bytearray()
+    while body:
+        size_line, sep, rest = body.partition(b"\r\n")
+        if not sep:
+            break
+        try:
+            size = int(size_line.split(b";")[0], 16)
+        except ValueError:
+            break
+        if size == 0:
+            break
+        out += rest[:size]
+        body = rest[size + 2:]
+    return bytes(out)
+
+
+def parse_http_response(raw: bytes) -> tuple:
+    """(status code, headers dict with lower-case names, body) of a raw HTTP/1.x response."""
+    head, _, body = bytes(raw).partition(b"\r\n\r\n")
+    lines = head.decode("iso-8859-1").split("\r\n")
+    parts = lines[0].split(" ", 2)
+    if len(parts) < 2 or not parts[0].startswith("HTTP/"):
+        raise ValueError(f"not an HTTP response: {lines[0][:60]!r}")
+    headers = {}
+    for line in lines[1:]:
+        name, sep, value = line.partition(":")
+        if sep:
+            headers[name.strip().lower()] = value.strip()
+    if "chunked" in headers.get("transfer-encoding", "").lower():
+        body = _decode_chunked(body)
+    return int(parts[1]), headers, body
+
+
+def _target(spec: dict) -> tuple:
+    """(host, port, use_tls, request path) of a probe spec."""
+    kind = spec.get("type")
+    if kind == "http":
+        url = urlsplit(spec["url"])
+        if url.scheme not in ("http", "https") or not url.hostname:
+            raise ValueError(f"unsupported url {spec['url']!r}")
+        path = (url.path or "/") + (f"?{url.query}" if url.query else "")
+        return url.hostname, url.port or (443 if url.scheme == "https" else 80), url.scheme == "https", path
+    if kind in ("tcp", "tls"):
+        return spec["host"], int(spec["port"]), kind == "tls", None
+    raise ValueError(f"unknown probe type {kind!r} (expected one of {', '.join(PROBE_TYPES)})")
+
+
+async def _run_probe(spec: dict, result: dict, verify: bool) -> None:
+    loop = asyncio.get_running_loop()
+    host, port, use_tls, path = _target(spec)
+    start = time.perf_counter()
+    transport, protocol = await loop.create_connection(lambda: _probeProtocol(loop), host, port)
+    result["_transport"] = transport
+    result["connect_ms"] = _ms(start, time.perf_counter())
+
+    if use_tls:
+        tls_start = time.perf_counter()
+        transport = await loop.start_tls(
+            transport, protocol, _tls_context(spec, verify),
+            server_hostname=spec.get("server_name") or host,
+        )
+        result["_transport"] = transport
+        protocol.transport = transport
+        result["tls_ms"] = _ms(tls_start, time.perf_counter())
+
+    if spec.get("type") != "http":
+        return
+
+    request_start = time.perf_counter()
+    host_header = host if port in (80, 443) else f"{host}:{port}"
+    transport.write((
+        f"{spec.get('method', 'GET')} {path} HTTP/1.1\r\nHost: {host_header}\r\nUser-Agent: {USER_AGENT}\r\n"
+        "Accept: */*\r\nConnection: close\r\n\r\n"
+    ).encode("ascii"))
+    first_byte = await protocol.first_byte
+    if first_byte is not None:
+        result["ttfb_ms"] = _ms(request_start, first_byte)
+    await protocol.closed
+
+    status, _, body = parse_http_response(protocol.buffer)
+    result["http_status"] = status
+    expected = spec.get("expect_status")
+    if expected:
+        status_ok = status in [int(code) for code in expected]
+    else:
+        status_ok = 200 <= status < 400
+    if not status_ok:
+        result.update(status=STATUS_BAD_STATUS, detail=f"HTTP {status}")
+        return
+    needle = spec.get("body_contains")
+    if needle and needle.encode("utf-8") not in body:
+        result.update(status=STATUS_BODY_MISMATCH, detail=f"body does not contain {needle!r}")
+
+
+async def probe(spec: dict, timeout: float = 5.0, verify: bool = True) -> dict:
+    """Run one probe. Never raises: failures are reported in the result's status."""
+    name = spec.get("name") or spec.get("url") or f"{spec.get('host')}:{spec.get('port')}"
+    result = {
+        "name": name, "type": spec.get("type"), "status": STATUS_OK, "detail": "",
+        "connect_ms": None, "tls_ms": None, "ttfb_ms": None, "total_ms": None, "http_status": None,
+    }
+    start = time.perf_counter()
+    try:
+        await asyncio.wait_for(_run_probe(spec, result, verify), float(spec.get("timeout_seconds", timeout)))
+    except asyncio.TimeoutError:
+        result.update(status=STATUS_TIMEOUT, detail=f"no answer within {float(spec.get('timeout_seconds', timeout)):g}s")
+    except (ssl.SSLError, ssl.CertificateError) as e:
+        # before ValueError: certificate errors derive from it
+        result.update(status=STATUS_TLS_ERROR, detail=str(e))
+    except ConnectionRefusedError as e:
+        result.update(status=STATUS_REFUSED, detail=str(e))
+    except (KeyError, ValueError, TypeError) as e:
+        result.update(status=STATUS_CONFIG_ERROR if result["connect_ms"] is None else STATUS_ERROR, detail=str(e))
+    except OSError as e:
+        result.update(status=STATUS_ERROR, detail=str(e) or type(e).__name__)
+    finally:
+        transport = result.pop("_transport", None)
+        if transport is not None:
+            transport.abort()
+    result["total_ms"] = _ms(start, time.perf_counter())
+    result["ok"] = result["status"] == STATUS_OK
+    return result
+
+
+async def _probe_all(specs: list, concurrency: int, timeout: float, verify: bool) -> list:
+    semaphore = asyncio.Semaphore(max(1, int(concurrency)))
+
+    async def bounded(spec):
+        async with semaphore:
+            return await probe(spec, timeout, verify)
+
+    return await asyncio.gather(*(bounded(spec) for spec in specs))
+
+
+def run_probes(specs: list, concurrency: int = 50, timeout: float = 5.0, verify: bool = True) -> list:
+    """Run all probes concurrently (at most `concurrency` at a time); results in the order of specs."""
+    if not specs:
+        return []
+    return asyncio.run(_probe_all([dict(spec) for spec in specs], concurrency, timeout, verify))
@@ -1,29 +1,45 @@
 from utils.log import log
+from utils.config import load_config
 from utils.db import db as DB
+from utils.downsample import downsample_frame
+from utils.fleet_report import resolve_result_dbs, host_names, summarize_result_db
+from utils.sketch import streamingStats, timeBuckets
+from utils.report_parsing import parse_load_averages, parse_observed
 
+from utils import report_plots
+
+import hashlib
+import html
 import os
-import sqlite3
-from datetime import datetime, timedelta
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
 import pandas as pd
-import matplotlib.pyplot as plt
 from pathlib import Path
 from sys import exit as adieu
-import json
 import traceback
 
 class reportGenerator:
     def __init__(self) -> None:
         try:
             # -- Get config-parameters --
-            path = Path(__file__).resolve().parent.parent / "conf.json"
-
-            with open(f"{path}", "r") as f:
-                j = json.loads(f.read())
-
-                self.is_active: bool = j["reportGenerator"]["is_active"]
-                self.path_to_reports: str = j["reportGenerator"]["root_path"]
-                # optional: number of days to show in time-range-limited plots
-                self.plot_days: int = int(j["reportGenerator"].get("plot_days", 7))
+            j = load_config()
+
+            self.is_active: bool = j["reportGenerator"]["is_active"]
+            self.path_to_reports: str = j["reportGenerator"]["root_path"]
+            # optional: number of days to show in time-range-limited plots
+            self.plot_days: int = int(j["reportGenerator"].get("plot_days", 7))
+            # longer host metric series are downsampled (LTTB) to this many points per line
+            self.max_plot_points: int = int(j["reportGenerator"].get("max_plot_points", 2000))
+            # streaming mode: host metrics are read in chunks of chunk_size rows and folded into
+            # running aggregates, so memory stays bounded regardless of the DB size
+            self.streaming: bool = bool(j["reportGenerator"].get("streaming", False))
+            self.chunk_size: int = max(1, int(j["reportGenerator"].get("chunk_size", 50000)))
+            # worker processes for rendering plots (0 = one per CPU core)
+            self.plot_workers: int = int(j["reportGenerator"].get("plot_workers", 0))
+            # fleet report: worker processes reading host DBs (0 = one per CPU core) and length of the top lists
+            self.fleet_workers: int = int(j["reportGenerator"].get("fleet_workers", 0))
+            self.fleet_top_n: int = max(1, int(j["reportGenerator"].get("fleet_top_n", 10)))
 
             self.logger = log()
 
@@ -35,13 +51,15 @@ class reportGenerator:
                 self.logger.warning("reportGenerator: Could not initialize DB handler; continuing without DB ingestion.")
                 self.db_conn = None
 
-            # prepare output directories (dated parent folder + markdown/ and plots/)
-            try:
-                self.__prepare_output_dirs()
-            except Exception:
-                # if directory creation fails, continue but use configured path as fallback
-                self.logger.warning("reportGenerator: Could not create dated report directories; using configured path as fallback.")
-                print(traceback.format_exc())
+            # skip the report when no rows arrived since the last one
+            self.skip_unchanged: bool = bool(j["reportGenerator"].get("skip_unchanged", True))
+            # rendered PNGs by hash of their input data, reused while the input is unchanged
+            self.plot_cache_dir = Path(self.path_to_reports) / ".plot_cache"
+
+            # output directories are created lazily by generate_report (not for skipped reports)
+            self.report_root = None
+            self.markdown_dir = None
+            self.plots_dir = None
 
             # -------------------------------------------------------
 
@@ -50,7 +68,7 @@ class reportGenerator:
             self.logger.error("reportGenerator/__init__: {0}".format(traceback.format_exc()))
             adieu(1)
 
-    def __prepare_output_dirs(self):
+    def __prepare_output_dirs(self, prefix: str = "report", with_plots: bool = True):
 
         base = Path(self.path_to_reports)
         # ensure base exists
@@ -64,7 +82,7 @@ class reportGenerator:
                 pass
 
         date_str = datetime.now().strftime("%Y_%m_%d")
-        folder_name = f"report_{date_str}"
+        folder_name = f"{prefix}_{date_str}"
         candidate = base / folder_name
         idx = 1
         while candidate.exists():
@@ -82,6 +100,9 @@ class reportGenerator:
         self.report_root = candidate
         self.markdown_dir = self.report_root 
         self.plots_dir = self.report_root / "plots"
+        if not with_plots:
+            self.logger.info(f"reportGenerator: Created report dir at {self.report_root}")
+            return
         self.plots_dir.mkdir(mode=0o777)
         try:
             os.chmod(str(self.plots_dir), 0o777)
@@ -92,6 +113,54 @@ class reportGenerator:
                 pass
         self.logger.info(f"reportGenerator: Created report dirs at {self.report_root}")
     
+    def __has_db(self) -> bool:
+        return bool(getattr(self.db_conn, "conn", None))
+
+    def __ensure_output_dirs(self) -> None:
+        # prepare output directories (dated parent folder + markdown/ and plots/)
+        try:
+            self.__prepare_output_dirs()
+        except Exception:
+            # if directory creation fails, continue but use configured path as fallback
+            self.logger.warning("reportGenerator: Could not create dated report directories; using configured path as fallback.")
+            print(traceback.format_exc())
+            self.report_root = Path(self.path_to_reports)
+            self.markdown_dir = self.report_root
+            self.plots_dir = self.report_root / "plots"
+
+    def __input_fingerprint(self) -> str:
+        # high-water marks of all report inputs plus the settings that change the plots
+        return ":".join(str(v) for v in (
+            self.db_conn.get_report_state("hwm_file_checks", 0),
+            self.db_conn.get_report_state("hwm_service_checks", 0),
+            self.db_conn.max_row_id("host_checks"),
+            self.db_conn.max_row_id("metrics"),
+            self.plot_days,
+        ))
+
+    def __plot_digest(self, func, kwargs: dict) -> str:
+        # hash of everything a plot is drawn from (frames, titles, window); the output path does not matter
+        digest = hashlib.sha256(f"{report_plots.PLOT_STYLE_VERSION}:{func.__module__}.{func.__qualname__}".encode())
+        for name in sorted(kwargs):
+            value = kwargs[name]
+            if name == "out_path":
+                continue
+            digest.update(name.encode())
+            if isinstance(value, pd.DataFrame):
+                digest.update(repr((list(value.columns), [str(t) for t in value.dtypes])).encode())
+                digest.update(pd.util.hash_pandas_object(value, index=False).to_numpy().tobytes())
+            else:
+                digest.update(repr(value).encode())
+        return digest.hexdigest()
+
+    def __copy_plot(self, src: Path, dst: Path) -> None:
+        dst.parent.mkdir(mode=0o777, parents=True, exist_ok=True)
+        shutil.copyfile(str(src), str(dst))
+        try:
+            os.chmod(str(dst), 0o777)
+        except Exception:
+            pass
+
     def __check_if_module_is_active(self) -> None:
         try:
             if self.is_active == False:
@@ -111,304 +180,247 @@ class reportGenerator:
         df["ts"] = pd.to_datetime(df[ts_col], errors="coerce", utc=False)
         return df
 
-    def __safe_is_true(self, val):
-        """Tolerante Prüfung, ob ein Text/Value 'true' ist."""
-        if val is None:
-            return False
-        # Handle booleans directly
-        if isinstance(val, bool):
-            return val
-
-        # Handle numeric types (non-zero => True)
-        if isinstance(val, (int, float)):
-            try:
-                return float(val) != 0.0
-            except Exception:
-                pass
-
-        s = str(val).strip().lower()
-        true_vals = {"1", "true", "t", "yes", "y", "active", "up", "on"}
-        false_vals = {"0", "false", "f", "no", "n", "inactive", "down", "off"}
-
-        if s in true_vals:
-            return True
-        if s in false_vals:
-            return False
-
-        # Fallback: try numeric conversion
-        try:
-            return float(s) != 0.0
-        except Exception:
-            return False
-
-    def __save_plot(self, fig, fname):
+    def __plot_path(self, fname: str) -> str:
         # Prefer plots_dir if available, otherwise fallback to configured path
         try:
-            out_path = Path(self.plots_dir) / fname
-        except Exception:
-            out_path = Path(self.path_to_reports) / fname
-        out_path.parent.mkdir(mode=0o777, parents=True, exist_ok=True)
-        try:
-            os.chmod(str(out_path.parent), 0o777)
+            return str(Path(self.plots_dir) / fname)
         except Exception:
-            try:
-                self.logger.warning(f"reportGenerator: Could not set permissions on directory {out_path.parent}")
-            except Exception:
-                pass
-        fig.savefig(str(out_path), bbox_inches="tight")
-        try:
-            # ensure file is world-writable/executable as requested
-            os.chmod(str(out_path), 0o777)
-        except Exception:
-            # log but don't fail
-            try:
-                self.logger.warning(f"reportGenerator: Could not set permissions on {out_path}")
-            except Exception:
-                pass
-        plt.close(fig)
-        return str(out_path)
-
-    def __plot_time_series(self, df, x_col, y_col, title, xlabel="time", ylabel="", out_fname=None, date_format=True, last_n_days: int = None, label: str = None):
-        """Allgemeine Zeitreihen-Plot-Funktion (Option B styling)."""
-        fig, ax = plt.subplots(figsize=(10, 4.5))
-        # Linie + Marker: always draw markers so single-point series are visible
-        if label:
-            ax.plot(df[x_col], df[y_col], linewidth=1.2, marker='o', markersize=4, label=label)
-            ax.legend()
-        else:
-            ax.plot(df[x_col], df[y_col], linewidth=1.2, marker='o', markersize=4)
-        ax.set_title(title, fontsize=12, fontweight="semibold")
-        ax.set_xlabel(xlabel)
-        ax.set_ylabel(ylabel)
-        ax.grid(True, linestyle="--", linewidth=0.5, alpha=0.8)
-        # Datumformatierung
-        if date_format:
-            try:
-                import matplotlib.dates as mdates
-                ax.xaxis.set_major_locator(mdates.AutoDateLocator())
-                ax.xaxis.set_major_formatter(mdates.ConciseDateFormatter(mdates.AutoDateLocator()))
-            except Exception:
-                pass
-        # Optionally limit x-axis to the last N days (if requested)
-        if last_n_days is not None:
-            try:
-                xs = pd.to_datetime(df[x_col], errors='coerce')
-                max_x = xs.max()
-                if pd.notna(max_x):
-                    min_x = max_x - timedelta(days=int(last_n_days))
-                    ax.set_xlim(min_x, max_x)
-            except Exception:
-                pass
+            return str(Path(self.path_to_reports) / fname)
 
-        fig.tight_layout()
-        if out_fname:
-            return self.__save_plot(fig, out_fname)
-        else:
-            plt.show()
-            plt.close(fig)
-            return None
-
-    def __create_file_checks_plots(self, df_file_checks: pd.DataFrame):
-        if df_file_checks.empty:
-            return None
-        
-        df = df_file_checks.copy()
-        df = self.__ensure_datetime_series(df, "timestamp")
-        df["changed_flag"] = df["changed"].apply(self.__safe_is_true)
-        df["date"] = df["ts"].dt.date
+    def __file_checks_plot_jobs(self, daily: pd.DataFrame) -> dict:
+        # daily: one row per date with the number of changed files (aggregated in SQLite)
+        if daily is None or daily.empty:
+            return {}
 
-        daily = df.groupby("date", dropna=True)["changed_flag"].sum().reset_index()
-        daily = daily.sort_values("date")
+        daily = daily.copy()
+        daily["date"] = pd.to_datetime(daily["date"], errors="coerce").dt.date
+        daily = daily.dropna(subset=["date"]).sort_values("date")
 
         if daily.empty:
-            return None
-        # Plot
-        out = self.__plot_time_series(
+            return {}
+        return {"file_changes_timeline": (report_plots.plot_time_series, dict(
             df=daily,
             x_col="date",
-            y_col="changed_flag",
+            y_col="changed_files",
             title="File changes per day",
             xlabel="Date",
             ylabel="Number of changed files",
-            out_fname="file_changes_timeline.png",
+            out_path=self.__plot_path("file_changes_timeline.png"),
             date_format=False,
             last_n_days=self.plot_days,
             label="changed files"
-        )
-        return out
+        ))}
 
-    def __create_service_checks_plots(self, df_service_checks):
-        results = {}
-        if df_service_checks.empty:
-            return results
-        df = df_service_checks.copy()
-        df = self.__ensure_datetime_series(df, "timestamp")
-
-        # normalize is_active
-        df["is_active_flag"] = df["is_active"].apply(self.__safe_is_true)
+    def __service_checks_plot_jobs(self, uptime: pd.DataFrame, down_daily: pd.DataFrame) -> tuple:
+        # uptime: checks/active_checks per service, down_daily: down events per date (aggregated in SQLite)
+        jobs = {}
+        if uptime is None or uptime.empty:
+            return jobs, None
 
         # Uptime per service (in %)
-        service_group = df.groupby("service_name", dropna=False)
-        uptime = service_group["is_active_flag"].agg(['sum', 'count']).reset_index()
-        uptime["uptime_pct"] = (uptime["sum"] / uptime["count"]) * 100
+        uptime = uptime.copy()
+        uptime["uptime_pct"] = (uptime["active_checks"] / uptime["checks"]) * 100
         uptime = uptime.sort_values("uptime_pct", ascending=False)
-
-        # Bar plot for uptime
-        fig, ax = plt.subplots(figsize=(10, 4.5))
-        ax.bar(uptime["service_name"].astype(str), uptime["uptime_pct"], linewidth=0.5)
-        ax.set_title("Service uptime (%) per service")
-        ax.set_xlabel("Service")
-        ax.set_ylabel("Uptime (%)")
-        ax.set_ylim(0, 100)
-        ax.grid(axis="y", linestyle="--", linewidth=0.5, alpha=0.8)
-        plt.xticks(rotation=45, ha="right")
-        fig.tight_layout()
-        results["service_uptime_png"] = self.__save_plot(fig, "service_uptime.png")
-        # add legend indicating the measured metric
-        try:
-            ax.legend(["uptime_pct"])
-        except Exception:
-            pass
+        jobs["service_uptime"] = (report_plots.plot_uptime_bars, dict(
+            uptime=uptime[["service_name", "uptime_pct"]],
+            out_path=self.__plot_path("service_uptime.png"),
+        ))
 
         # Down-events per day (count of is_active == False)
-        df["date"] = df["ts"].dt.date
-        df["down_flag"] = ~df["is_active_flag"]
-        down_daily = df.groupby("date", dropna=True)["down_flag"].sum().reset_index().sort_values("date")
-        if not down_daily.empty:
-            out = self.__plot_time_series(
+        if down_daily is not None and not down_daily.empty:
+            down_daily = down_daily.copy()
+            down_daily["date"] = pd.to_datetime(down_daily["date"], errors="coerce").dt.date
+            down_daily = down_daily.dropna(subset=["date"]).sort_values("date")
+        if down_daily is not None and not down_daily.empty:
+            jobs["service_down_events"] = (report_plots.plot_time_series, dict(
                 df=down_daily,
                 x_col="date",
-                y_col="down_flag",
+                y_col="down_events",
                 title="Down events per day",
                 xlabel="Date",
                 ylabel="Number of down events",
-                out_fname="service_down_events.png",
+                out_path=self.__plot_path("service_down_events.png"),
                 date_format=False,
                 last_n_days=self.plot_days,
                 label="down events"
-            )
-            results["service_down_events_png"] = out
-        else:
-            results["service_down_events_png"] = None
+            ))
 
         # also return the uptime table for inclusion in markdown
-        results["uptime_table"] = uptime[["service_name", "count", "sum", "uptime_pct"]].rename(
-            columns={"count": "checks", "sum": "active_checks"}
-        )
-        return results
-
-    # observed_value to numeric - handle common non-numeric formats
-    def __parse_observed(self, val: str, metric_name: str):
-        if val is None:
-            return None
-        s = str(val).strip()
-        # load_average like '1.08 1.14 1.12' -> take first value
-        if metric_name == "load_average":
-            parts = s.split()
-            try:
-                return float(parts[0])
-            except Exception:
-                return None
-        # disk_free like '195G' or '200M' -> convert to GB
-        if metric_name == "disk_free":
-            import re
-            m = re.match(r"^([0-9]+(?:\.[0-9]+)?)\s*([KMGTkmgt]?)$", s)
-            if not m:
-                return None
-            num = float(m.group(1))
-            unit = m.group(2).upper()
-            if unit == "T":
-                return num * 1024.0
-            if unit == "G" or unit == "":
-                return num
-            if unit == "M":
-                return num / 1024.0
-            if unit == "K":
-                return num / (1024.0 * 1024.0)
-            return None
-        # default: try numeric conversion
-        try:
-            return float(s)
-        except Exception:
-            return None
-
-    def __create_host_metric_plot(self, df_host_checks, metric_name, png_name, ylabel=None):
-        if df_host_checks.empty:
-            return None
-        df = df_host_checks.copy()
-        df = df[df["name"] == metric_name]
+        return jobs, uptime[["service_name", "checks", "active_checks", "uptime_pct"]]
+
+    def __probe_latency_jobs(self) -> tuple:
+        # latency distribution per endpoint probe: quantile table plus one histogram
+        df = self.db_conn.load_metric("probe_total_ms", self.plot_days) if self.__has_db() else pd.DataFrame()
+        if df is None or df.empty:
+            return {}, None
+        df["value"] = pd.to_numeric(df["value"], errors="coerce")
+        df = df.dropna(subset=["value"])
         if df.empty:
-            return None
+            return {}, None
+        grouped = df.groupby("subject")["value"]
+        table = pd.DataFrame({
+            "probes": grouped.count(),
+            "mean_ms": grouped.mean(),
+            "p50_ms": grouped.quantile(0.5),
+            "p95_ms": grouped.quantile(0.95),
+            "p99_ms": grouped.quantile(0.99),
+            "max_ms": grouped.max(),
+        }).sort_values("p95_ms", ascending=False).reset_index().rename(columns={"subject": "probe"})
+        return {"probe_latency": (report_plots.plot_latency_histogram, dict(
+            df=df[["subject", "value"]].reset_index(drop=True),
+            out_path=self.__plot_path("probe_latency.png"),
+            highlight=table["probe"].head(5).tolist(),
+        ))}, table
+
+    def __load_host_metric(self, metric_name: str, columns: list) -> tuple:
+        # whole plot window in memory: parse, downsample; returns (frame, envelope, stats)
+        df = self.db_conn.load_host_metric(metric_name, self.plot_days) if self.__has_db() else pd.DataFrame()
+        if df is None or df.empty:
+            return None, None, None
         df = self.__ensure_datetime_series(df, "timestamp")
         # Special handling for load_average: it's three values (1,5,15 min)
         if metric_name == "load_average":
             # parse observed_value like '1.08 1.14 1.12' into three numeric columns
-            def parse_load(s):
-                if s is None:
-                    return (None, None, None)
-                parts = str(s).strip().split()
-                vals = []
-                for i in range(3):
-                    try:
-                        vals.append(float(parts[i]))
-                    except Exception:
-                        vals.append(None)
-                return tuple(vals)
-
-            parsed = df["observed_value"].apply(parse_load)
-            df[["v1", "v2", "v3"]] = pd.DataFrame(parsed.tolist(), index=df.index)
-            df = df.dropna(subset=["ts"]).sort_values("ts")
-            if df.empty:
-                return None
-
-            fig, ax = plt.subplots(figsize=(10, 4.5))
-            # plot three series with different colors and markers
-            ax.plot(df["ts"], df["v1"], linewidth=1.2, marker="o", markersize=4, label="1min")
-            ax.plot(df["ts"], df["v2"], linewidth=1.2, marker="s", markersize=4, label="5min")
-            ax.plot(df["ts"], df["v3"], linewidth=1.2, marker="^", markersize=4, label="15min")
-            ax.set_title(f"{metric_name} over time", fontsize=12, fontweight="semibold")
-            ax.set_xlabel("Time")
-            ax.set_ylabel(ylabel if ylabel else metric_name)
-            ax.grid(True, linestyle="--", linewidth=0.5, alpha=0.8)
-            ax.legend()
-            try:
-                import matplotlib.dates as mdates
-                ax.xaxis.set_major_locator(mdates.AutoDateLocator())
-                ax.xaxis.set_major_formatter(mdates.ConciseDateFormatter(mdates.AutoDateLocator()))
-            except Exception:
-                pass
-
-            # apply last_n_days range if available
-            try:
-                max_x = df["ts"].max()
-                if pd.notna(max_x):
-                    min_x = max_x - timedelta(days=int(self.plot_days))
-                    ax.set_xlim(min_x, max_x)
-            except Exception:
-                pass
+            df[columns] = parse_load_averages(df["observed_value"])
+        else:
+            df["val_num"] = parse_observed(df["observed_value"], metric_name)
+        df = df.dropna(subset=["ts", columns[0]]).sort_values("ts")
+        if df.empty:
+            return None, None, None
+        stats = streamingStats()
+        stats.update(df[columns[0]].to_numpy())
+        df, envelope = downsample_frame(df[["ts"] + columns], "ts", columns, self.max_plot_points)
+        return df, envelope, stats
+
+    def __stream_host_metric(self, metric_name: str, columns: list) -> tuple:
+        # streaming mode: fold the window chunk by chunk into time buckets and a quantile sketch
+        if not self.__has_db():
+            return None, None, None
+        first, last = self.db_conn.host_metric_time_range(metric_name, self.plot_days)
+        start, end = pd.to_datetime(first, errors="coerce"), pd.to_datetime(last, errors="coerce")
+        if pd.isna(start) or pd.isna(end):
+            return None, None, None
+
+        buckets = timeBuckets(start.value, end.value, self.max_plot_points, columns)
+        stats = streamingStats()
+        for chunk in self.db_conn.iter_host_metric(metric_name, self.plot_days, self.chunk_size):
+            ts = pd.to_datetime(chunk["timestamp"], errors="coerce")
+            if metric_name == "load_average":
+                values = parse_load_averages(chunk["observed_value"])[columns]
+            else:
+                values = parse_observed(chunk["observed_value"], metric_name).to_frame("val_num")
+            valid = ts.notna().to_numpy()
+            buckets.update(ts[valid].to_numpy(dtype="datetime64[ns]").astype("int64"), values[valid].to_numpy(dtype="float64"))
+            stats.update(values[columns[0]].to_numpy(dtype="float64"))
+        if stats.count == 0:
+            return None, None, None
+        df, envelope = buckets.frame("ts")
+        return df, envelope, stats
+
+    def __host_metric_plot_jobs(self, key, metric_name, png_name, ylabel=None) -> tuple:
+        """Plot job and summary statistics of one host metric within the plot window."""
+        columns = ["v1", "v2", "v3"] if metric_name == "load_average" else ["val_num"]
+        if self.streaming:
+            df, envelope, stats = self.__stream_host_metric(metric_name, columns)
+        else:
+            df, envelope, stats = self.__load_host_metric(metric_name, columns)
+        if df is None or df.empty:
+            return {}, None
 
-            fig.tight_layout()
-            return self.__save_plot(fig, png_name)
+        if metric_name == "load_average":
+            return {key: (report_plots.plot_load_average, dict(
+                df=df,
+                envelope=envelope,
+                title=f"{metric_name} over time",
+                ylabel=ylabel if ylabel else metric_name,
+                out_path=self.__plot_path(png_name),
+                last_n_days=self.plot_days,
+            ))}, stats
 
         # default numeric handling for single-value metrics
-        df["val_num"] = df["observed_value"].apply(lambda v: self.__parse_observed(v, metric_name=metric_name))
-        df = df.dropna(subset=["ts", "val_num"]).sort_values("ts")
-        if df.empty:
-            return None
-        return self.__plot_time_series(
+        return {key: (report_plots.plot_time_series, dict(
             df=df,
+            envelope=envelope,
             x_col="ts",
             y_col="val_num",
             title=f"{metric_name} over time",
             xlabel="Time",
             ylabel=ylabel if ylabel else metric_name,
-            out_fname=png_name,
+            out_path=self.__plot_path(png_name),
             date_format=True,
             last_n_days=self.plot_days,
             label=(ylabel if ylabel else metric_name)
-        )
+        ))}, stats
+
+    def __render_plots(self, jobs: dict) -> dict:
+        """Render independent plots in parallel worker processes. Returns key -> PNG path (None on failure)."""
+        image_paths = {key: None for key in jobs}
+        if not jobs:
+            return image_paths
+
+        # reuse PNGs whose input data did not change since they were rendered
+        digests = {key: self.__plot_digest(func, kwargs) for key, (func, kwargs) in jobs.items()}
+        for key in list(jobs):
+            cached = self.plot_cache_dir / f"{digests[key]}.png"
+            if cached.exists():
+                try:
+                    out_path = Path(jobs[key][1]["out_path"])
+                    self.__copy_plot(cached, out_path)
+                    image_paths[key] = str(out_path)
+                    del jobs[key]
+                except Exception:
+                    self.logger.warning(f"reportGenerator: Could not reuse cached plot for {key}: {traceback.format_exc()}")
+        self.logger.info(f"reportGenerator: {len(image_paths) - len(jobs)} plot(s) unchanged, {len(jobs)} to render")
+
+        self.__render_missing_plots(jobs, image_paths)
+
+        # keep the cache bounded: only the plots of this report are kept
+        try:
+            for key, path in image_paths.items():
+                cached = self.plot_cache_dir / f"{digests[key]}.png"
+                if path and not cached.exists():
+                    self.__copy_plot(Path(path), cached)
+            keep = {f"{d}.png" for d in digests.values()}
+            for old in self.plot_cache_dir.glob("*.png"):
+                if old.name not in keep:
+                    old.unlink()
+        except Exception:
+            self.logger.warning(f"reportGenerator: Could not update plot cache: {traceback.format_exc()}")
+        return image_paths
+
+    def __render_missing_plots(self, jobs: dict, image_paths: dict) -> None:
+        if not jobs:
+            return
 
-    def __build_markdown_report(self, tables_preview, image_paths, uptime_table=None, out_md: str = ""):
+        workers = min(len(jobs), self.plot_workers or os.cpu_count() or 1)
+        executor = None
+        if workers > 1:
+            try:
+                executor = ProcessPoolExecutor(max_workers=workers)
+            except Exception:
+                # e.g. no /dev/shm in a container: render in this process instead
+                self.logger.warning(f"reportGenerator: Could not start plot worker processes; rendering sequentially: {traceback.format_exc()}")
+
+        try:
+            if executor is None:
+                for key, (func, kwargs) in jobs.items():
+                    try:
+                        image_paths[key] = func(**kwargs)
+                    except Exception:
+                        self.logger.error(f"reportGenerator/render_plots ({key}): {traceback.format_exc()}")
+                return
+
+            futures = {key: executor.submit(func, **kwargs) for key, (func, kwargs) in jobs.items()}
+            for key, future in futures.items():
+                try:
+                    image_paths[key] = future.result()
+                except Exception:
+                    self.logger.error(f"reportGenerator/render_plots ({key}): {traceback.format_exc()}")
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=True)
+
+    def __build_markdown_report(self, tables_preview, image_paths, uptime_table=None, out_md: str = "", table_totals: dict = None, host_stats: dict = None, probe_table=None):
         lines = []
         lines.append("# Monitoring Report\n")
         lines.append(f"_Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}_\n")
@@ -417,7 +429,8 @@ class reportGenerator:
         # Tabelle Previews
         for table_name, df in tables_preview.items():
             lines.append(f"## Table: {table_name}\n")
-            lines.append(f"**Total rows:** {len(df)}\n\n")
+            total = (table_totals or {}).get(table_name, len(df))
+            lines.append(f"**Total rows:** {total}\n\n")
             if not df.empty:
                 lines.append(df.head(20).to_markdown(index=False))
             else:
@@ -447,8 +460,24 @@ class reportGenerator:
             lines.append(f"![Down events per day]({rel})\n")
         lines.append("\n---\n")
 
+        # Endpoint probes
+        if (probe_table is not None and not probe_table.empty) or image_paths.get("probe_latency"):
+            lines.append("## Endpoint probes - latency\n")
+            if probe_table is not None and not probe_table.empty:
+                lines.append(probe_table.to_markdown(index=False, floatfmt=".2f"))
+                lines.append("\n")
+            if image_paths.get("probe_latency"):
+                rel = os.path.relpath(image_paths['probe_latency'], start=md_dir) if md_dir else os.path.basename(image_paths['probe_latency'])
+                lines.append(f"![Probe latency]({rel})\n")
+            lines.append("\n---\n")
+
         # Host checks
         lines.append("## Host checks (metrics)\n")
+        if host_stats:
+            lines.append("### Summary statistics\n")
+            stats_table = pd.DataFrame([{"metric": name, **summary} for name, summary in host_stats.items()])
+            lines.append(stats_table.to_markdown(index=False, floatfmt=".2f"))
+            lines.append("\n")
         if image_paths.get("cpu_load"):
             rel = os.path.relpath(image_paths['cpu_load'], start=md_dir) if md_dir else os.path.basename(image_paths['cpu_load'])
             lines.append("### CPU - load_average\n")
@@ -482,38 +511,72 @@ class reportGenerator:
 
         self.__check_if_module_is_active()
 
-        # Load tables (full)
-        df_file_checks = self.db_conn.load_table_for_report("file_checks") if self.db_conn else pd.DataFrame()
-        df_service_checks = self.db_conn.load_table_for_report("service_checks") if self.db_conn else pd.DataFrame()
-        df_host_checks = self.db_conn.load_table_for_report("host_checks") if self.db_conn else pd.DataFrame()
-        
+        # Aggregate in SQLite: only the per-day / per-service results are loaded, never the full tables.
+        # Rows are folded into the stored daily aggregates incrementally (only rows since the last report).
+        has_db = bool(getattr(self.db_conn, "conn", None))
+        days = self.plot_days
+        fingerprint = None
+        if has_db:
+            folded = self.db_conn.refresh_report_aggregates()
+            self.logger.info(f"reportGenerator: Folded new rows into daily aggregates: {folded}")
+            fingerprint = self.__input_fingerprint()
+            last_dir = self.db_conn.get_report_state("last_report_dir")
+            if (
+                self.skip_unchanged
+                and last_dir
+                and fingerprint == self.db_conn.get_report_state("last_report_fingerprint")
+                and (Path(last_dir) / "monitoring_report.md").exists()
+            ):
+                self.report_root = self.markdown_dir = Path(last_dir)
+                self.plots_dir = self.report_root / "plots"
+                self.logger.info(f"reportGenerator: No new data since the last report; keeping {last_dir}")
+                return
+
+        self.__ensure_output_dirs()
+        daily_file_changes = self.db_conn.aggregate_daily_file_changes(days) if has_db else pd.DataFrame()
+        service_uptime = self.db_conn.aggregate_service_uptime(days) if has_db else pd.DataFrame()
+        daily_down_events = self.db_conn.aggregate_daily_down_events(days) if has_db else pd.DataFrame()
+
         # include all tables preview (limit to first 20 rows)
         tables_preview = {}
+        table_totals = {}
         for tname in ("file_checks", "service_checks", "host_checks"):
-            df_tmp = self.db_conn.load_table_for_report(tname, 20) if self.db_conn else pd.DataFrame()
+            df_tmp = self.db_conn.load_table_for_report(tname, 20) if has_db else pd.DataFrame()
             tables_preview[tname] = df_tmp
-
-        # Create plots
-        image_paths = {}
-
-        self.logger.info("Creating file_checks timeline plot...")
-        image_paths["file_changes_timeline"] = self.__create_file_checks_plots(df_file_checks)
-
-        self.logger.info("Creating service_checks plots (uptime + down events)...")
-        svc_results = self.__create_service_checks_plots(df_service_checks)
-        image_paths["service_uptime"] = svc_results.get("service_uptime_png")
-        image_paths["service_down_events"] = svc_results.get("service_down_events_png")
-        uptime_table = svc_results.get("uptime_table")
-
-        self.logger.info("Creating host_checks plots (CPU, RAM, Disk)...")
-        image_paths["cpu_load"] = self.__create_host_metric_plot(df_host_checks, "load_average", "cpu_load_average.png", ylabel="load average")
-        image_paths["ram_free"] = self.__create_host_metric_plot(df_host_checks, "free_ram_mb", "free_ram_mb.png", ylabel="free RAM (MB)")
-        image_paths["disk_free"] = self.__create_host_metric_plot(df_host_checks, "disk_free", "disk_free.png", ylabel="disk free (units)")
+            table_totals[tname] = self.db_conn.count_rows(tname) if has_db else 0
+
+        # Collect the independent plots with the small frame each of them needs ...
+        self.logger.info("Preparing plots (file changes, service uptime + down events, CPU, RAM, Disk)...")
+        jobs = {}
+        jobs.update(self.__file_checks_plot_jobs(daily_file_changes))
+        svc_jobs, uptime_table = self.__service_checks_plot_jobs(service_uptime, daily_down_events)
+        jobs.update(svc_jobs)
+        probe_jobs, probe_table = self.__probe_latency_jobs()
+        jobs.update(probe_jobs)
+        host_stats = {}
+        for key, metric_name, png_name, ylabel in (
+            ("cpu_load", "load_average", "cpu_load_average.png", "load average"),
+            ("ram_free", "free_ram_mb", "free_ram_mb.png", "free RAM (MB)"),
+            ("disk_free", "disk_free", "disk_free.png", "disk free (units)"),
+        ):
+            metric_jobs, stats = self.__host_metric_plot_jobs(key, metric_name, png_name, ylabel=ylabel)
+            jobs.update(metric_jobs)
+            if stats is not None:
+                host_stats[metric_name] = stats.summary()
+
+        # ... and render them in parallel
+        with self.logger.timed("reportGenerator", "render_plots", plots=len(jobs)):
+            image_paths = self.__render_plots(jobs)
+        for key in ("file_changes_timeline", "service_uptime", "service_down_events", "probe_latency", "cpu_load", "ram_free", "disk_free"):
+            image_paths.setdefault(key, None)
         # Build markdown
         self.logger.info("Building markdown report...")
         md_out = Path(self.markdown_dir) / "monitoring_report.md"
-        md_path = self.__build_markdown_report(tables_preview, image_paths, uptime_table=uptime_table, out_md=str(md_out))
+        md_path = self.__build_markdown_report(tables_preview, image_paths, uptime_table=uptime_table, out_md=str(md_out), table_totals=table_totals, host_stats=host_stats, probe_table=probe_table)
         self.logger.info(f"Markdown report written to: {md_path}")
+        if fingerprint is not None:
+            self.db_conn.set_report_state("last_report_fingerprint", fingerprint)
+            self.db_conn.set_report_state("last_report_dir", str(self.report_root))
 
         # Summary
         self.logger.info("Generated files:")
@@ -521,3 +584,160 @@ class reportGenerator:
             if v:
                 self.logger.info(f" - {key}: {v}")
         self.logger.info(f" - Markdown: {md_path}")
+
+    def __summarize_hosts(self, paths: list) -> list:
+        """Summaries of all host DBs, read in parallel worker processes (sequentially as fallback)."""
+        names = host_names(paths)
+        jobs = [dict(path=p, host=names[p], days=self.plot_days, chunk_size=self.chunk_size) for p in paths]
+        workers = min(len(jobs), self.fleet_workers or os.cpu_count() or 1)
+        executor = None
+        if workers > 1:
+            try:
+                executor = ProcessPoolExecutor(max_workers=workers)
+            except Exception:
+                self.logger.warning(f"reportGenerator: Could not start fleet worker processes; reading sequentially: {traceback.format_exc()}")
+
+        summaries = []
+        try:
+            if executor is None:
+                for job in jobs:
+                    summaries.append(self.__summarize_safely(lambda: summarize_result_db(**job), job))
+            else:
+                futures = [(job, executor.submit(summarize_result_db, **job)) for job in jobs]
+                for job, future in futures:
+                    summaries.append(self.__summarize_safely(future.result, job))
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=True)
+        return summaries
+
+    def __summarize_safely(self, get_summary, job: dict) -> dict:
+        # a broken DB (or worker) only ends up in the report's error table
+        try:
+            return get_summary()
+        except Exception:
+            self.logger.error(f"reportGenerator/fleet_report ({job['path']}): {traceback.format_exc()}")
+            return {"host": job["host"], "path": job["path"], "error": traceback.format_exc(limit=1).strip().splitlines()[-1]}
+
+    def __fleet_tables(self, summaries: list) -> dict:
+        ok = [s for s in summaries if not s.get("error")]
+        top_n = self.fleet_top_n
+
+        uptime = pd.DataFrame([
+            {
+                "host": s["host"],
+                "uptime_pct": round(100.0 * s["active_checks"] / s["service_checks"], 2) if s["service_checks"] else None,
+                "services": s["services"],
+                "checks": s["service_checks"],
+                "degraded_services": ", ".join(s["degraded_services"]),
+                "last_seen": s["last_seen"],
+            }
+            for s in ok
+        ], columns=["host", "uptime_pct", "services", "checks", "degraded_services", "last_seen"])
+        # worst first; hosts without service checks at the end
+        uptime = uptime.sort_values(["uptime_pct", "host"], na_position="last", kind="stable").reset_index(drop=True)
+
+        load = pd.DataFrame([
+            {"host": s["host"], **{k: v for k, v in s["load"].summary().items() if k != "count"}, "samples": s["load"].count}
+            for s in ok if s["load"].count
+        ], columns=["host", "mean", "min", "max", "p50", "p95", "p99", "samples"])
+        load = load.sort_values(["p95", "host"], ascending=[False, True], kind="stable").head(top_n).reset_index(drop=True)
+
+        changes = pd.DataFrame([
+            {"host": s["host"], "file_changes": s["file_changes"], "changed_files": ", ".join(s["changed_paths"])}
+            for s in ok if s["file_changes"]
+        ], columns=["host", "file_changes", "changed_files"])
+        changes = changes.sort_values(["file_changes", "host"], ascending=[False, True], kind="stable").reset_index(drop=True)
+
+        # fleet-wide distribution: the per-host sketches are merged, no raw values are needed
+        fleet_load = None
+        for s in ok:
+            if s["load"].count:
+                if fleet_load is None:
+                    fleet_load = s["load"]
+                else:
+                    fleet_load.merge(s["load"])
+        fleet = pd.DataFrame([{
+            "hosts": len(ok),
+            "service_checks": sum(s["service_checks"] for s in ok),
+            "uptime_pct": round(100.0 * sum(s["active_checks"] for s in ok) / max(1, sum(s["service_checks"] for s in ok)), 2),
+            "file_changes": sum(s["file_changes"] for s in ok),
+            **({f"load_{k}": v for k, v in fleet_load.summary().items() if k != "count"} if fleet_load else {}),
+        }])
+
+        errors = pd.DataFrame(
+            [{"host": s["host"], "path": s["path"], "error": s["error"]} for s in summaries if s.get("error")],
+            columns=["host", "path", "error"],
+        )
+        return {
+            "Fleet overview": fleet,
+            "Uptime ranking (worst first)": uptime,
+            f"Worst hosts by load average (1 min, top {top_n} by p95)": load,
+            "Hosts with file changes": changes,
+            "Unreadable result databases": errors,
+        }
+
+    def __write_fleet_report(self, tables: dict, spec: str) -> tuple:
+        generated = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        md_lines = ["# Fleet Monitoring Report\n", f"_Generated: {generated} from {spec} (last {self.plot_days} days per host)_\n", "---\n"]
+        html_parts = [
+            "<!DOCTYPE html>",
+            "<html><head><meta charset=\"utf-8\"><title>Fleet Monitoring Report</title></head><body>",
+            "<h1>Fleet Monitoring Report</h1>",
+            f"<p><em>Generated: {html.escape(generated)} from {html.escape(spec)} (last {self.plot_days} days per host)</em></p>",
+        ]
+        for title, df in tables.items():
+            md_lines.append(f"## {title}\n")
+            html_parts.append(f"<h2>{html.escape(title)}</h2>")
+            if df.empty:
+                md_lines.append("_No data available_")
+                html_parts.append("<p><em>No data available</em></p>")
+            else:
+                md_lines.append(df.to_markdown(index=False, floatfmt=".2f"))
+                html_parts.append(df.to_html(index=False, float_format=lambda v: f"{v:.2f}", na_rep="", escape=True))
+            md_lines.append("\n---\n")
+        md_lines.append("_End of report_\n")
+        html_parts.append("</body></html>")
+
+        outputs = []
+        for name, text in (("fleet_report.md", "\n".join(md_lines)), ("fleet_report.html", "\n".join(html_parts))):
+            out = Path(self.report_root) / name
+            with open(out, "w", encoding="utf-8") as f:
+                f.write(text)
+            try:
+                os.chmod(out, 0o777)
+            except Exception:
+                self.logger.warning(f"reportGenerator: Could not set permissions on {out}")
+            outputs.append(str(out))
+        return tuple(outputs)
+
+    def generate_fleet_report(self, spec: str) -> tuple:
+        """Merge the result DBs of many hosts (a directory or glob pattern) into one report.
+
+        Every DB is summarized in one pass in a worker process; only the small summaries
+        are merged here. Returns the paths of the Markdown and HTML report.
+        """
+        self.__check_if_module_is_active()
+
+        paths = resolve_result_dbs(spec)
+        if not paths:
+            self.logger.error(f"reportGenerator: No result databases found for {spec}")
+            adieu(1)
+        self.logger.info(f"reportGenerator: Building fleet report from {len(paths)} result database(s)")
+
+        with self.logger.timed("reportGenerator", "fleet_summaries", hosts=len(paths)):
+            summaries = self.__summarize_hosts(paths)
+        for s in summaries:
+            if s.get("error"):
+                self.logger.warning(f"reportGenerator: Could not read {s['path']}: {s['error']}")
+
+        tables = self.__fleet_tables(summaries)
+        try:
+            self.__prepare_output_dirs(prefix="fleet_report", with_plots=False)
+        except Exception:
+            self.logger.warning("reportGenerator: Could not create dated fleet report directory; using configured path as fallback.")
+            self.report_root = self.markdown_dir = Path(self.path_to_reports)
+            self.report_root.mkdir(parents=True, exist_ok=True)
+        md_path, html_path = self.__write_fleet_report(tables, spec)
+        self.logger.info(f"Fleet report written to: {md_path} and {html_path}")
+        return md_path, html_path
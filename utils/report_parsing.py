@@ -0,0 +1,96 @@
+import csv
+import io
+import warnings
+
+import numpy as np
+import pandas as pd
+
+# All parsers take a Series of raw TEXT values as stored in the results DB and work
+# column-wise (no Python call per row). Check values repeat a lot ('True', '195G', ...),
+# so the string operations run on the distinct values only and are mapped back by code.
+
+# disk_free is reported like '195G' or '200M'; values are converted to GB
+DISK_UNIT_TO_GB = {"T": 1024.0, "G": 1.0, "": 1.0, "M": 1.0 / 1024.0, "K": 1.0 / (1024.0 * 1024.0)}
+DISK_FREE_RE = r"^([0-9]+(?:\.[0-9]+)?)\s*([KMGTkmgt]?)$"
+
+
+def _as_text(series: pd.Series) -> pd.Series:
+    # numbers, booleans and None become strings / <NA> so the .str accessor works on every row
+    return series.astype("string").str.strip()
+
+
+def _per_distinct(series: pd.Series, parser, fill=np.nan) -> np.ndarray:
+    # parse every distinct value once and broadcast the results (values or rows) back to all rows
+    codes, uniques = pd.factorize(series)
+    parsed = np.asarray(parser(pd.Series(uniques, dtype=object)))
+    missing = np.full((1,) + parsed.shape[1:], fill, dtype=parsed.dtype)
+    out = np.concatenate((parsed, missing))
+    return out[codes]  # code -1 (missing value) picks the trailing fill value
+
+
+def parse_numeric(series: pd.Series) -> pd.Series:
+    return pd.to_numeric(_as_text(series), errors="coerce").astype("float64")
+
+
+def _disk_free_distinct(values: pd.Series) -> np.ndarray:
+    parts = _as_text(values).str.extract(DISK_FREE_RE)
+    numbers = pd.to_numeric(parts[0], errors="coerce").astype("float64")
+    factors = parts[1].str.upper().map(DISK_UNIT_TO_GB).astype("float64")
+    return (numbers * factors).to_numpy(dtype="float64")
+
+
+def parse_disk_free_gb(series: pd.Series) -> pd.Series:
+    return pd.Series(_per_distinct(series, _disk_free_distinct), index=series.index, dtype="float64")
+
+
+def _to_float(values: pd.Series) -> np.ndarray:
+    try:
+        # clean columns (the usual case) convert directly, without the per-value checks of to_numeric
+        return values.astype("float64").to_numpy()
+    except (TypeError, ValueError):
+        return pd.to_numeric(values, errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+
+
+def _load_averages_distinct(values: pd.Series) -> np.ndarray:
+    # at most three splits: a fourth value stays in column 3 and is ignored
+    parts = _as_text(values).str.split(n=3, expand=True)
+    out = np.full((len(values), 3), np.nan)
+    for idx in range(3):
+        if idx in parts.columns:
+            out[:, idx] = _to_float(parts[idx])
+    return out
+
+
+def _load_averages_csv(series: pd.Series) -> pd.DataFrame:
+    # load triples are nearly all distinct: tokenize the whole column at once with pandas' C parser
+    joined = "\n".join(series.astype("string").fillna("").to_numpy(dtype=object))
+    with warnings.catch_warnings():
+        # a row with more than three values: fall back instead of letting pandas drop the extra ones silently
+        warnings.simplefilter("error", pd.errors.ParserWarning)
+        parsed = pd.read_csv(
+            io.StringIO(joined), sep=r"\s+", header=None, names=["v1", "v2", "v3"], index_col=False,
+            skip_blank_lines=False, quoting=csv.QUOTE_NONE, engine="c",
+        )
+    if len(parsed) != len(series):
+        # e.g. a value with a line break in it: the rows would no longer line up
+        raise ValueError("row count changed while parsing")
+    return pd.DataFrame({name: _to_float(parsed[name]) for name in ("v1", "v2", "v3")}, index=series.index)
+
+
+def parse_load_averages(series: pd.Series) -> pd.DataFrame:
+    """Split '1.08 1.14 1.12' into float columns v1, v2, v3 (NaN where a value is missing)."""
+    if len(series):
+        try:
+            return _load_averages_csv(series)
+        except (ValueError, pd.errors.ParserError, pd.errors.ParserWarning, pd.errors.EmptyDataError):
+            pass
+    return pd.DataFrame(_per_distinct(series, _load_averages_distinct), columns=["v1", "v2", "v3"], index=series.index)
+
+
+def parse_observed(series: pd.Series, metric_name: str) -> pd.Series:
+    """Numeric value per row for a host metric (first value for load_average, GB for disk_free)."""
+    if metric_name == "load_average":
+        return parse_load_averages(series)["v1"]
+    if metric_name == "disk_free":
+        return parse_disk_free_gb(series)
+    return parse_numeric(series)
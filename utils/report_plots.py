@@ -0,0 +1,157 @@
+import matplotlib
+
+# reports are rendered headless (cron, daemon, worker processes): never use an interactive backend
+matplotlib.use("Agg")
+
+import matplotlib.dates as mdates  # noqa: E402
+import matplotlib.pyplot as plt  # noqa: E402
+import numpy as np  # noqa: E402
+import os  # noqa: E402
+import pandas as pd  # noqa: E402
+from datetime import timedelta  # noqa: E402
+from pathlib import Path  # noqa: E402
+
+# bump when the look of the plots changes: cached PNGs of older versions are rendered again
+PLOT_STYLE_VERSION = 2
+
+# series with more points than this are drawn as plain lines (markers would only add noise)
+MAX_MARKER_POINTS = 200
+
+# Plot functions are module-level so they can run in worker processes of the report's
+# process pool. Each one gets only the small, already aggregated frame it draws and
+# returns the path of the written PNG.
+
+
+def save_figure(fig, out_path: str) -> str:
+    out_path = Path(out_path)
+    out_path.parent.mkdir(mode=0o777, parents=True, exist_ok=True)
+    try:
+        os.chmod(str(out_path.parent), 0o777)
+    except Exception:
+        pass
+    fig.savefig(str(out_path), bbox_inches="tight")
+    try:
+        # ensure file is world-writable/executable as requested
+        os.chmod(str(out_path), 0o777)
+    except Exception:
+        pass
+    plt.close(fig)
+    return str(out_path)
+
+
+def _limit_to_last_days(ax, xs, last_n_days: int) -> None:
+    # Optionally limit x-axis to the last N days (if requested; 0 = whole history)
+    if not last_n_days:
+        return
+    try:
+        max_x = pd.to_datetime(xs, errors="coerce").max()
+        if pd.notna(max_x):
+            ax.set_xlim(max_x - timedelta(days=int(last_n_days)), max_x)
+    except Exception:
+        pass
+
+
+def _marker_style(points: int, marker: str = "o") -> dict:
+    return {"marker": marker, "markersize": 4} if points <= MAX_MARKER_POINTS else {}
+
+
+def _shade_envelope(ax, envelope) -> None:
+    # min/max per bucket of the raw samples, so peaks dropped by downsampling stay visible
+    if envelope is None or envelope.empty:
+        return
+    ax.fill_between(envelope["x"], envelope["y_min"], envelope["y_max"], alpha=0.2, linewidth=0, label="min/max")
+
+
+def _format_date_axis(ax) -> None:
+    try:
+        ax.xaxis.set_major_locator(mdates.AutoDateLocator())
+        ax.xaxis.set_major_formatter(mdates.ConciseDateFormatter(mdates.AutoDateLocator()))
+    except Exception:
+        pass
+
+
+def plot_time_series(df, x_col, y_col, title, out_path, xlabel="time", ylabel="", date_format=True, last_n_days: int = None, label: str = None, envelope=None) -> str:
+    """Allgemeine Zeitreihen-Plot-Funktion (Option B styling)."""
+    fig, ax = plt.subplots(figsize=(10, 4.5))
+    _shade_envelope(ax, envelope)
+    # Linie + Marker: markers keep short (e.g. single-point) series visible
+    if label:
+        ax.plot(df[x_col], df[y_col], linewidth=1.2, label=label, **_marker_style(len(df)))
+        ax.legend()
+    else:
+        ax.plot(df[x_col], df[y_col], linewidth=1.2, **_marker_style(len(df)))
+    ax.set_title(title, fontsize=12, fontweight="semibold")
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel(ylabel)
+    ax.grid(True, linestyle="--", linewidth=0.5, alpha=0.8)
+    # Datumformatierung
+    if date_format:
+        _format_date_axis(ax)
+    _limit_to_last_days(ax, df[x_col], last_n_days)
+
+    fig.tight_layout()
+    return save_figure(fig, out_path)
+
+
+def plot_uptime_bars(uptime, out_path) -> str:
+    """Bar plot of uptime_pct per service_name."""
+    fig, ax = plt.subplots(figsize=(10, 4.5))
+    ax.bar(uptime["service_name"].astype(str), uptime["uptime_pct"], linewidth=0.5)
+    ax.set_title("Service uptime (%) per service")
+    ax.set_xlabel("Service")
+    ax.set_ylabel("Uptime (%)")
+    ax.set_ylim(0, 100)
+    ax.grid(axis="y", linestyle="--", linewidth=0.5, alpha=0.8)
+    plt.setp(ax.get_xticklabels(), rotation=45, ha="right")
+    fig.tight_layout()
+    return save_figure(fig, out_path)
+
+
+def plot_load_average(df, title, ylabel, out_path, last_n_days: int = None, envelope=None) -> str:
+    """Three load average series (columns ts, v1, v2, v3) in one plot."""
+    fig, ax = plt.subplots(figsize=(10, 4.5))
+    _shade_envelope(ax, envelope)
+    # plot three series with different colors and markers
+    for col, marker, label in (("v1", "o", "1min"), ("v2", "s", "5min"), ("v3", "^", "15min")):
+        series = df[["ts", col]].dropna()
+        ax.plot(series["ts"], series[col], linewidth=1.2, label=label, **_marker_style(len(series), marker))
+    ax.set_title(title, fontsize=12, fontweight="semibold")
+    ax.set_xlabel("Time")
+    ax.set_ylabel(ylabel)
+    ax.grid(True, linestyle="--", linewidth=0.5, alpha=0.8)
+    ax.legend()
+    _format_date_axis(ax)
+    _limit_to_last_days(ax, df["ts"], last_n_days)
+
+    fig.tight_layout()
+    return save_figure(fig, out_path)
+
+
+def plot_latency_histogram(df, out_path, highlight: list = None) -> str:
+    """Histogram of latencies (columns subject, value in ms) on log-spaced bins.
+
+    All probes are drawn as one filled histogram; the probes in highlight (e.g. the
+    slowest ones) are drawn on top as outlines.
+    """
+    values = df["value"].to_numpy(dtype="float64")
+    values = values[np.isfinite(values) & (values > 0)]
+    fig, ax = plt.subplots(figsize=(10, 4.5))
+    if values.size:
+        low, high = values.min(), values.max()
+        bins = np.geomspace(low, high * 1.0001, 40) if high > low else 10
+        ax.hist(values, bins=bins, alpha=0.4, label="all probes")
+        for subject in highlight or []:
+            series = df.loc[df["subject"] == subject, "value"].to_numpy(dtype="float64")
+            series = series[np.isfinite(series) & (series > 0)]
+            if series.size:
+                ax.hist(series, bins=bins, histtype="step", linewidth=1.2, label=str(subject))
+        if high > low:
+            ax.set_xscale("log")
+        ax.legend()
+    ax.set_title("Probe latency (total, ms)", fontsize=12, fontweight="semibold")
+    ax.set_xlabel("Latency (ms)")
+    ax.set_ylabel("Probes")
+    ax.grid(True, linestyle="--", linewidth=0.5, alpha=0.8)
+    fig.tight_layout()
+    return save_figure(fig, out_path)
+
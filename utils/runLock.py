@@ -0,0 +1,134 @@
+from utils.log import log
+from utils.private_dir import ensure_private_dir
+
+import fcntl
+import os
+import stat
+import tempfile
+import traceback
+from pathlib import Path
+
+# name of the lock directory next to the results DB (used when execution.lock_dir is not set)
+LOCK_DIR_NAME = "monitoring_script_locks"
+
+# lock and rerun marker files are never followed through symlinks
+_OPEN_FLAGS = os.O_CREAT | os.O_NOFOLLOW | os.O_CLOEXEC
+
+
+def default_lock_dir() -> Path:
+    """<dir of db.db_path>/monitoring_script_locks; a per-user temp dir if no DB path is configured."""
+    try:
+        from utils.config import load_config
+        db_path = load_config().section("db").get_str("db_path", "")
+    except BaseException:
+        db_path = ""
+    if db_path:
+        return Path(db_path).parent / LOCK_DIR_NAME
+    return Path(tempfile.gettempdir()) / f"{LOCK_DIR_NAME}-{os.geteuid()}"
+
+OVERLAP_SKIP = "skip"
+OVERLAP_RERUN = "rerun"
+
+
+class runLock:
+    """Non-blocking per-module lock (fcntl.flock on <lock_dir>/<module>.lock).
+
+    The kernel releases the lock when the holding process ends, also after a crash or
+    kill -9, so there are no stale locks to clean up. An invocation that cannot get the
+    lock can leave a rerun marker (<module>.rerun) for the holder instead.
+
+    The lock directory must be private (owned by the running user, not writable by
+    others) and its files are opened without following symlinks; otherwise acquire()
+    raises PermissionError instead of writing through a file planted by another user.
+    """
+
+    def __init__(self, module: str, lock_dir=None) -> None:
+        self.module = module
+        self.lock_dir = Path(lock_dir) if lock_dir else default_lock_dir()
+        self.lock_path = self.lock_dir / f"{module}.lock"
+        self.rerun_path = self.lock_dir / f"{module}.rerun"
+        self._fd = None
+
+    def acquire(self) -> bool:
+        """Take the lock without waiting. False while another process holds it."""
+        ensure_private_dir(self.lock_dir)
+        fd = os.open(str(self.lock_path), os.O_RDWR | _OPEN_FLAGS, 0o600)
+        try:
+            st = os.fstat(fd)
+            # only truncate a file that is ours alone (no hard link to some other file)
+            if not stat.S_ISREG(st.st_mode) or st.st_uid != os.geteuid() or st.st_nlink != 1:
+                raise PermissionError(f"{self.lock_path} is not a regular lock file of the running user")
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+        except BaseException:
+            os.close(fd)
+            raise
+        # the PID of the holder is only informational (e.g. for ps/kill)
+        os.ftruncate(fd, 0)
+        os.write(fd, f"{os.getpid()}\n".encode())
+        self._fd = fd
+        return True
+
+    def release(self) -> None:
+        if self._fd is None:
+            return
+        try:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        finally:
+            os.close(self._fd)
+            self._fd = None
+
+    def request_rerun(self) -> None:
+        ensure_private_dir(self.lock_dir)
+        os.close(os.open(str(self.rerun_path), os.O_WRONLY | _OPEN_FLAGS, 0o600))
+
+    def take_rerun_request(self) -> bool:
+        """True (once) if another invocation asked for a rerun while the lock was held."""
+        try:
+            self.rerun_path.unlink()
+            return True
+        except FileNotFoundError:
+            return False
+
+
+def _record_overlap(module: str, logger) -> None:
+    # overlaps are rare: the DB is only opened when one happens
+    try:
+        from utils.db import db as DB
+        DB().save_metric(module, "run_overlap", 1)
+    except BaseException:
+        logger.error(f"runLock: Could not record overlap of {module}: {traceback.format_exc()}")
+
+
+def run_locked(module: str, func, lock_dir=None, overlap_policy: str = OVERLAP_RERUN, logger=None) -> bool:
+    """Run func while holding the module's run lock.
+
+    If a previous run of the module is still active, func is not run: the overlap is
+    recorded as metric run_overlap and, with the "rerun" policy, a rerun marker is left.
+    The active run checks the marker when it is done and runs once more, so any number
+    of overlapping invocations is coalesced into a single extra run.
+    Returns False when the run was skipped because of an overlap.
+    """
+    logger = logger or log()
+    lock = runLock(module, lock_dir)
+    if not lock.acquire():
+        if overlap_policy == OVERLAP_RERUN:
+            lock.request_rerun()
+            logger.info(f"runLock: {module} is still running in another process; requested a rerun")
+        else:
+            logger.info(f"runLock: {module} is still running in another process; skipping this run")
+        _record_overlap(module, logger)
+        return False
+
+    try:
+        # a marker left for a process that has ended in the meantime is covered by this run
+        lock.take_rerun_request()
+        func()
+        while overlap_policy == OVERLAP_RERUN and lock.take_rerun_request():
+            logger.info(f"runLock: Rerunning {module} as requested by an overlapping invocation")
+            func()
+    finally:
+        lock.release()
+    return True
@@ -0,0 +1,183 @@
+from utils.log import log
+from utils.config import load_config
+
+import random
+import signal
+import threading
+import time
+import traceback
+
+
+MODULE_OK = "ok"
+MODULE_FAILED = "failed"
+MODULE_TIMEOUT = "timeout"
+
+
+def _run_isolated(name: str, func, results: dict, logger) -> None:
+    try:
+        func()
+        results[name] = MODULE_OK
+    except SystemExit as e:
+        # modules end themselves with adieu(); here that only ends this module
+        results[name] = MODULE_OK if e.code in (0, None) else MODULE_FAILED
+        if results[name] == MODULE_FAILED:
+            logger.error(f"scheduler: Module {name} exited with code {e.code}")
+    except BaseException:
+        results[name] = MODULE_FAILED
+        logger.error(f"scheduler/{name}: {traceback.format_exc()}")
+
+
+def run_modules(tasks: dict, timeouts: dict = None, default_timeout: float = 300.0, parallel: bool = True, logger=None) -> dict:
+    """Run monitoring modules (name -> callable) as isolated tasks of one run.
+
+    Each module runs in its own daemon thread, all at once with parallel=True or one
+    after another otherwise. A module that fails, calls adieu() or exceeds its timeout
+    (timeouts[name], else default_timeout; 0 = no limit) does not affect the others.
+    A timed out module cannot be killed; it is abandoned and does not keep the process
+    alive. Returns name -> MODULE_OK / MODULE_FAILED / MODULE_TIMEOUT.
+    """
+    logger = logger or log()
+    timeouts = timeouts or {}
+    results = {}
+    threads = {}
+    deadlines = {}
+    for name, func in tasks.items():
+        thread = threading.Thread(target=_run_isolated, args=(name, func, results, logger), name=f"module-{name}", daemon=True)
+        timeout = float(timeouts.get(name, default_timeout) or 0)
+        deadlines[name] = time.monotonic() + timeout if timeout > 0 else None
+        thread.start()
+        threads[name] = thread
+        if not parallel:
+            _join(name, thread, deadlines[name], results, logger)
+
+    for name, thread in threads.items():
+        _join(name, thread, deadlines[name], results, logger)
+    return results
+
+
+def _join(name: str, thread: threading.Thread, deadline, results: dict, logger) -> None:
+    if name in results:
+        return
+    thread.join(None if deadline is None else max(0.0, deadline - time.monotonic()))
+    if thread.is_alive():
+        results[name] = MODULE_TIMEOUT
+        logger.error(f"scheduler: Module {name} did not finish within its timeout; continuing without it")
+
+
+class moduleRunner:
+    """Callable that runs one method of a long-lived monitoring object.
+
+    The object (with its config, DB connection and alert dispatcher) is built on the
+    first run and reused by every later run. It is only rebuilt when conf.json changed.
+    """
+
+    def __init__(self, name: str, factory, method: str) -> None:
+        self.name = name
+        self.factory = factory
+        self.method = method
+        self.instance = None
+        self._config = None
+
+    def __call__(self) -> None:
+        config = load_config()
+        if self.instance is None or config is not self._config:
+            self.instance = self.factory()
+            self._config = config
+        getattr(self.instance, self.method)()
+
+
+class scheduledJob:
+    def __init__(self, name: str, func, interval_seconds: float, jitter_seconds: float) -> None:
+        self.name = name
+        self.func = func
+        self.interval_seconds = float(interval_seconds)
+        self.jitter_seconds = max(0.0, float(jitter_seconds))
+        self.next_run = 0.0
+        self.runs = 0
+
+
+class scheduler:
+    """Runs jobs on independent intervals in one process (monitor.py --daemon).
+
+    Every job is started again interval_seconds after its previous start, plus a random
+    jitter of up to jitter_seconds so hosts sharing a config do not run in lockstep.
+    A run that takes longer than the interval delays the next one instead of queueing
+    runs up. Exceptions and adieu() (SystemExit) of a job are logged and only end that
+    run. stop() (or SIGTERM/SIGINT after install_signal_handlers) ends run() after the
+    current job.
+    """
+
+    def __init__(self, jitter_seconds: float = 0.0, after_job=None) -> None:
+        self.jitter_seconds = float(jitter_seconds)
+        # called after every job, e.g. to deliver the alerts of that run
+        self.after_job = after_job
+        self.jobs = []
+        self.logger = log()
+        self._stop = threading.Event()
+
+    def add_job(self, name: str, func, interval_seconds: float, jitter_seconds: float = None) -> scheduledJob:
+        if float(interval_seconds) <= 0:
+            raise ValueError(f"scheduler: interval of job {name} must be positive")
+        job = scheduledJob(name, func, interval_seconds, self.jitter_seconds if jitter_seconds is None else jitter_seconds)
+        self.jobs.append(job)
+        return job
+
+    def stop(self, *_) -> None:
+        self._stop.set()
+
+    @property
+    def stopped(self) -> bool:
+        return self._stop.is_set()
+
+    def install_signal_handlers(self) -> dict:
+        """Stop on SIGTERM/SIGINT. Returns the previous handlers (signal -> handler)."""
+        previous = {}
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            previous[sig] = signal.signal(sig, self.stop)
+        return previous
+
+    def __jitter(self, job: scheduledJob) -> float:
+        return random.uniform(0.0, job.jitter_seconds) if job.jitter_seconds else 0.0
+
+    def __run_job(self, job: scheduledJob) -> None:
+        try:
+            with self.logger.timed("scheduler", job.name):
+                job.func()
+        except SystemExit as e:
+            # modules end a run with adieu(); in the daemon that must not end the process
+            if e.code in (0, None):
+                self.logger.info(f"scheduler: Job {job.name} finished early")
+            else:
+                self.logger.error(f"scheduler: Job {job.name} exited with code {e.code}")
+        except Exception:
+            self.logger.error(f"scheduler/{job.name}: {traceback.format_exc()}")
+        finally:
+            job.runs += 1
+            if self.after_job is not None:
+                try:
+                    self.after_job(job)
+                except Exception:
+                    self.logger.error(f"scheduler/after_job ({job.name}): {traceback.format_exc()}")
+
+    def run(self) -> None:
+        if not self.jobs:
+            self.logger.warning("scheduler: No jobs scheduled. Exiting daemon.")
+            return
+        self._stop.clear()
+        now = time.monotonic()
+        for job in self.jobs:
+            job.next_run = now + self.__jitter(job)
+        self.logger.info("scheduler: Started with jobs " + ", ".join(f"{job.name} every {job.interval_seconds:g}s" for job in self.jobs))
+
+        while not self._stop.is_set():
+            job = min(self.jobs, key=lambda j: j.next_run)
+            delay = job.next_run - time.monotonic()
+            if delay > 0 and self._stop.wait(delay):
+                break
+
+            scheduled = job.next_run
+            self.__run_job(job)
+            # keep the cadence, but never try to catch up on runs that were missed
+            job.next_run = max(scheduled + job.interval_seconds, time.monotonic()) + self.__jitter(job)
+
+        self.logger.info("scheduler: Stopped.")
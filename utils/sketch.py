@@ -0,0 +1,169 @@
+import math
+
+import numpy as np
+import pandas as pd
+
+# Constant-memory summaries for values that are streamed in chunks (see the streaming
+# report mode in report_generator.py).
+
+
+class tDigest:
+    """Merging t-digest for approximate quantiles in bounded memory.
+
+    Values are buffered and folded into at most ~compression centroids. Centroids
+    are small near the tails (q close to 0 or 1) and large around the median, so
+    extreme quantiles like p99 stay accurate. The merge is vectorized: sorted
+    values are grouped by the integer part of the k1 scale function of their
+    quantile, which bounds each centroid to one unit of k.
+    """
+
+    def __init__(self, compression: float = 100.0, buffer_size: int = 10_000) -> None:
+        self.compression = float(compression)
+        self.buffer_size = int(buffer_size)
+        self.means = np.empty(0, dtype="float64")
+        self.weights = np.empty(0, dtype="float64")
+        self._buffer = []
+        self._buffered = 0
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def update(self, values) -> None:
+        values = np.asarray(values, dtype="float64").ravel()
+        values = values[~np.isnan(values)]
+        if values.size == 0:
+            return
+        self.count += int(values.size)
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        self._buffer.append(values)
+        self._buffered += values.size
+        if self._buffered >= self.buffer_size:
+            self._compress()
+
+    def merge(self, other: "tDigest") -> None:
+        """Fold another digest (e.g. of another host) into this one."""
+        other._compress()
+        if other.count == 0:
+            return
+        self._compress()
+        self.means = np.concatenate((self.means, other.means))
+        self.weights = np.concatenate((self.weights, other.weights))
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress(force=True)
+
+    def _compress(self, force: bool = False) -> None:
+        if not self._buffer and not force:
+            return
+        means = np.concatenate([self.means] + self._buffer)
+        weights = np.concatenate([self.weights] + [np.ones(b.size) for b in self._buffer])
+        self._buffer = []
+        self._buffered = 0
+        if means.size == 0:
+            return
+
+        order = np.argsort(means, kind="stable")
+        means, weights = means[order], weights[order]
+        total = weights.sum()
+        # quantile at the centre of every point, mapped onto the k1 scale
+        q = (np.cumsum(weights) - weights / 2.0) / total
+        k = self.compression / math.pi * np.arcsin(np.clip(2.0 * q - 1.0, -1.0, 1.0))
+        groups = np.floor(k - k.min()).astype(np.int64)
+
+        w = np.bincount(groups, weights=weights)
+        m = np.bincount(groups, weights=means * weights)
+        used = w > 0
+        self.weights = w[used]
+        self.means = m[used] / self.weights
+
+    def quantile(self, q: float) -> float:
+        self._compress()
+        if self.count == 0:
+            return math.nan
+        if self.means.size == 1:
+            return float(self.means[0])
+        positions = np.cumsum(self.weights) - self.weights / 2.0
+        # the exact min and max anchor both ends of the interpolation
+        xs = np.concatenate(([0.0], positions, [float(self.count)]))
+        ys = np.concatenate(([self.min], self.means, [self.max]))
+        return float(np.interp(float(q) * self.count, xs, ys))
+
+
+class streamingStats:
+    """Count, sum, min, max and approximate quantiles of a value stream."""
+
+    def __init__(self, compression: float = 100.0) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.digest = tDigest(compression)
+
+    def update(self, values) -> None:
+        values = np.asarray(values, dtype="float64").ravel()
+        values = values[~np.isnan(values)]
+        self.count += int(values.size)
+        self.total += float(values.sum())
+        self.digest.update(values)
+
+    def merge(self, other: "streamingStats") -> None:
+        self.count += other.count
+        self.total += other.total
+        self.digest.merge(other.digest)
+
+    def summary(self, quantiles=(0.5, 0.95, 0.99)) -> dict:
+        result = {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else math.nan,
+            "min": self.digest.min if self.count else math.nan,
+            "max": self.digest.max if self.count else math.nan,
+        }
+        for q in quantiles:
+            result[f"p{round(q * 100):g}"] = self.digest.quantile(q)
+        return result
+
+
+class timeBuckets:
+    """Count, mean, min and max per fixed-width time bucket for one or more value columns.
+
+    Memory depends on the number of buckets only, so arbitrarily long histories can be
+    folded in chunk by chunk and still be plotted with a constant number of points.
+    """
+
+    def __init__(self, start_ns: int, end_ns: int, buckets: int, columns: list) -> None:
+        self.start_ns = int(start_ns)
+        self.span_ns = max(1, int(end_ns) - int(start_ns))
+        self.buckets = max(1, int(buckets))
+        self.columns = list(columns)
+        shape = (len(self.columns), self.buckets)
+        self.counts = np.zeros(shape, dtype="int64")
+        self.sums = np.zeros(shape, dtype="float64")
+        self.mins = np.full(shape, np.inf)
+        self.maxs = np.full(shape, -np.inf)
+
+    def update(self, ts_ns, values) -> None:
+        ts_ns = np.asarray(ts_ns, dtype="int64")
+        values = np.asarray(values, dtype="float64").reshape(len(ts_ns), len(self.columns))
+        # in float64: (ts - start) * buckets overflows int64 for windows longer than a few weeks
+        idx = np.floor((ts_ns - self.start_ns) / self.span_ns * self.buckets).clip(0, self.buckets - 1).astype("int64")
+        for c in range(len(self.columns)):
+            col = values[:, c]
+            valid = ~np.isnan(col)
+            b, v = idx[valid], col[valid]
+            self.counts[c] += np.bincount(b, minlength=self.buckets)
+            self.sums[c] += np.bincount(b, weights=v, minlength=self.buckets)
+            np.minimum.at(self.mins[c], b, v)
+            np.maximum.at(self.maxs[c], b, v)
+
+    def frame(self, x_col: str = "ts") -> tuple:
+        """(means per bucket, min/max envelope of the first column) as DataFrames."""
+        offsets = (np.arange(self.buckets) * 2 + 1) * (self.span_ns / (2.0 * self.buckets))
+        centers = self.start_ns + offsets.astype("int64")
+        x = pd.to_datetime(centers)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            means = self.sums / self.counts
+        df = pd.DataFrame({x_col: x, **{name: means[c] for c, name in enumerate(self.columns)}})
+        used = self.counts.sum(axis=0) > 0
+        first = self.counts[0] > 0
+        envelope = pd.DataFrame({"x": x[first], "y_min": self.mins[0][first], "y_max": self.maxs[0][first]})
+        return df[used].reset_index(drop=True), envelope
@@ -0,0 +1,69 @@
+import subprocess
+
+# unit properties read with one `systemctl show` call for all monitored services
+UNIT_PROPERTIES = ("Id", "LoadState", "ActiveState", "SubState", "NRestarts")
+
+# like `systemctl is-active`: a unit that is reloading is still running
+ACTIVE_STATES = ("active", "reloading")
+
+# units per systemctl call, keeps the command line far below ARG_MAX
+MAX_UNITS_PER_CALL = 200
+
+
+def parse_show_output(output: str, units: list) -> dict:
+    """Map `systemctl show -p ...` output back to the requested unit names.
+
+    systemctl prints one block of KEY=value lines per unit, separated by an empty line,
+    in the order of the arguments. The order is used instead of Id, because aliases are
+    resolved (e.g. sshd -> ssh.service).
+    """
+    blocks = output.strip("\n").split("\n\n") if output.strip() else []
+    states = {}
+    for unit, block in zip(units, blocks):
+        props = {}
+        for line in block.splitlines():
+            key, sep, value = line.partition("=")
+            if sep:
+                props[key.strip()] = value.strip()
+        try:
+            restarts = int(props.get("NRestarts", ""))
+        except ValueError:
+            restarts = None
+        active_state = props.get("ActiveState", "unknown") or "unknown"
+        states[unit] = {
+            "unit": props.get("Id") or unit,
+            "load_state": props.get("LoadState", "unknown") or "unknown",
+            "active_state": active_state,
+            "sub_state": props.get("SubState", "unknown") or "unknown",
+            "n_restarts": restarts,
+            "is_active": active_state in ACTIVE_STATES,
+        }
+    return states
+
+
+def unknown_state(unit: str) -> dict:
+    return {
+        "unit": unit, "load_state": "unknown", "active_state": "unknown",
+        "sub_state": "unknown", "n_restarts": None, "is_active": False,
+    }
+
+
+def query_units(units: list, systemctl: str = "systemctl", timeout: float = 10.0) -> dict:
+    """State of all units (unit name -> dict) with one systemctl process per MAX_UNITS_PER_CALL units.
+
+    Raises subprocess.SubprocessError / OSError when systemctl cannot be run; units that
+    systemctl did not report on are returned with unknown_state().
+    """
+    units = list(dict.fromkeys(units))
+    states = {}
+    for start in range(0, len(units), MAX_UNITS_PER_CALL):
+        chunk = units[start:start + MAX_UNITS_PER_CALL]
+        result = subprocess.run(
+            # no shell: unit names are passed as plain arguments, "--" ends the options
+            [systemctl, "show", "--no-pager", "-p", ",".join(UNIT_PROPERTIES), "--", *chunk],
+            capture_output=True, text=True, timeout=timeout, check=True,
+        )
+        states.update(parse_show_output(result.stdout, chunk))
+    for unit in units:
+        states.setdefault(unit, unknown_state(unit))
+    return states